@@ -1,13 +1,16 @@
 from fastapi import FastAPI, HTTPException
-from typing import Dict
+from typing import Dict, List
 
-from realtime import InMemoryIndexer
+from config import INDEXER_MODE, PRICE_MODE
+from realtime import BucketedIndexer, InMemoryIndexer
 from store import compute_volumes_sql
 import logging
 from logging_config import setup_logging
 from rpc import get_client
 from price_cache import PriceCache
+from price_stream import PriceStream
 from contextlib import asynccontextmanager
+import asyncio
 
 
 app = FastAPI(title="PumpSwap Realtime Metrics")
@@ -15,7 +18,7 @@ app = FastAPI(title="PumpSwap Realtime Metrics")
 # Single global indexer instance (process-local).
 # Create indexer at import time so tests and modules can access it; the
 # optional PriceCache is attached at startup if available.
-indexer = InMemoryIndexer()
+indexer = BucketedIndexer() if INDEXER_MODE == "bucketed" else InMemoryIndexer()
 
 
 @asynccontextmanager
@@ -29,16 +32,25 @@ async def lifespan(app: FastAPI):
         indexer.price_cache = price_cache
     except Exception:
         pass
-    # Start background refresh task
+    # Start background refresh task, or the websocket price stream
+    stream = stream_task = None
     try:
-        await price_cache.start_background()
+        if PRICE_MODE == "stream":
+            stream = PriceStream(price_cache)
+            stream_task = asyncio.create_task(stream.run())
+        else:
+            await price_cache.start_background()
     except Exception:
         logging.getLogger(__name__).debug("PriceCache background start failed")
     try:
         yield
     finally:
         try:
-            await price_cache.stop_background()
+            if stream is not None:
+                stream.stop()
+                await stream_task
+            else:
+                await price_cache.stop_background()
         except Exception:
             pass
 
@@ -58,9 +70,8 @@ def get_volumes(mint: str, source: str = "memory") -> Dict[str, float]:
         # volumes relative to the most recent trade timestamp to keep test
         # behavior deterministic (tests add fixed ts values).
         try:
-            dq = indexer.store.get(mint)
-            if dq:
-                latest_ts = max(item[0] for item in dq)
+            latest_ts = indexer.latest_ts(mint)
+            if latest_ts is not None:
                 return indexer.get_volumes(mint, now_ts=latest_ts)
         except Exception:
             pass
@@ -70,6 +81,19 @@ def get_volumes(mint: str, source: str = "memory") -> Dict[str, float]:
         return compute_volumes_sql("./trades.db", mint)
 
 
+@app.get("/top/{window}")
+def get_top(window: str, k: int = 10, by: str = "usd") -> List[Dict[str, object]]:
+    """Return the top `k` mints by volume in `window` (INDEXER_MODE=bucketed)."""
+    if not isinstance(indexer, BucketedIndexer):
+        raise HTTPException(status_code=400, detail="top mints need INDEXER_MODE=bucketed")
+    try:
+        # Rank as of the newest trade seen, like the volumes endpoint
+        rows = indexer.top_mints(window, k=k, by=by, now_ts=indexer.now)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [{"mint": mint, by: vol} for mint, vol in rows]
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,167 @@
+"""Paginated, resumable signature backfill for a single mint.
+
+The store keeps per-mint watermarks (see `store.backfill_state`):
+
+- `newest_sig` / `oldest_sig` bound the range of signatures already scanned.
+- `head_top_sig` / `head_cursor_sig` describe a scan from the chain tip down
+  to `newest_sig` that was interrupted; the next run resumes it from the
+  cursor instead of starting over.
+
+A run first scans everything newer than the high watermark, then deepens
+below the low watermark until the target `depth` (total signatures scanned
+for the mint) or `min_slot` is reached, or history runs out. Signatures are
+handed to `process` in chunks and the cursor is committed after each chunk,
+so a crash only repeats the chunk that was in flight.
+
+`process` returns the signatures of its chunk it could not fetch (or
+None). Those are kept in `pending_signatures` and handed to `process` again
+at the start of the next run, up to `max_attempts` runs, so moving the
+cursor past them does not lose their trades.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from rpc import iter_signature_pages
+from store import add_pending, get_backfill_state, get_pending, remove_pending, save_backfill_state
+
+logger = logging.getLogger(__name__)
+
+# Returns the signatures of the chunk that could not be fetched
+ProcessFn = Callable[[List[Dict[str, Any]]], Optional[List[str]]]
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _bounded(page: List[Dict[str, Any]], remaining: Optional[int], min_slot: Optional[int]) -> List[Dict[str, Any]]:
+    """Cut a newest-first page at the depth budget and at `min_slot`."""
+    if min_slot is not None:
+        page = [s for s in page if s["slot"] is None or s["slot"] >= min_slot]
+    if remaining is not None:
+        page = page[:max(0, remaining)]
+    return page
+
+
+def _remaining(state: Dict[str, Any], depth: Optional[int]) -> Optional[int]:
+    if depth is None:
+        return None
+    return max(0, depth - int(state.get("scanned") or 0))
+
+
+def backfill_mint(
+    client,
+    conn,
+    mint: str,
+    process: ProcessFn,
+    depth: Optional[int] = None,
+    min_slot: Optional[int] = None,
+    page_size: int = 1000,
+    chunk_size: int = 100,
+    max_attempts: int = 5,
+) -> Dict[str, Any]:
+    """Scan signatures for `mint` and feed unseen ones to `process`.
+
+    Returns the updated backfill state with three extra keys: `new`
+    (signatures above the old high watermark processed this run),
+    `deepened` (signatures below the old low watermark processed this run)
+    and `retried` (pending signatures fetched this run).
+    """
+    state = get_backfill_state(conn, mint)
+    new_count = 0
+    deep_count = 0
+
+    def run(chunk: List[Dict[str, Any]]) -> List[str]:
+        unfetched = list(process(chunk) or ())
+        if unfetched:
+            add_pending(conn, unfetched, mint)
+        return unfetched
+
+    # ---- Phase 0: signatures earlier runs could not fetch
+    retried = 0
+    pending = get_pending(conn, mint)
+    expired = [sig for sig, attempts in pending if attempts >= max_attempts]
+    if expired:
+        logger.warning("backfill mint=%s giving up on %d signatures after %d attempts", mint, len(expired), max_attempts)
+        remove_pending(conn, expired, mint)
+    retry = [{"signature": sig, "slot": None, "err": None} for sig, attempts in pending if attempts < max_attempts]
+    for chunk in _chunks(retry, chunk_size):
+        unfetched = set(run(chunk))
+        done = [r["signature"] for r in chunk if r["signature"] not in unfetched]
+        remove_pending(conn, done, mint)
+        retried += len(done)
+
+    # ---- Phase 1: from the tip (or an interrupted head scan) down to newest_sig
+    first_run = state["newest_sig"] is None
+    cursor = state["head_cursor_sig"]
+    hit_bound = False
+    for page in iter_signature_pages(client, mint, before=cursor, until=state["newest_sig"], page_size=page_size):
+        # Only the very first scan is bounded by depth/min_slot; later head
+        # scans must reach the high watermark or they would leave a gap.
+        rows = _bounded(page, _remaining(state, depth), min_slot) if first_run else page
+        if rows and state["head_top_sig"] is None:
+            state["head_top_sig"] = rows[0]["signature"]
+            state["head_top_slot"] = rows[0]["slot"]
+            save_backfill_state(conn, mint, state)
+
+        for chunk in _chunks(rows, chunk_size):
+            run(chunk)
+            last = chunk[-1]
+            state["head_cursor_sig"] = last["signature"]
+            state["scanned"] = int(state["scanned"] or 0) + len(chunk)
+            if first_run:
+                state["oldest_sig"] = last["signature"]
+                state["oldest_slot"] = last["slot"]
+            save_backfill_state(conn, mint, state)
+            new_count += len(chunk)
+        if len(rows) < len(page):
+            hit_bound = True
+            break
+    else:
+        # Walked off the end of history during the very first scan
+        if first_run and state["head_top_sig"] is not None:
+            state["exhausted"] = 1
+
+    if state["head_top_sig"] is not None:
+        state["newest_sig"] = state["head_top_sig"]
+        state["newest_slot"] = state["head_top_slot"]
+    state["head_top_sig"] = None
+    state["head_top_slot"] = None
+    state["head_cursor_sig"] = None
+    save_backfill_state(conn, mint, state)
+
+    # ---- Phase 2: deepen below oldest_sig
+    bounded = depth is not None or min_slot is not None
+    depth_left = depth is None or _remaining(state, depth) > 0
+    slot_left = min_slot is None or state["oldest_slot"] is None or state["oldest_slot"] > min_slot
+    can_deepen = not hit_bound and not state["exhausted"] and state["oldest_sig"] is not None
+    if bounded and depth_left and slot_left and can_deepen:
+        exhausted = True
+        for page in iter_signature_pages(client, mint, before=state["oldest_sig"], page_size=page_size):
+            rows = _bounded(page, _remaining(state, depth), min_slot)
+            for chunk in _chunks(rows, chunk_size):
+                run(chunk)
+                last = chunk[-1]
+                state["oldest_sig"] = last["signature"]
+                state["oldest_slot"] = last["slot"]
+                state["scanned"] = int(state["scanned"] or 0) + len(chunk)
+                save_backfill_state(conn, mint, state)
+                deep_count += len(chunk)
+            if len(rows) < len(page):
+                exhausted = False
+                break
+        if exhausted:
+            state["exhausted"] = 1
+            save_backfill_state(conn, mint, state)
+
+    logger.info(
+        "backfill mint=%s new=%d deepened=%d retried=%d scanned=%s exhausted=%s",
+        mint,
+        new_count,
+        deep_count,
+        retried,
+        state["scanned"],
+        bool(state["exhausted"]),
+    )
+    return dict(state, new=new_count, deepened=deep_count, retried=retried)
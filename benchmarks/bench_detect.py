@@ -0,0 +1,86 @@
+"""Benchmark: `_tx_is_pumpswap_swap` vs the previous scan-and-lowercase detector.
+
+Usage:
+  python benchmarks/bench_detect.py [--repeat 5000]
+
+Times both detectors on the recorded PumpSwap swaps in tests/data and on
+the false-positive corpus in tests/data/detection, and prints how many
+corpus transactions each one accepts (the old detector's "swap"
+substring match lets other DEX swaps through).
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from parse import PUMPSWAP_PROGRAM_ID, _tx_is_pumpswap_swap
+
+PUMPSWAP_PROGRAM_IDS = [PUMPSWAP_PROGRAM_ID]
+
+
+def legacy_is_swap(tx):
+    """The detector before program-id/discriminator matching."""
+    try:
+        msg = tx["transaction"]["message"]
+    except Exception:
+        msg = None
+    if msg:
+        for ix in msg.get("instructions", []):
+            pid = ix.get("programId") or ix.get("program")
+            if isinstance(pid, dict):
+                pid = pid.get("key")
+            if pid in PUMPSWAP_PROGRAM_IDS:
+                return True
+    meta = tx.get("meta") or {}
+    for inner in meta.get("innerInstructions") or []:
+        for ix in inner.get("instructions", []):
+            pid = ix.get("programId") or ix.get("program")
+            if isinstance(pid, dict):
+                pid = pid.get("key")
+            if pid in PUMPSWAP_PROGRAM_IDS:
+                return True
+    for line in meta.get("logMessages") or []:
+        if not line:
+            continue
+        s = str(line).lower()
+        if any(pid.lower() in s for pid in PUMPSWAP_PROGRAM_IDS):
+            return True
+        if "swap" in s:
+            return True
+    return False
+
+
+def timeit(fn, txs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for tx in txs:
+            fn(tx)
+    return (time.perf_counter() - start) / (repeat * len(txs))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5000)
+    args = ap.parse_args()
+
+    swaps = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "data", "*.json"))):
+        with open(path) as f:
+            swaps.append(json.load(f))
+    with open(os.path.join(ROOT, "tests", "data", "detection", "false_positives.json")) as f:
+        others = [c["tx"] for c in json.load(f)]
+
+    for label, txs in ((f"PumpSwap swaps ({len(swaps)})", swaps), (f"other txs ({len(others)})", others)):
+        old = timeit(legacy_is_swap, txs, args.repeat)
+        new = timeit(_tx_is_pumpswap_swap, txs, args.repeat)
+        old_n, new_n = sum(map(legacy_is_swap, txs)), sum(map(_tx_is_pumpswap_swap, txs))
+        print(f"{label:<20s} old {old * 1e6:6.2f} us/tx accepts {old_n:2d}   new {new * 1e6:6.2f} us/tx accepts {new_n:2d}")
+
+
+if __name__ == "__main__":
+    main()
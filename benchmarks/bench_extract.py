@@ -0,0 +1,78 @@
+"""Benchmark: `extract_trades_from_tx` vs one `extract_trade_from_tx` call per mint.
+
+Usage:
+  python benchmarks/bench_extract.py [--repeat 2000] [--mints 8] [--rows 40]
+
+Runs both on the recorded transactions in tests/data and on a synthetic
+multi-hop transaction with `--mints` mints spread over `--rows` token
+balance rows, and checks the single-pass (base mint) trade is one of the
+per-mint trades.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from parse import PUMPSWAP_PROGRAM_ID, extract_trade_from_tx, extract_trades_from_tx
+
+
+def per_mint(tx, sig):
+    """The previous subscriber code path."""
+    meta = tx.get("meta") or {}
+    rows = (meta.get("preTokenBalances") or []) + (meta.get("postTokenBalances") or [])
+    mints = {r.get("mint") for r in rows if r.get("mint")}
+    return [t for t in (extract_trade_from_tx(tx, m, sig) for m in sorted(mints)) if t]
+
+
+def synthetic(mints, rows):
+    rng = random.Random(7)
+    pre, post = [], []
+    for i in range(rows):
+        mint = f"MINT{i % mints}"
+        a = rng.uniform(0, 1e6)
+        pre.append({"accountIndex": i, "owner": f"o{i}", "mint": mint, "uiTokenAmount": {"uiAmount": a}})
+        post.append({"accountIndex": i, "owner": f"o{i}", "mint": mint, "uiTokenAmount": {"uiAmount": a + rng.uniform(-1e3, 1e3)}})
+    return {
+        "blockTime": 1_700_000_000,
+        "transaction": {"message": {"instructions": [{"programId": PUMPSWAP_PROGRAM_ID}]}},
+        "meta": {"preTokenBalances": pre, "postTokenBalances": post, "logMessages": []},
+    }
+
+
+def timeit(fn, txs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for tx in txs:
+            fn(tx, "SIG")
+    return (time.perf_counter() - start) / (repeat * len(txs))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=2000)
+    ap.add_argument("--mints", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=40)
+    args = ap.parse_args()
+
+    recorded = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "data", "*.json"))):
+        with open(path) as f:
+            recorded.append(json.load(f))
+    cases = [(f"recorded ({len(recorded)} txs)", recorded), (f"synthetic {args.mints} mints", [synthetic(args.mints, args.rows)])]
+
+    for label, txs in cases:
+        for tx in txs:
+            assert all(t in per_mint(tx, "SIG") for t in extract_trades_from_tx(tx, "SIG"))
+        old = timeit(per_mint, txs, args.repeat)
+        new = timeit(extract_trades_from_tx, txs, args.repeat)
+        print(f"{label:<22s} per-mint {old * 1e6:8.2f} us/tx   single pass {new * 1e6:8.2f} us/tx  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
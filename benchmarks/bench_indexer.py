@@ -0,0 +1,73 @@
+"""Benchmark: `InMemoryIndexer.get_volumes` latency vs trades held in the last hour.
+
+Usage:
+  python benchmarks/bench_indexer.py [--sizes 1000,10000,100000] [--repeat 600]
+
+For each size, fills an indexer with that many trades for one mint spread
+over the last hour and times `get_volumes` as the clock ticks forward one
+second per call, next to a full scan with `metrics.compute_volumes` over the
+same trades (what every read used to cost). Each tick only pays for the
+trades that cross a window edge in that second, so the indexer column stays
+near-flat while the full scan grows linearly.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import STABLECOIN_MINTS, compute_volumes
+from parse import Trade
+from realtime import InMemoryIndexer
+
+NOW = 1_700_000_000
+
+
+def make_trades(n):
+    rng = random.Random(1)
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    ts = sorted(NOW - rng.randint(0, 3599) for _ in range(n))
+    return [
+        Trade(
+            signature=f"S{i:09d}",
+            ts=t,
+            mint="MINT",
+            token_delta=rng.uniform(-1e6, 1e6),
+            quote_mint=usdc,
+            price=rng.uniform(1e-6, 1e-3),
+        )
+        for i, t in enumerate(ts)
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--repeat", type=int, default=600)
+    args = ap.parse_args()
+
+    print(f"{'trades':>10s} {'get_volumes':>14s} {'full scan':>14s}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        trades = make_trades(n)
+        idx = InMemoryIndexer()
+        for t in trades:
+            idx.add_trade(t)
+
+        start = time.perf_counter()
+        for i in range(args.repeat):
+            idx.get_volumes("MINT", now_ts=NOW + i, return_usd=True)
+        fast = (time.perf_counter() - start) / args.repeat
+
+        scan_repeat = max(1, args.repeat * 1000 // n // 10)
+        start = time.perf_counter()
+        for _ in range(scan_repeat):
+            compute_volumes(trades, now=NOW, return_usd=True)
+        slow = (time.perf_counter() - start) / scan_repeat
+
+        print(f"{n:10d} {fast * 1e6:11.2f} us {slow * 1e6:11.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: memory held by the in-memory indexer per retained trade.
+
+Usage:
+  python benchmarks/bench_indexer_memory.py [--n 10000000] [--mints 10000]
+
+Retains `--n` trades (all inside the last hour, so nothing is pruned) spread
+over `--mints` mints, first as the old per-mint deque of
+(ts, delta, quote_mint, price) tuples and then in `InMemoryIndexer`'s typed
+columns, and reports the bytes each structure holds (containers plus the
+objects they own; quote mint strings are shared and not counted).
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import STABLECOIN_MINTS
+from parse import Trade
+from realtime import InMemoryIndexer
+
+NOW = 1_700_000_000
+SOL = "So11111111111111111111111111111111111111112"
+
+
+def trades(n, mints):
+    rng = random.Random(1)
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    names = [f"MINT{m:05d}" for m in range(mints)]
+    per_mint = max(1, n // mints)
+    for i in range(n):
+        # in order per mint, spread over the hour
+        ts = NOW - 3599 + (i // mints) * 3599 // per_mint
+        quote = usdc if i % 3 else SOL
+        # deltas/prices as fresh objects, like trades parsed off the wire
+        yield names[i % mints], ts, rng.uniform(-1e6, 1e6), quote, rng.uniform(1e-6, 1e-3)
+
+
+def deque_size(store):
+    size = sys.getsizeof(store)
+    for mint, dq in store.items():
+        size += sys.getsizeof(mint) + sys.getsizeof(dq)
+        for row in dq:
+            ts, delta, _, price = row
+            size += sys.getsizeof(row) + sys.getsizeof(ts) + sys.getsizeof(delta) + sys.getsizeof(price)
+    return size
+
+
+def indexer_size(idx):
+    size = sys.getsizeof(idx.mints) + sys.getsizeof(idx.quotes.ids) + sys.getsizeof(idx.quotes.names)
+    for mint, mw in idx.mints.items():
+        size += sys.getsizeof(mint) + sys.getsizeof(mw) + sys.getsizeof(mw.ptr) + sys.getsizeof(mw.sums)
+        size += sum(sys.getsizeof(s) + 4 * sys.getsizeof(0.0) for s in mw.sums)
+        size += sum(sys.getsizeof(col) for col in (mw.ts, mw.delta, mw.price, mw.quote))
+    return size
+
+
+def measure(label, build, sizeof, n):
+    gc.collect()
+    start = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - start
+    size = sizeof(held)
+    print(f"{label:<18s} {size / 2**20:8.1f} MiB  {size / n:6.1f} B/trade  (built in {elapsed:.1f}s)")
+    return held
+
+
+def build_deques(n, mints):
+    store = defaultdict(deque)
+    for mint, ts, delta, quote, price in trades(n, mints):
+        store[mint].append((ts, delta, quote, price))
+    return store
+
+
+def build_indexer(n, mints):
+    idx = InMemoryIndexer()
+    for mint, ts, delta, quote, price in trades(n, mints):
+        idx.add_trade(Trade(signature="", ts=ts, mint=mint, token_delta=delta, quote_mint=quote, price=price))
+    return idx
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=10_000_000)
+    ap.add_argument("--mints", type=int, default=10_000)
+    args = ap.parse_args()
+
+    held = measure("deque of tuples", lambda: build_deques(args.n, args.mints), deque_size, args.n)
+    del held
+    idx = measure("typed columns", lambda: build_indexer(args.n, args.mints), indexer_size, args.n)
+    assert sum(len(mw) for mw in idx.mints.values()) == args.n
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark: backfill fetch + parse in-process vs `ShardedParser` worker processes.
+
+Usage:
+  python benchmarks/bench_parallel_backfill.py [--n 20000] [--processes 1,2,4] [--chunk 2000]
+
+Serves synthetic PumpSwap transactions (see `replay.synth_tx`) from a fake
+zero-latency RPC provider as raw JSON, so the run is bound by decoding and
+parsing. Reports tx/sec per process count and checks every run returns the
+same trades. Scaling is limited by the number of cores available.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parallel_backfill import ShardedParser
+from parse import extract_trade_from_tx
+from replay import _pubkey, synth_tx
+from rpc import fetch_txs
+
+RNG = random.Random(5)
+POOL = {k: _pubkey(RNG) for k in ("address", "base_mint", "base_vault", "quote_vault", "fee_recipient", "fee_account")}
+POOL["quote_mint"] = "So11111111111111111111111111111111111111112"
+BODIES = {}
+
+
+class RawProvider:
+    def make_request_unparsed(self, req):
+        return BODIES[req.to_json().split('"params":["', 1)[1].split('"', 1)[0]]
+
+
+def fake_client(rpc_url):
+    return SimpleNamespace(_provider=RawProvider())
+
+
+def in_process(sigs):
+    client = fake_client("fake://")
+    out = []
+    for sig, tx in fetch_txs(client, sigs, workers=4):
+        t = extract_trade_from_tx(tx, POOL["base_mint"], sig)
+        if t:
+            out.append(t)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--processes", default="1,2,4")
+    ap.add_argument("--chunk", type=int, default=2000, help="Signatures per backfill chunk")
+    args = ap.parse_args()
+
+    from solders.signature import Signature
+
+    sigs = [str(Signature.new_unique()) for _ in range(args.n)]
+    for i, s in enumerate(sigs):
+        tx = synth_tx(RNG, 1_700_000_000 + i, POOL, _pubkey(RNG))
+        BODIES[s] = json.dumps({"jsonrpc": "2.0", "id": 0, "result": tx})
+    chunks = [sigs[i:i + args.chunk] for i in range(0, len(sigs), args.chunk)]
+    print(f"{os.cpu_count() or 1} cores")
+
+    start = time.perf_counter()
+    expected = [t for c in chunks for t in in_process(c)]
+    base = len(sigs) / (time.perf_counter() - start)
+    print(f"in-process        {base:9.0f} tx/s")
+
+    for p in [int(x) for x in args.processes.split(",")]:
+        # workers fork after BODIES is filled, so they see the same corpus
+        with ShardedParser("fake://", processes=p, threads=4, client_factory=fake_client) as sharded:
+            sharded.run(POOL["base_mint"], sigs[:p])  # start the workers
+            start = time.perf_counter()
+            got = [t for c in chunks for t in sharded.run(POOL["base_mint"], c)[0]]
+            rate = len(sigs) / (time.perf_counter() - start)
+        assert got == expected
+        print(f"{p:2d} processes      {rate:9.0f} tx/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: `pyth_parser.parse_price_account` vs the old per-field unpacks.
+
+Usage:
+  python benchmarks/bench_pyth_decode.py [--n 20000]
+
+Decodes `--n` synthetic-layout accounts with the old parser (eight
+`struct.unpack_from` calls with format strings) and the current one, then
+`--n` Pyth v2 price accounts (3312 bytes, 8 publishers) without and with
+the publisher components, with `parse_price` (price and exponent only) and
+with `rpc.decode_pyth_price`, the entry point the price cache and stream
+use. Prints accounts decoded per millisecond.
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pyth_parser
+import rpc
+
+
+def legacy_parse(raw):
+    """The previous parser: one `unpack_from` per field."""
+    if not raw or len(raw) < 52:
+        return None
+    if struct.unpack_from('<I', raw, 0)[0] != 0x50595448:
+        return None
+    return {
+        'version': struct.unpack_from('<I', raw, 4)[0],
+        'type': struct.unpack_from('<I', raw, 8)[0],
+        'price': struct.unpack_from('<q', raw, 16)[0],
+        'expo': struct.unpack_from('<i', raw, 12)[0],
+        'conf': struct.unpack_from('<Q', raw, 24)[0],
+        'status': struct.unpack_from('<I', raw, 32)[0],
+        'valid_slot': struct.unpack_from('<Q', raw, 36)[0],
+        'publish_slot': struct.unpack_from('<Q', raw, 44)[0],
+    }
+
+
+def rate(fn, accounts):
+    start = time.perf_counter()
+    for raw in accounts:
+        fn(raw)
+    return len(accounts) / ((time.perf_counter() - start) * 1e3)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=20_000)
+    args = ap.parse_args()
+
+    rng = random.Random(4)
+    synthetic = [
+        pyth_parser.make_price_account_bytes(price=rng.randint(1, 10**12), expo=-8, conf=rng.randint(1, 10**6))
+        for _ in range(args.n)
+    ]
+    pubs = [bytes([i]) * 32 for i in range(8)]
+    v2 = [
+        pyth_parser.make_v2_price_account_bytes(
+            price=rng.randint(1, 10**12), expo=-8, conf=rng.randint(1, 10**6),
+            components=[(k, rng.randint(1, 10**12), 1) for k in pubs],
+        )
+        for _ in range(args.n)
+    ]
+    for raw in synthetic[:100]:
+        assert pyth_parser.parse_price_account(raw) == legacy_parse(raw)
+
+    print(f"synthetic, old unpacks     {rate(legacy_parse, synthetic):7.0f} accounts/ms")
+    print(f"synthetic, struct.Struct   {rate(pyth_parser.parse_price_account, synthetic):7.0f} accounts/ms")
+    print(f"pyth v2                    {rate(pyth_parser.parse_price_account, v2):7.0f} accounts/ms")
+    with_components = rate(lambda raw: pyth_parser.parse_price_account(raw, components=True), v2)
+    print(f"pyth v2 + 8 components     {with_components:7.0f} accounts/ms")
+    print(f"pyth v2, parse_price       {rate(pyth_parser.parse_price, v2):7.0f} accounts/ms")
+    backend = " (pythclient)" if rpc.PriceAccount is not None else ""
+    print(f"pyth v2, decode_pyth_price {rate(rpc.decode_pyth_price, v2):7.0f} accounts/ms{backend}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: the vectorized Pyth heuristic scan vs the per-offset unpack loop.
+
+Usage:
+  python benchmarks/bench_pyth_scan.py [--repeat 20]
+
+Times `rpc._scan_pyth_price` (NumPy) and `rpc._scan_pyth_price_py` (the old
+nested `unpack_from` loop) on 3312-byte accounts, the size of a Pyth v2
+price account, and checks they return the same price:
+
+  pyth v2 header   magic/version/type/size header, price fields zeroed
+  late candidate   zeros with one plausible (price, expo) pair near the end
+  random           random bytes (almost no exponent candidates)
+  no price         zeros only: every offset is an exponent candidate
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import rpc
+
+SIZE = 3312
+
+
+def accounts():
+    header = bytearray(SIZE)
+    struct.pack_into("<IIII", header, 0, 0xA1B2C3D4, 2, 3, SIZE)
+    late = bytearray(SIZE)
+    struct.pack_into("<i", late, SIZE - 40, -8)
+    struct.pack_into("<q", late, SIZE - 20, 2_500_000_000)
+    # any zero run is an exponent candidate (0); fill the rest with 0xff so
+    # only the pair above is plausible
+    late[:SIZE - 100] = b"\xff" * (SIZE - 100)
+    rng = random.Random(1)
+    return [
+        ("pyth v2 header", bytes(header)),
+        ("late candidate", bytes(late)),
+        ("random", bytes(rng.getrandbits(8) for _ in range(SIZE))),
+        ("no price", bytes(SIZE)),
+    ]
+
+
+def timeit(fn, raw, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    if rpc.np is None:
+        sys.exit("numpy is not installed")
+
+    for label, raw in accounts():
+        expected = rpc._scan_pyth_price_py(raw)
+        assert rpc._scan_pyth_price(raw) == expected
+        old = timeit(rpc._scan_pyth_price_py, raw, args.repeat)
+        new = timeit(rpc._scan_pyth_price, raw, args.repeat)
+        print(f"{label:<15s} loop {old * 1e6:9.1f} us   numpy {new * 1e6:7.1f} us  ({old / new:6.1f}x)  price={expected!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: `get_trades_for_mint` from typed columns vs the old JSON `raw` decode.
+
+Usage:
+  python benchmarks/bench_read_trades.py [--n 200000] [--repeat 3]
+
+Writes `--n` trades of one mint to a temporary database twice: as
+`save_trades` stores them now (no `raw`), and with the JSON copy the store
+used to keep in `raw`. Prints the file sizes and the read time per trade of
+the typed reader and of the old per-row `json.loads` reader, after checking
+they return the same trades.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parse import Trade
+from store import get_trades_for_mint, init_db, iter_trades_for_mint, save_trades
+
+MINT = "BENCHMINT"
+
+
+def legacy_read(conn, mint):
+    """The previous reader: typed columns plus `json.loads(raw)` per row."""
+    out = []
+    for signature, ts, row_mint, td, qm, qd, price, raw in conn.execute(
+        "SELECT signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw "
+        "FROM trades WHERE mint = ? ORDER BY ts ASC",
+        (mint,),
+    ):
+        data = json.loads(raw) if raw else {}
+        out.append(Trade(
+            signature=signature, ts=int(ts), mint=row_mint, token_delta=float(td),
+            quote_mint=data.get("quote_mint", qm), quote_delta=data.get("quote_delta", qd),
+            price=data.get("price", price),
+        ))
+    return out
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = random.Random(3)
+    trades = []
+    for i in range(args.n):
+        raw = rng.randint(-10**12, 10**12) or 1
+        quote = -raw * rng.randint(1, 1000)
+        trades.append(Trade(
+            f"SIG{i:09d}", 1_700_000_000 + i, MINT, raw / 1e6, "QUOTE", quote / 1e9, abs(quote) * 1e6 / (abs(raw) * 1e9),
+            raw, 6, quote, 9,
+        ))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        typed_path, legacy_path = os.path.join(tmp, "typed.db"), os.path.join(tmp, "legacy.db")
+        typed, legacy = init_db(typed_path), init_db(legacy_path)
+        save_trades(typed, trades)
+        save_trades(legacy, trades)
+        legacy.executemany(
+            "UPDATE trades SET raw = ? WHERE signature = ?", [(json.dumps(t.__dict__), t.signature) for t in trades]
+        )
+        legacy.commit()
+        for conn in (typed, legacy):
+            conn.execute("VACUUM")
+        typed_mb, legacy_mb = os.path.getsize(typed_path) / 1e6, os.path.getsize(legacy_path) / 1e6
+        print(f"db size: typed {typed_mb:.1f} MB, with JSON raw {legacy_mb:.1f} MB")
+
+        assert get_trades_for_mint(typed, MINT) == trades
+        assert [t.price for t in legacy_read(legacy, MINT)] == [t.price for t in trades]
+        old = timeit(lambda: legacy_read(legacy, MINT), args.repeat)
+        new = timeit(lambda: get_trades_for_mint(typed, MINT), args.repeat)
+        stream = timeit(lambda: sum(1 for _ in iter_trades_for_mint(typed, MINT)), args.repeat)
+        n = len(trades)
+        print(f"json raw decode  {old / n * 1e6:6.2f} us/trade")
+        print(f"typed columns    {new / n * 1e6:6.2f} us/trade  ({old / new:.1f}x)")
+        print(f"typed streaming  {stream / n * 1e6:6.2f} us/trade")
+        typed.close()
+        legacy.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: per-row `save_trade` vs batched `save_trades` inserts.
+
+Usage:
+  python benchmarks/bench_store_writes.py [--n 100000] [--batch 1000]
+
+Each mode writes to a fresh database file in a temporary directory and
+reports trades/sec. Per-row inserts commit once per trade, so they are run
+on both the default rollback journal and WAL + synchronous=NORMAL.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parse import Trade
+from store import init_db, save_trade, save_trades
+
+
+def make_trades(n: int):
+    base = 1_700_000_000
+    return [
+        Trade(
+            signature=f"SIG{i:09d}",
+            ts=base + i // 10,
+            mint=f"MINT{i % 50}",
+            token_delta=float((i % 997) - 498) or 1.0,
+            quote_mint="QUOTE",
+            quote_delta=-float(i % 101),
+            price=0.001 * (i % 313 + 1),
+        )
+        for i in range(n)
+    ]
+
+
+def run(label, path, trades, batch, wal, synchronous):
+    conn = init_db(path, wal=wal, synchronous=synchronous)
+    start = time.perf_counter()
+    if batch:
+        inserted = 0
+        for i in range(0, len(trades), batch):
+            inserted += save_trades(conn, trades[i:i + batch])[0]
+    else:
+        inserted = sum(1 for t in trades if save_trade(conn, t))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    assert inserted == len(trades)
+    print(f"{label:<34s} {len(trades):9d} trades {elapsed:8.2f}s {len(trades) / elapsed:12.0f} trades/sec")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=1000)
+    args = ap.parse_args()
+
+    trades = make_trades(args.n)
+    with tempfile.TemporaryDirectory() as d:
+        run("per-row, rollback journal", os.path.join(d, "a.db"), trades, 0, False, None)
+        run("per-row, WAL + NORMAL", os.path.join(d, "b.db"), trades, 0, True, "NORMAL")
+        run(f"batched {args.batch}, rollback journal", os.path.join(d, "c.db"), trades, args.batch, False, None)
+        run(f"batched {args.batch}, WAL + NORMAL", os.path.join(d, "d.db"), trades, args.batch, True, "NORMAL")
+
+
+if __name__ == "__main__":
+    main()
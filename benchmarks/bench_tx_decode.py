@@ -0,0 +1,77 @@
+"""Benchmark: ways of turning a `getTransaction` response into the dict `parse` reads.
+
+Usage:
+  python benchmarks/bench_tx_decode.py [--repeat 2000]
+
+For each recorded transaction in tests/data, times the cost per tx of:
+  typed + json      solders parse, then `to_json()` + `json.loads` (old path)
+  typed + orjson    solders parse, then `to_json()` + `orjson.loads`
+  raw + orjson      `rpc.decode_tx_response` on the raw body (if installed)
+  raw + json        the same with the stdlib decoder
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from solders.rpc.responses import GetTransactionResp
+
+import rpc
+from parse import extract_trades_from_tx
+
+
+def typed_to_json(raw):
+    return json.loads(GetTransactionResp.from_json(raw).value.to_json())
+
+
+def typed_orjson(raw):
+    return rpc.orjson.loads(GetTransactionResp.from_json(raw).value.to_json())
+
+
+def raw_json(raw):
+    orjson, rpc.orjson = rpc.orjson, None
+    try:
+        return rpc.decode_tx_response(raw)
+    finally:
+        rpc.orjson = orjson
+
+
+def timeit(fn, bodies, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw in bodies:
+            fn(raw)
+    return (time.perf_counter() - start) / (repeat * len(bodies))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "data", "*.json"))):
+        with open(path) as f:
+            bodies.append(json.dumps({"jsonrpc": "2.0", "id": 0, "result": json.load(f)}))
+
+    paths = [("typed + json", typed_to_json)]
+    if rpc.orjson is not None:
+        paths += [("typed + orjson", typed_orjson), ("raw + orjson", rpc.decode_tx_response)]
+    paths.append(("raw + json", raw_json))
+
+    expected = [extract_trades_from_tx(typed_to_json(b), "SIG") for b in bodies]
+    base = None
+    for label, fn in paths:
+        assert [extract_trades_from_tx(fn(b), "SIG") for b in bodies] == expected
+        t = timeit(fn, bodies, args.repeat)
+        base = base or t
+        print(f"{label:<16s} {t * 1e6:8.2f} us/tx  ({base / t:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: `compute_volumes_sql` (rollups / raw single pass) vs the per-window loop.
+
+Usage:
+  python benchmarks/bench_volumes_sql.py [--n 1000000] [--mints 10] [--repeat 20]
+
+Fills a temporary database with `--n` trades spread over the last two hours
+for `--mints` mints and times both implementations for one mint. Results are
+checked to match before timings are printed.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import STABLECOIN_MINTS
+from parse import Trade
+from store import WINDOWS, compute_volumes_sql, init_db, save_trades
+
+NOW = 1_700_000_000
+
+
+def per_window(conn, mint, now):
+    """The previous implementation: one SELECT per window, summed in Python."""
+    res = {}
+    for label, secs in WINDOWS.items():
+        rows = conn.execute(
+            "SELECT token_delta, price, quote_mint FROM trades WHERE mint = ? AND ts >= ?",
+            (mint, now - secs),
+        ).fetchall()
+        token_total = usd_total = 0.0
+        for td, price, qm in rows:
+            token_total += abs(float(td))
+            if price is not None and qm in STABLECOIN_MINTS:
+                usd_total += abs(float(td)) * abs(float(price))
+        res[label] = {"token": token_total, "usd": usd_total}
+    return res
+
+
+def fill(conn, n, mints):
+    rng = random.Random(1)
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    batch = []
+    for i in range(n):
+        batch.append(Trade(
+            signature=f"S{i:09d}",
+            ts=NOW - rng.randint(0, 7200),
+            mint=f"MINT{i % mints}",
+            token_delta=rng.uniform(-1e6, 1e6),
+            quote_mint=usdc if i % 3 else "So11111111111111111111111111111111111111112",
+            price=rng.uniform(1e-6, 1e-3),
+        ))
+        if len(batch) == 50_000:
+            save_trades(conn, batch)
+            batch = []
+    if batch:
+        save_trades(conn, batch)
+
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - start) / repeat, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--mints", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        conn = init_db(os.path.join(d, "bench.db"), wal=True, synchronous="OFF")
+        t0 = time.perf_counter()
+        fill(conn, args.n, args.mints)
+        print(f"filled {args.n} trades in {time.perf_counter() - t0:.1f}s")
+
+        old_t, old = timeit(lambda: per_window(conn, "MINT0", NOW), args.repeat)
+        raw_t, raw = timeit(
+            lambda: compute_volumes_sql(conn, "MINT0", now_ts=NOW, return_usd=True, use_rollups=False), args.repeat
+        )
+        roll_t, roll = timeit(lambda: compute_volumes_sql(conn, "MINT0", now_ts=NOW, return_usd=True), args.repeat)
+        for new in (raw, roll):
+            for label in WINDOWS:
+                for k in ("token", "usd"):
+                    a, b = old[label][k], new[label][k]
+                    assert abs(a - b) <= 1e-9 * max(1.0, abs(a)), (label, k, a, b)
+
+        print(f"per-window loop     {old_t * 1e3:8.2f} ms")
+        print(f"raw single pass     {raw_t * 1e3:8.2f} ms  ({old_t / raw_t:.1f}x)")
+        print(f"rollup buckets      {roll_t * 1e3:8.3f} ms  ({old_t / roll_t:.1f}x)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
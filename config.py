@@ -39,5 +39,16 @@ if env_pyth:
         PYTH_PRICE_ACCOUNTS = {}
 
 
+# In-memory indexer used by the API: "rolling" (exact per-mint windows) or
+# "bucketed" (1s/1m buckets, idle mints evicted, top-K mints; for tracking
+# many mints at once)
+INDEXER_MODE = os.getenv("INDEXER_MODE", "rolling")
+
+
+# How the API keeps Pyth prices fresh: "poll" (batched refresh every ttl)
+# or "stream" (accountSubscribe over websocket, polling while disconnected)
+PRICE_MODE = os.getenv("PRICE_MODE", "poll")
+
+
 # Logging level
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -2,42 +2,113 @@
 import argparse
 import time
 import logging
+from typing import Optional
 
 from logging_config import setup_logging
 setup_logging()
 
-from rpc import get_client, get_signatures, get_tx, get_mint_supply, get_price_for_mint
+from rpc import get_client, fetch_txs, FetchStats, get_mint_supply, get_price_for_mint
 from parse import extract_trade_from_tx, Trade
 from metrics import compute_volumes, compute_age_seconds
-from store import init_db, save_trade, compute_volumes_sql
+from store import init_db, save_trades, get_trades_for_mint, compute_volumes_sql, SignatureIndex, mark_seen, prune_rollups
+from backfill import backfill_mint
+from parallel_backfill import ShardedParser
 
 logger = logging.getLogger(__name__)
 
 
-def run_for_mint(mint: str, rpc_url: str, limit: int):
+def run_for_mint(
+    mint: str,
+    rpc_url: str,
+    limit: int,
+    workers: int = 4,
+    rps: Optional[float] = None,
+    batch_size: int = 1,
+    min_slot: Optional[int] = None,
+    processes: int = 0,
+):
     client = get_client(rpc_url)
 
     # Initialize local SQLite store
-    db = init_db("./trades.db")
-
-    signatures = get_signatures(client, mint, limit=limit)
-    trades: list[Trade] = []
-
-    for sig_info in signatures:
-        sig = sig_info["signature"]
-        tx = get_tx(client, sig)
-        if tx is None:        
-            continue
-        trade = extract_trade_from_tx(tx, mint, sig)
-        if trade:
-            # Persist trade (deduped by signature)
-            inserted = save_trade(db, trade)
-            if inserted:
-                trades.append(trade)
-
-
-    logger.info("Parsed trades: %d", len(trades))
-
+    db = init_db("./trades.db", wal=True, synchronous="NORMAL")
+
+    counts = {"inserted": 0, "duplicates": 0}
+    stats = FetchStats()
+    # Signatures already stored as trades or seen as non-trades are skipped
+    # before any getTransaction call.
+    seen = SignatureIndex(db, mint)
+    # With `processes`, workers fetch and parse shards of each chunk and this
+    # process only writes
+    sharded = None
+    if processes:
+        sharded = ShardedParser(rpc_url, processes, threads=workers, rate=rps, batch_size=batch_size)
+        stats = sharded.stats
+
+    def process(sig_infos):
+        failed = [s["signature"] for s in sig_infos if s.get("err") is not None]
+        if failed:
+            # Failed transactions can never be swaps; no need to fetch them
+            mark_seen(db, failed, mint, reason="failed")
+            seen.add(failed)
+        sigs = seen.filter_new(s["signature"] for s in sig_infos if s.get("err") is None)
+        skipped = len(sig_infos) - len(sigs)
+        if skipped:
+            logger.debug("Skipping %d already-known signatures", skipped)
+
+        # Fetch transactions concurrently; results still arrive in signature order
+        chunk_trades: list[Trade] = []
+        not_trades = []
+        handled = []
+        if sharded is not None:
+            chunk_trades, not_trades, handled = sharded.run(mint, sigs)
+        else:
+            for sig, tx in fetch_txs(client, sigs, workers=workers, rate=rps, batch_size=batch_size, stats=stats):
+                if tx is None:
+                    continue
+                handled.append(sig)
+                trade = extract_trade_from_tx(tx, mint, sig)
+                if trade:
+                    chunk_trades.append(trade)
+                else:
+                    not_trades.append(sig)
+        if chunk_trades:
+            # Persist the chunk in one transaction (deduped by signature)
+            inserted, duplicates = save_trades(db, chunk_trades)
+            counts["inserted"] += inserted
+            counts["duplicates"] += duplicates
+        if not_trades:
+            mark_seen(db, not_trades, mint)
+        seen.add(handled)
+        # Not fetched (missing or failed): backfill_mint keeps these pending
+        # and hands them back on the next run
+        done = set(handled)
+        return [s for s in sigs if s not in done]
+
+    # Walk signatures page by page: new ones above the stored high watermark
+    # first, then deeper history until `limit` signatures have been scanned
+    # for this mint (across runs) or `min_slot` is reached.
+    try:
+        # Larger chunks give each worker process a worthwhile shard
+        backfill_mint(client, db, mint, process, depth=limit, min_slot=min_slot, chunk_size=100 * max(1, processes))
+    finally:
+        if sharded is not None:
+            sharded.close()
+    # Backfilled history lands in the rollups too; drop buckets past retention
+    pruned = prune_rollups(db)
+    if pruned:
+        logger.info("Pruned %d rollup buckets past retention", pruned)
+
+    logger.info(
+        "Fetched %d transactions in %.1fs (%.1f tx/sec, %d retries, %d failed)",
+        stats.fetched,
+        stats.elapsed,
+        stats.tx_per_sec,
+        stats.retries,
+        stats.failed,
+    )
+    logger.info("Parsed trades: %d new, %d duplicates", counts["inserted"], counts["duplicates"])
+
+    trades = get_trades_for_mint(db, mint)
     if not trades:
         logger.info("No trades found for this mint in the fetched signatures.")
         return
@@ -108,10 +179,15 @@ def main():
     parser = argparse.ArgumentParser(description="Milestone 1: mint-level volume + age (MVP).")
     parser.add_argument("--mint", required=True, help="Token mint address (contract address)")
     parser.add_argument("--rpc", default="https://api.mainnet-beta.solana.com", help="Solana RPC URL")
-    parser.add_argument("--limit", type=int, default=100, help="Number of recent signatures to scan")
+    parser.add_argument("--limit", type=int, default=100, help="Backfill depth: total signatures to scan for this mint (reruns only fetch new ones)")
+    parser.add_argument("--min-slot", type=int, default=None, help="Do not backfill signatures older than this slot")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent getTransaction requests")
+    parser.add_argument("--rps", type=float, default=None, help="Global RPC rate limit (requests/sec) shared by all workers")
+    parser.add_argument("--batch-size", type=int, default=1, help="getTransaction calls per JSON-RPC batch POST (1 disables batching)")
+    parser.add_argument("--processes", type=int, default=0, help="Fetch and parse in this many worker processes (0 = in this process)")
 
     args = parser.parse_args()
-    res = run_for_mint(args.mint, args.rpc, args.limit)
+    res = run_for_mint(args.mint, args.rpc, args.limit, workers=args.workers, rps=args.rps, batch_size=args.batch_size, min_slot=args.min_slot, processes=args.processes)
     logger.info("Result: %s", res)
 
 if __name__ == "__main__":
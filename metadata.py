@@ -24,6 +24,17 @@ def _find_metadata_pda(mint: str) -> Optional[Pubkey]:
         return None
 
 
+def _decode_metadata(raw_b: bytes, pda: Optional[Pubkey], data_field: Optional[str]) -> Dict[str, Optional[str]]:
+    # Heuristic: find printable ASCII substrings between 2 and 64 chars
+    candidates = re.findall(b"[ -~]{2,64}", raw_b)
+    decoded = [c.decode("utf-8", errors="ignore").strip() for c in candidates]
+
+    name = decoded[0] if len(decoded) >= 1 else None
+    symbol = decoded[1] if len(decoded) >= 2 else None
+
+    return {"name": name, "symbol": symbol, "pda": str(pda), "raw": data_field}
+
+
 def get_token_metadata(client: Client, mint: str) -> Dict[str, Optional[str]]:
     """Fetch Metaplex metadata account and attempt to extract `name` and `symbol`.
 
@@ -58,15 +69,8 @@ def get_token_metadata(client: Client, mint: str) -> Dict[str, Optional[str]]:
             return {"name": None, "symbol": None, "pda": str(pda), "raw": None}
 
         raw_b = base64.b64decode(data_field)
-
-        # Heuristic: find printable ASCII substrings between 2 and 64 chars
-        candidates = re.findall(b"[ -~]{2,64}", raw_b)
-        decoded = [c.decode("utf-8", errors="ignore").strip() for c in candidates]
-
-        name = decoded[0] if len(decoded) >= 1 else None
-        symbol = decoded[1] if len(decoded) >= 2 else None
-
-        return {"name": name, "symbol": symbol, "pda": str(pda), "raw": data_field}
+        return _decode_metadata(raw_b, pda, data_field)
 
     except Exception:
         return {"name": None, "symbol": None, "pda": str(pda), "raw": None}
+
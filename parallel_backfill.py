@@ -0,0 +1,133 @@
+"""Fetch and parse backfill chunks in worker processes.
+
+Parsing jsonParsed transactions is pure Python, so a large backfill on one
+process is bound to one core. `ShardedParser` splits each chunk of
+signatures into contiguous shards, one per worker process. A worker fetches
+its shard (`fetch_txs`, threaded as usual), decodes and parses it, and sends
+back compact trade tuples. The caller stays the single writer and inserts
+the trades in order with `save_trades`.
+
+Workers fetch their own transactions because pickling a decoded
+transaction to another process costs more than parsing it.
+"""
+import logging
+import time
+from dataclasses import astuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from parse import Trade, extract_trade_from_tx
+from rpc import FetchStats, fetch_txs, get_client
+
+logger = logging.getLogger(__name__)
+
+# Trade fields in declaration order: (signature, ts, mint, token_delta,
+# quote_mint, quote_delta, price, token_delta_raw, token_decimals,
+# quote_delta_raw, quote_decimals)
+TradeRow = tuple
+
+# One client per worker process and RPC URL
+_clients: Dict[str, object] = {}
+
+
+def _client(rpc_url: str, client_factory: Optional[Callable]):
+    client = _clients.get(rpc_url)
+    if client is None:
+        client = (client_factory or get_client)(rpc_url)
+        _clients[rpc_url] = client
+    return client
+
+
+def _fetch_and_parse(
+    rpc_url: str,
+    mint: str,
+    signatures: List[str],
+    threads: int,
+    rate: Optional[float],
+    batch_size: int,
+    client_factory: Optional[Callable],
+) -> Tuple[List[TradeRow], List[str], List[str], Tuple[int, int, int, int]]:
+    """Worker: returns (trade rows, non-trade sigs, handled sigs, fetch counters)."""
+    client = _client(rpc_url, client_factory)
+    stats = FetchStats()
+    rows: List[TradeRow] = []
+    not_trades: List[str] = []
+    handled: List[str] = []
+    for sig, tx in fetch_txs(client, signatures, workers=threads, rate=rate, batch_size=batch_size, stats=stats):
+        if tx is None:
+            continue
+        handled.append(sig)
+        t = extract_trade_from_tx(tx, mint, sig)
+        if t is None:
+            not_trades.append(sig)
+        else:
+            rows.append(astuple(t))
+    return rows, not_trades, handled, (stats.fetched, stats.missing, stats.failed, stats.retries)
+
+
+class ShardedParser:
+    """Fetch + parse signature chunks across `processes` worker processes.
+
+    `rate` is the total request rate; each process gets an equal share.
+    `client_factory(rpc_url)` builds the RPC client inside a worker and must
+    be picklable (defaults to `rpc.get_client`).
+    """
+
+    def __init__(
+        self,
+        rpc_url: str,
+        processes: int = 4,
+        threads: int = 4,
+        rate: Optional[float] = None,
+        batch_size: int = 1,
+        client_factory: Optional[Callable] = None,
+    ):
+        self.rpc_url = rpc_url
+        self.processes = max(1, int(processes))
+        self.threads = threads
+        self.rate = rate / self.processes if rate else None
+        self.batch_size = batch_size
+        self.client_factory = client_factory
+        self.stats = FetchStats()
+        self._pool = ProcessPoolExecutor(max_workers=self.processes)
+
+    def run(self, mint: str, signatures: List[str]) -> Tuple[List[Trade], List[str], List[str]]:
+        """Return (trades, non-trade sigs, handled sigs), all in input order.
+
+        Signatures not in `handled` could not be fetched; the caller should
+        retry them (`backfill_mint` keeps them pending).
+        """
+        start = time.monotonic()
+        sigs = list(signatures)
+        size = -(-len(sigs) // self.processes) if sigs else 0
+        shards = [sigs[i:i + size] for i in range(0, len(sigs), size)] if size else []
+        futures = [
+            self._pool.submit(
+                _fetch_and_parse, self.rpc_url, mint, shard, self.threads, self.rate, self.batch_size, self.client_factory
+            )
+            for shard in shards
+        ]
+        trades: List[Trade] = []
+        not_trades: List[str] = []
+        handled: List[str] = []
+        # Shards are contiguous, so collecting them in submit order keeps input order
+        for fut in futures:
+            rows, nt, h, (fetched, missing, failed, retries) = fut.result()
+            trades.extend(Trade(*r) for r in rows)
+            not_trades.extend(nt)
+            handled.extend(h)
+            self.stats.fetched += fetched
+            self.stats.missing += missing
+            self.stats.failed += failed
+            self.stats.retries += retries
+        self.stats.elapsed += time.monotonic() - start
+        return trades, not_trades, handled
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,8 +1,11 @@
 # parse.py
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import hashlib
 import logging
 
+from config import STABLECOIN_MINTS
+
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +20,52 @@ class Trade:
     quote_mint: Optional[str] = None
     quote_delta: Optional[float] = None
     price: Optional[float] = None  # quote units per base token
+    # Exact integer deltas (raw token units) and decimals, when the balances
+    # carried them; token_delta / quote_delta are these scaled once.
+    token_delta_raw: Optional[int] = None
+    token_decimals: Optional[int] = None
+    quote_delta_raw: Optional[int] = None
+    quote_decimals: Optional[int] = None
 
 
 PUMPSWAP_PROGRAM_ID = "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA"
-# Known PumpSwap program IDs (expandable list). Milestone 2 will use these to
-# detect PumpSwap swaps versus generic token transfers.
-PUMPSWAP_PROGRAM_IDS = [PUMPSWAP_PROGRAM_ID]
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+# Mints that are only ever the quote side of a PumpSwap pool
+QUOTE_MINTS = frozenset({WSOL_MINT}) | frozenset(STABLECOIN_MINTS)
+# Known PumpSwap program IDs (expandable set), used to tell PumpSwap swaps
+# from generic token transfers.
+PUMPSWAP_PROGRAM_IDS = frozenset({PUMPSWAP_PROGRAM_ID})
+
+
+def _anchor_ix_discriminator(name: str) -> bytes:
+    return hashlib.sha256(f"global:{name}".encode()).digest()[:8]
+
+
+# Leading 8 bytes of PumpSwap `buy` / `sell` instruction data
+PUMPSWAP_SWAP_DISCRIMINATORS = frozenset({_anchor_ix_discriminator("buy"), _anchor_ix_discriminator("sell")})
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(_B58_ALPHABET)}
+
+
+def _b58decode(s: str) -> bytes:
+    n = 0
+    for c in s:
+        n = n * 58 + _B58_INDEX[c]
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    pad = len(s) - len(s.lstrip("1"))
+    return b"\x00" * pad + body
+
+
+def _b58encode(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = []
+    while n:
+        n, r = divmod(n, 58)
+        out.append(_B58_ALPHABET[r])
+    pad = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * pad + "".join(reversed(out))
+
 
 def _find_token_balances(meta: Dict[str, Any], mint: str, key: str) -> List[Dict[str, Any]]:
     """
@@ -50,37 +93,51 @@ def _find_token_balances(meta: Dict[str, Any], mint: str, key: str) -> List[Dict
     return out
 
 
-def _sum_balances_by_mint(rows: List[Dict[str, Any]]) -> Dict[str, float]:
-    out: Dict[str, float] = {}
+def _accumulate_amounts(
+    rows: List[Dict[str, Any]],
+    sign: int,
+    raw: Dict[str, int],
+    decimals: Dict[str, int],
+    ui: Dict[str, float],
+) -> None:
+    """Add `sign` x each row's amount: integer `amount` when present, else `uiAmount`."""
     for b in rows:
         m = b.get("mint")
         if not m:
             continue
-        ui_info = b.get("uiTokenAmount") or {}
+        info = b.get("uiTokenAmount") or {}
+        amount = info.get("amount")
+        dec = info.get("decimals")
+        if amount is not None and dec is not None:
+            try:
+                raw[m] = raw.get(m, 0) + sign * int(amount)
+                decimals[m] = int(dec)
+                continue
+            except (TypeError, ValueError):
+                pass
         amt = 0.0
-        if "uiAmount" in ui_info and ui_info["uiAmount"] is not None:
+        if info.get("uiAmount") is not None:
             try:
-                amt = float(ui_info["uiAmount"])
+                amt = float(info["uiAmount"])
             except (TypeError, ValueError):
                 amt = 0.0
-        out[m] = out.get(m, 0.0) + amt
-    return out
+        ui[m] = ui.get(m, 0.0) + sign * amt
 
 
-def extract_trade_from_tx(
-    tx: Dict[str, Any],
-    mint: str,
-    signature: str,
-) -> Optional[Trade]:
-    """
-    MVP: Treat any change in total ui amount for this mint in the tx as "volume".
-    Later we will filter to PumpSwap-only + compute quote side.
-    """
-    logger.debug("extract_trade_from_tx called")
+RawDelta = Tuple[int, int]  # (raw token units, decimals)
+
 
+def _balance_deltas(tx: Dict[str, Any]) -> Optional[Tuple[int, Dict[str, float], Dict[str, RawDelta]]]:
+    """Return (blockTime, {mint: post - pre ui amount}, {mint: (raw delta, decimals)}) for a PumpSwap swap tx.
+
+    Deltas are summed as integers from `uiTokenAmount.amount` and scaled by
+    `decimals` once per mint; rows without an integer amount fall back to
+    `uiAmount`, and their mints get no raw delta. None if the tx is not a
+    PumpSwap swap or has no block time / balances.
+    """
     if not tx:
         return None
-    
+
     # Milestone 2: Only return trades that appear to be PumpSwap swaps.
     # We detect PumpSwap usage via instruction program IDs and transaction logs.
     if not _tx_is_pumpswap_swap(tx):
@@ -91,57 +148,135 @@ def extract_trade_from_tx(
     if block_time is None or meta is None:
         return None
 
-    # Sum balances by mint for pre/post so we can detect quote-side changes
-    pre_rows = meta.get("preTokenBalances") or []
-    post_rows = meta.get("postTokenBalances") or []
-
-    pre_map = _sum_balances_by_mint(pre_rows)
-    post_map = _sum_balances_by_mint(post_rows)
+    raw: Dict[str, int] = {}
+    decimals: Dict[str, int] = {}
+    ui: Dict[str, float] = {}
+    _accumulate_amounts(meta.get("preTokenBalances") or [], -1, raw, decimals, ui)
+    _accumulate_amounts(meta.get("postTokenBalances") or [], 1, raw, decimals, ui)
 
     # If no relevant balances at all, skip
-    if not pre_map and not post_map:
+    if not raw and not ui:
         return None
 
-    logger.debug("parse/extract_trade_from_tx pre_map: %s", pre_map)
-    logger.debug("parse/extract_trade_from_tx post_map: %s", post_map)
-
-    # Compute deltas per mint
-    all_mints = set(pre_map.keys()) | set(post_map.keys())
     delta_map: Dict[str, float] = {}
-    for m in all_mints:
-        delta_map[m] = post_map.get(m, 0.0) - pre_map.get(m, 0.0)
-
-    base_delta = delta_map.get(mint, 0.0)
-    if base_delta == 0:
-        return None
-
-    # Heuristic: choose the largest non-base delta as quote side
-    quote_mint = None
-    quote_delta = None
-    other_mints = [m for m in delta_map.keys() if m != mint]
-    if other_mints:
-        quote_mint = max(other_mints, key=lambda m: abs(delta_map.get(m, 0.0)))
-        quote_delta = delta_map.get(quote_mint)
-
+    raw_map: Dict[str, RawDelta] = {}
+    for m, r in raw.items():
+        dec = decimals[m]
+        if m in ui:
+            # some rows of this mint had no integer amount
+            delta_map[m] = r / 10 ** dec + ui[m]
+        else:
+            delta_map[m] = r / 10 ** dec
+            raw_map[m] = (r, dec)
+    for m, d in ui.items():
+        if m not in delta_map:
+            delta_map[m] = d
+    logger.debug("parse/_balance_deltas delta_map: %s", delta_map)
+    return int(block_time), delta_map, raw_map
+
+
+def _make_trade(
+    signature: str,
+    ts: int,
+    mint: str,
+    base_delta: float,
+    quote_mint: Optional[str],
+    quote_delta: Optional[float],
+    base_raw: Optional[RawDelta] = None,
+    quote_raw: Optional[RawDelta] = None,
+) -> Trade:
     # Compute price as (abs quote delta) / (abs base delta) when possible
     price = None
     try:
-        if quote_delta is not None and abs(base_delta) > 0:
+        if base_raw is not None and quote_raw is not None and base_raw[0] and quote_delta is not None:
+            # exact ratio of the integer amounts, rounded once
+            price = abs(quote_raw[0]) * 10 ** base_raw[1] / (abs(base_raw[0]) * 10 ** quote_raw[1])
+        elif quote_delta is not None and abs(base_delta) > 0:
             price = abs(quote_delta) / abs(base_delta)
     except Exception:
         price = None
 
     return Trade(
         signature=signature,
-        ts=int(block_time),
+        ts=ts,
         mint=mint,
         token_delta=base_delta,
         quote_mint=quote_mint,
         quote_delta=quote_delta,
         price=price,
+        token_delta_raw=base_raw[0] if base_raw else None,
+        token_decimals=base_raw[1] if base_raw else None,
+        quote_delta_raw=quote_raw[0] if quote_raw else None,
+        quote_decimals=quote_raw[1] if quote_raw else None,
     )
 
 
+def extract_trade_from_tx(
+    tx: Dict[str, Any],
+    mint: str,
+    signature: str,
+) -> Optional[Trade]:
+    """
+    MVP: Treat any change in total ui amount for this mint in the tx as "volume".
+    Later we will filter to PumpSwap-only + compute quote side.
+    """
+    logger.debug("extract_trade_from_tx called")
+
+    parsed = _balance_deltas(tx)
+    if parsed is None:
+        return None
+    ts, delta_map, raw_map = parsed
+
+    base_delta = delta_map.get(mint, 0.0)
+    if base_delta == 0:
+        return None
+
+    # Heuristic: choose the largest non-base delta as quote side
+    quote_mint = None
+    quote_delta = None
+    other_mints = [m for m in delta_map.keys() if m != mint]
+    if other_mints:
+        quote_mint = max(other_mints, key=lambda m: abs(delta_map.get(m, 0.0)))
+        quote_delta = delta_map.get(quote_mint)
+
+    return _make_trade(signature, ts, mint, base_delta, quote_mint, quote_delta, raw_map.get(mint), raw_map.get(quote_mint))
+
+
+def extract_trades_from_tx(tx: Dict[str, Any], signature: str) -> List[Trade]:
+    """Return the Trade of the swapped (base) mint in `tx`, or [] if none changed.
+
+    Trades are keyed by signature, so one tx gives one trade: the base is the
+    mint with the largest balance change outside `QUOTE_MINTS` (any mint if
+    only quote mints changed), and the quote side is the largest other
+    delta. Same result as `extract_trade_from_tx` for that mint, but the
+    PumpSwap check and the balance deltas are computed once.
+    """
+    parsed = _balance_deltas(tx)
+    if parsed is None:
+        return []
+    ts, delta_map, raw_map = parsed
+
+    # First largest |delta| and first largest excluding it, in delta_map
+    # order, so ties resolve like max() over the other mints
+    top1 = top2 = None
+    for m, d in delta_map.items():
+        a = abs(d)
+        if top1 is None or a > abs(delta_map[top1]):
+            top1, top2 = m, top1
+        elif top2 is None or a > abs(delta_map[top2]):
+            top2 = m
+
+    changed = [m for m in sorted(delta_map) if delta_map[m] != 0]
+    if not changed:
+        return []
+    mint = max([m for m in changed if m not in QUOTE_MINTS] or changed, key=lambda m: abs(delta_map[m]))
+    quote_mint = top1 if top1 != mint else top2
+    quote_delta = delta_map[quote_mint] if quote_mint is not None else None
+    return [_make_trade(
+        signature, ts, mint, delta_map[mint], quote_mint, quote_delta, raw_map.get(mint), raw_map.get(quote_mint)
+    )]
+
+
 def _tx_uses_program(tx: Dict[str, Any], program_id: str) -> bool:
     """
     Returns True if the transaction uses the given program id in any
@@ -175,45 +310,115 @@ def _tx_uses_program(tx: Dict[str, Any], program_id: str) -> bool:
     return False
 
 
-def _tx_is_pumpswap_swap(tx: Dict[str, Any]) -> bool:
+_SWAP_DATA_BOUNDS: Dict[int, Tuple[Tuple[str, str], ...]] = {}
+
+
+def _swap_data_bounds(length: int) -> Tuple[Tuple[str, str], ...]:
+    """(lo, hi) base58 strings of `length` chars whose data starts with a swap discriminator.
+
+    Among base58 strings of one length without leading '1's, string order
+    is numeric order, so a prefix check on the decoded bytes becomes string
+    compares against these bounds. Memoized per length.
     """
-    Heuristic to determine whether a transaction represents a PumpSwap swap.
-    Checks top-level and inner instruction program IDs and log messages.
+    bounds = _SWAP_DATA_BOUNDS.get(length)
+    if bounds is None:
+        out = []
+        # byte lengths whose base58 form can be `length` chars (log 58 / log 256 ~ 0.7322)
+        for n in range(max(8, int((length - 1) * 0.7322)), int(length * 0.7322) + 2):
+            for disc in sorted(PUMPSWAP_SWAP_DISCRIMINATORS):
+                lo = _b58encode(disc + b"\x00" * (n - 8))
+                hi = _b58encode(disc + b"\xff" * (n - 8))
+                if len(lo) > length or len(hi) < length:
+                    continue
+                out.append((lo if len(lo) == length else "2" + "1" * (length - 1), hi if len(hi) == length else "z" * length))
+        bounds = _SWAP_DATA_BOUNDS[length] = tuple(out)
+    return bounds
+
+
+def _is_pumpswap_swap_ix(ix: Dict[str, Any], keys: List[Any], program_ids) -> bool:
+    """True if `ix` calls PumpSwap `buy`/`sell`.
+
+    The program is `programId` (jsonParsed) or `keys[programIdIndex]` (json
+    encoding). Instructions without base58 `data` are judged by program only.
     """
-    # Top-level instructions
-    try:
-        msg = tx["transaction"]["message"]
-    except Exception:
-        msg = None
+    pid = ix.get("programId")
+    if pid is None:
+        idx = ix.get("programIdIndex")
+        if idx is None or idx >= len(keys):
+            return False
+        pid = keys[idx]
+        if isinstance(pid, dict):
+            pid = pid.get("pubkey")
+    elif isinstance(pid, dict):
+        pid = pid.get("key")
+    if pid not in program_ids:
+        return False
+    data = ix.get("data")
+    if not isinstance(data, str):
+        return True
+    for lo, hi in _swap_data_bounds(len(data)):
+        if lo <= data <= hi:
+            return True
+    return False
 
+
+def _tx_is_pumpswap_swap(tx: Dict[str, Any], program_ids=PUMPSWAP_PROGRAM_IDS) -> bool:
+    """
+    Whether a transaction calls PumpSwap `buy`/`sell`, at top level or via CPI.
+
+    Instructions are matched by program id (a set lookup) and the leading
+    instruction discriminator. Logs are only consulted when the tx carries
+    no inner instructions to check, and then with the same invoke-stack
+    tracking as `logs_show_pumpswap_swap`.
+    """
+    msg = tx.get("transaction")
+    msg = msg.get("message") if isinstance(msg, dict) else None
+    keys = (msg.get("accountKeys") or []) if msg else []
     if msg:
-        for ix in msg.get("instructions", []):
-            pid = ix.get("programId") or ix.get("program")
-            if isinstance(pid, dict):
-                pid = pid.get("key")
-            if pid in PUMPSWAP_PROGRAM_IDS:
+        for ix in msg.get("instructions") or ():
+            if _is_pumpswap_swap_ix(ix, keys, program_ids):
                 return True
 
-    # Inner instructions
     meta = tx.get("meta") or {}
-    inner_list = meta.get("innerInstructions") or []
+    inner_list = meta.get("innerInstructions")
+    if inner_list is None:
+        # CPIs were not recorded; the logs show them
+        logs = meta.get("logMessages")
+        return bool(logs) and logs_show_pumpswap_swap(logs, program_ids)
     for inner in inner_list:
-        for ix in inner.get("instructions", []):
-            pid = ix.get("programId") or ix.get("program")
-            if isinstance(pid, dict):
-                pid = pid.get("key")
-            if pid in PUMPSWAP_PROGRAM_IDS:
+        for ix in inner.get("instructions") or ():
+            if _is_pumpswap_swap_ix(ix, keys, program_ids):
                 return True
+    return False
+
 
-    # Logs may contain hints (program invoke or 'swap' keywords)
-    logs = meta.get("logMessages") or []
+PUMPSWAP_SWAP_INSTRUCTIONS = ("Buy", "Sell")
+
+
+def logs_show_pumpswap_swap(logs: Optional[List[str]], program_ids=PUMPSWAP_PROGRAM_IDS) -> bool:
+    """Tell from log messages alone whether a tx may contain a PumpSwap swap.
+
+    Tracks the `Program <id> invoke [n]` / `success` / `failed` stack so a
+    `Program log: Instruction: Buy|Sell` line only counts when PumpSwap is
+    the program currently executing. Missing or truncated logs return True,
+    so callers fall back to fetching the transaction.
+    """
+    if not logs:
+        return True
+    stack: List[str] = []
     for line in logs:
-        if not line:
+        if line.startswith("Program log: "):
+            if stack and stack[-1] in program_ids:
+                msg = line[len("Program log: "):]
+                if msg.startswith("Instruction: ") and msg[len("Instruction: "):] in PUMPSWAP_SWAP_INSTRUCTIONS:
+                    return True
             continue
-        s = str(line).lower()
-        if any(pid.lower() in s for pid in PUMPSWAP_PROGRAM_IDS):
-            return True
-        if "swap" in s:
+        if line.startswith("Log truncated"):
             return True
-
+        parts = line.split(" ")
+        if len(parts) >= 3 and parts[0] == "Program":
+            if parts[2] == "invoke":
+                stack.append(parts[1])
+            elif parts[2] in ("success", "failed:") and stack:
+                stack.pop()
     return False
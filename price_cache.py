@@ -1,82 +1,101 @@
-from typing import Optional, Dict, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterable, Tuple
+import asyncio
+import threading
 import time
 import logging
 
 from config import PYTH_PRICE_ACCOUNTS
-from rpc import get_price_for_mint
-import pyth_parser
-from base64 import b64decode
-from solders.pubkey import Pubkey
+from rpc import get_price_for_mint, get_prices_for_mints
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PriceCacheStats:
+    """`get` outcomes and RPC fetch latency (seconds)."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+    fetch_errors: int = 0
+    fetch_seconds: float = 0.0
+    max_fetch_seconds: float = 0.0
+
+    @property
+    def mean_fetch_seconds(self) -> float:
+        return self.fetch_seconds / self.fetches if self.fetches else 0.0
+
+
 class PriceCache:
-    """Simple on-demand Pyth price cache.
+    """On-demand Pyth price cache.
 
     Usage:
       cache = PriceCache(client, ttl=30)
       price = cache.get(mint)
 
-    The cache will attempt to fetch prices from Pyth via `get_price_for_mint()`
-    when a value is missing or older than `ttl` seconds.
+    A price younger than `ttl` seconds is returned as is. An older one, up
+    to `ttl + stale_ttl`, is still returned while a background fetch
+    refreshes it (stale-while-revalidate). Only a mint with no usable price
+    makes `get` wait for `get_price_for_mint()`. Concurrent fetches of a mint
+    are coalesced into one, and a mint without a price (e.g. one with no
+    Pyth mapping) is not fetched again for `negative_ttl` seconds.
     """
 
-    def __init__(self, client, ttl: int = 30):
+    def __init__(self, client, ttl: int = 30, stale_ttl: float = 300, negative_ttl: float = 60):
         self.client = client
         self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.stats = PriceCacheStats()
         self._cache: Dict[str, Tuple[float, float]] = {}  # mint -> (price, ts)
+        self._negative: Dict[str, float] = {}  # mint -> ts of the fetch that found no price
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
         self._task = None
         self._stopping = False
 
+    def refresh(self, mints: Optional[Iterable[str]] = None, accounts: Optional[Dict[str, str]] = None) -> int:
+        """Fetch prices for `mints` (default: every mapped mint) at once.
+
+        `accounts` maps mint -> Pyth price account and defaults to
+        `config.PYTH_PRICE_ACCOUNTS`. All accounts are read with
+        `getMultipleAccounts`, 100 per request, and decoded in one pass; the
+        new prices replace the cached ones in a single update. Returns the
+        number of prices updated.
+        """
+        if accounts is None:
+            accounts = PYTH_PRICE_ACCOUNTS
+        keys = list(mints) if mints is not None else list(accounts)
+        prices = get_prices_for_mints(self.client, keys, accounts)
+        now = time.time()
+        fresh = {mint: (float(price), now) for mint, price in prices.items() if price is not None}
+        with self._lock:
+            self._cache.update(fresh)
+            for mint in fresh:
+                self._negative.pop(mint, None)
+        return len(fresh)
+
     async def _refresh_loop(self, interval: Optional[int] = None, mints: Optional[list] = None):
-        """Background task that refreshes configured mints periodically."""
+        """Background task that refreshes configured mints periodically.
+
+        The blocking RPC calls of `refresh` run in a worker thread, so the
+        event loop is never held up by a refresh.
+        """
         if interval is None:
             interval = int(self.ttl)
         while not self._stopping:
             try:
-                keys = mints if mints is not None else list(PYTH_PRICE_ACCOUNTS.keys())
-                for mint in keys:
-                    try:
-                        p = get_price_for_mint(self.client, mint)
-                        if p is not None:
-                            self.set(mint, float(p))
-                            continue
-
-                        # If RPC wrapper didn't return a price, attempt direct
-                        # account read + pure-Python parse as a fallback.
-                        acct = PYTH_PRICE_ACCOUNTS.get(mint)
-                        if acct:
-                            try:
-                                resp = self.client.get_account_info(Pubkey.from_string(acct))
-                                val = resp.value
-                                data_field = None
-                                if hasattr(val, "data"):
-                                    try:
-                                        if isinstance(val.data, (list, tuple)) and len(val.data) >= 1:
-                                            data_field = val.data[0]
-                                        else:
-                                            data_field = val.data
-                                    except Exception:
-                                        data_field = None
-
-                                if data_field:
-                                    raw_b = b64decode(data_field)
-                                    parsed = pyth_parser.parse_price_account(raw_b)
-                                    if parsed and parsed.get("price") is not None and parsed.get("expo") is not None:
-                                        try:
-                                            price_val = float(parsed["price"]) * (10 ** int(parsed["expo"]))
-                                            if price_val > 0 and price_val < 1e12:
-                                                self.set(mint, price_val)
-                                        except Exception:
-                                            pass
-                            except Exception:
-                                logger.debug("Direct pyth_parser parse failed for %s", mint)
-                    except Exception:
-                        logger.debug("Failed to refresh price for %s", mint)
+                n = await asyncio.to_thread(self.refresh, mints)
+                logger.debug("PriceCache refreshed %d prices", n)
             except Exception:
                 logger.exception("Error during price cache refresh loop")
-            await __import__("asyncio").sleep(interval)
+            await asyncio.sleep(interval)
 
     async def start_background(self, interval: Optional[int] = None, mints: Optional[list] = None):
         """Start background refresh task. Safe to call multiple times.
@@ -86,11 +105,15 @@ class PriceCache:
         if self._task is not None and not self._task.done():
             return
         self._stopping = False
-        loop = __import__("asyncio").get_event_loop()
+        loop = asyncio.get_event_loop()
         self._task = loop.create_task(self._refresh_loop(interval=interval, mints=mints))
 
     async def stop_background(self):
-        """Stop background task and wait for it to finish."""
+        """Stop background task and wait for it to finish.
+
+        Also shuts down the stale-while-revalidate fetch threads once their
+        fetches are done; a later stale `get` starts new ones.
+        """
         self._stopping = True
         if self._task is not None:
             try:
@@ -98,26 +121,96 @@ class PriceCache:
             except Exception:
                 pass
             self._task = None
-
-    def get(self, mint: str) -> Optional[float]:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown)
+
+    def get(self, mint: str, timeout: Optional[float] = None) -> Optional[float]:
+        """Cached price of `mint`, or None if it has none.
+
+        A mint with no usable price (cold or past `stale_ttl`) blocks the
+        caller for the whole RPC round trip. With `timeout`, `get` gives up
+        after that many seconds and returns None; the fetch carries on in
+        the background and fills the cache for the next call.
+        """
         now = time.time()
-        rec = self._cache.get(mint)
-        if rec:
-            price, ts = rec
-            if now - ts <= self.ttl:
-                return price
-
-        # Attempt to fetch from Pyth mapping or other RPC helper
+        with self._lock:
+            rec = self._cache.get(mint)
+            neg_ts = self._negative.get(mint)
+            st = self.stats
+            if rec is not None and now - rec[1] <= self.ttl:
+                st.hits += 1
+                return rec[0]
+            stale = rec is not None and now - rec[1] <= self.ttl + self.stale_ttl
+            if stale:
+                st.stale_hits += 1
+            elif neg_ts is not None and now - neg_ts <= self.negative_ttl:
+                st.negative_hits += 1
+                return None
+            else:
+                st.misses += 1
+        if stale:
+            self._fetch(mint, background=True)
+            return rec[0]
+        try:
+            return self._fetch(mint, background=timeout is not None).result(timeout)
+        except FutureTimeout:
+            return None
+
+    def _fetch(self, mint: str, background: bool = False) -> Future:
+        """Start (or join) the one in-flight fetch of `mint`."""
+        with self._lock:
+            fut = self._inflight.get(mint)
+            if fut is not None:
+                self.stats.coalesced += 1
+                return fut
+            fut = self._inflight[mint] = Future()
+            if background and self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="price-cache")
+            pool = self._pool
+        if background:
+            try:
+                pool.submit(self._run_fetch, mint, fut)
+                return fut
+            except RuntimeError:
+                pass  # shut down by stop_background meanwhile: fetch inline
+        self._run_fetch(mint, fut)
+        return fut
+
+    def _run_fetch(self, mint: str, fut: Future) -> None:
+        start = time.monotonic()
+        price = None
+        failed = False
         try:
             p = get_price_for_mint(self.client, mint)
-            if p is not None:
-                price = float(p)
-                self._cache[mint] = (price, now)
-                return price
+            price = float(p) if p is not None else None
         except Exception as e:
-            logger.debug("PriceCache get failed for %s: %s", mint, e)
-
-        return None
+            failed = True
+            logger.debug("PriceCache fetch failed for %s: %s", mint, e)
+        elapsed = time.monotonic() - start
+        now = time.time()
+        with self._lock:
+            if price is not None:
+                self._cache[mint] = (price, now)
+                self._negative.pop(mint, None)
+            elif not failed:
+                # no price (e.g. no Pyth mapping, or the feed stopped trading):
+                # drop the expired price and answer None until `negative_ttl`.
+                # RPC errors are retried on the next get instead.
+                rec = self._cache.get(mint)
+                if rec is None or now - rec[1] > self.ttl:
+                    self._cache.pop(mint, None)
+                    self._negative[mint] = now
+            st = self.stats
+            st.fetches += 1
+            st.fetch_errors += failed
+            st.fetch_seconds += elapsed
+            st.max_fetch_seconds = max(st.max_fetch_seconds, elapsed)
+            del self._inflight[mint]
+        fut.set_result(price)
 
     def set(self, mint: str, price: float) -> None:
-        self._cache[mint] = (float(price), time.time())
+        with self._lock:
+            self._cache[mint] = (float(price), time.time())
+            self._negative.pop(mint, None)
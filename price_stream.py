@@ -0,0 +1,206 @@
+"""Push-mode Pyth prices over websocket `accountSubscribe`.
+
+`PriceStream` keeps one `accountSubscribe` per Pyth price account in
+`config.PYTH_PRICE_ACCOUNTS`, all multiplexed on a single websocket
+connection. Each `accountNotification` is decoded (`rpc.decode_pyth_price`,
+i.e. `pyth_parser` unless `pythclient` is installed) and written into the
+`PriceCache` of every mint mapped to that account, so prices are as fresh as
+the account updates instead of up to one `ttl` old.
+
+While the connection is down the stream falls back to polling: it calls
+`PriceCache.refresh` (batched `getMultipleAccounts`) every `poll_interval`
+seconds until it has reconnected and every subscription is acknowledged.
+An account whose `accountSubscribe` is answered with an error keeps being
+polled for as long as the connection lasts.
+"""
+import asyncio
+import json
+import logging
+from base64 import b64decode
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+from config import PYTH_PRICE_ACCOUNTS
+from rpc import decode_pyth_price
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WS = "wss://api.mainnet-beta.solana.com/"
+
+
+@dataclass
+class PriceStreamStats:
+    """Stream counters; `polls` are fallback refreshes while disconnected."""
+
+    connects: int = 0
+    disconnects: int = 0
+    subscriptions: int = 0
+    subscription_errors: int = 0
+    updates: int = 0
+    undecodable: int = 0
+    polls: int = 0
+
+
+class PriceStream:
+    """Keep `cache` up to date from Pyth account notifications.
+
+    `accounts` maps mint -> price account and defaults to
+    `config.PYTH_PRICE_ACCOUNTS` as of `run()`. `poll_interval` defaults to
+    the cache's `ttl`.
+    """
+
+    def __init__(
+        self,
+        cache,
+        ws_url: str = DEFAULT_WS,
+        accounts: Optional[Dict[str, str]] = None,
+        poll_interval: Optional[float] = None,
+        reconnect_delay: float = 1.0,
+        commitment: str = "confirmed",
+    ):
+        self.cache = cache
+        self.ws_url = ws_url
+        self.accounts = accounts
+        self.poll_interval = poll_interval if poll_interval is not None else cache.ttl
+        self.reconnect_delay = reconnect_delay
+        self.commitment = commitment
+        self.stats = PriceStreamStats()
+        self._accounts: Dict[str, str] = {}
+        self._mints_by_account: Dict[str, List[str]] = {}
+        self._pending: Dict[int, str] = {}  # request id -> account
+        self._subs: Dict[int, str] = {}  # subscription id -> account
+        self._poller: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._running = False
+
+    async def _subscribe(self, websocket) -> None:
+        self._pending.clear()
+        self._subs.clear()
+        for req_id, acct in enumerate(self._mints_by_account, 1):
+            self._pending[req_id] = acct
+            await websocket.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": req_id,
+                "method": "accountSubscribe",
+                "params": [acct, {"encoding": "base64", "commitment": self.commitment}],
+            }))
+
+    def _handle_message(self, msg: str) -> None:
+        try:
+            payload = json.loads(msg)
+        except Exception:
+            return
+        if payload.get("id") in self._pending:
+            acct = self._pending.pop(payload["id"])
+            if payload.get("error") is not None or "result" not in payload:
+                self.stats.subscription_errors += 1
+                logger.warning("accountSubscribe for %s failed: %r; polling it instead", acct, payload.get("error"))
+                self._start_polling()
+                return
+            self._subs[payload["result"]] = acct
+            self.stats.subscriptions += 1
+            return
+        if payload.get("method") != "accountNotification":
+            return
+        # {"params": {"subscription": id, "result": {"context": ..., "value": {"data": [b64, "base64"], ...}}}}
+        params = payload.get("params") or {}
+        acct = self._subs.get(params.get("subscription"))
+        if acct is None:
+            return
+        price = self._decode((params.get("result") or {}).get("value"))
+        if price is None:
+            self.stats.undecodable += 1
+            return
+        for mint in self._mints_by_account[acct]:
+            self.cache.set(mint, price)
+        self.stats.updates += 1
+
+    @staticmethod
+    def _decode(value: Any) -> Optional[float]:
+        data = (value or {}).get("data")
+        if isinstance(data, (list, tuple)):
+            data = data[0] if data else None
+        if not data:
+            return None
+        try:
+            return decode_pyth_price(b64decode(data))
+        except Exception:
+            return None
+
+    def _unsubscribed_mints(self) -> List[str]:
+        subscribed = set(self._subs.values())
+        return [m for acct, mints in self._mints_by_account.items() if acct not in subscribed for m in mints]
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.cache.refresh, self._unsubscribed_mints(), self._accounts)
+                self.stats.polls += 1
+            except Exception:
+                logger.warning("Price polling fallback failed", exc_info=True)
+            await asyncio.sleep(self.poll_interval)
+
+    def _start_polling(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+
+    async def _stop_polling(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+    async def _read_loop(self) -> None:
+        backoff = self.reconnect_delay
+        while self._running:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    await self._subscribe(ws)
+                    self.stats.connects += 1
+                    backoff = self.reconnect_delay
+                    async for message in ws:
+                        self._handle_message(message)
+                        if self._poller is not None and len(self._subs) == len(self._mints_by_account):
+                            # every account is streaming again
+                            await self._stop_polling()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Price stream websocket error", exc_info=True)
+            # closed or failed: poll until the next connection is up
+            self._pending.clear()
+            self._subs.clear()
+            self.stats.disconnects += 1
+            self._start_polling()
+            logger.info("Price stream disconnected; polling, reconnecting in %ss", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    async def run(self) -> None:
+        """Run until `stop()`."""
+        self._accounts = self.accounts if self.accounts is not None else dict(PYTH_PRICE_ACCOUNTS)
+        self._mints_by_account = {}
+        for mint, acct in self._accounts.items():
+            self._mints_by_account.setdefault(acct, []).append(mint)
+        self._running = True
+        self._stop = asyncio.Event()
+        reader = asyncio.create_task(self._read_loop())
+        try:
+            await self._stop.wait()
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+            await self._stop_polling()
+            self._running = False
+
+    def stop(self) -> None:
+        self._running = False
+        if self._stop is not None:
+            self._stop.set()
+
+    @property
+    def polling(self) -> bool:
+        """True while the polling fallback is active."""
+        return self._poller is not None and not self._poller.done()
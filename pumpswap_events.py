@@ -0,0 +1,292 @@
+"""Decode PumpSwap `BuyEvent` / `SellEvent` Anchor events.
+
+PumpSwap emits one event per swap, either as a base64 `Program data:` log
+line or as a self-CPI "event instruction" (Anchor `emit_cpi!`) whose data is
+the 8-byte event-instruction tag followed by the event. Both carry the
+event's 8-byte discriminator (sha256("event:<Name>")[:8]) and a Borsh
+payload. Only the fixed prefix that both old and new program versions share
+is decoded; trailing fields (creator fees etc.) are ignored.
+
+Events hold raw u64 amounts and the pool address but no mints, so turning
+one into a `Trade` needs the pool's base/quote mints and decimals, kept in a
+`PoolRegistry` (filled from pool accounts or learned from a fetched tx).
+"""
+import base64
+import hashlib
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from solders.pubkey import Pubkey
+
+from parse import PUMPSWAP_PROGRAM_IDS, Trade, _b58decode, _make_trade
+
+logger = logging.getLogger(__name__)
+
+
+def _discriminator(name: str) -> bytes:
+    return hashlib.sha256(f"event:{name}".encode()).digest()[:8]
+
+
+BUY_EVENT_DISCRIMINATOR = _discriminator("BuyEvent")
+SELL_EVENT_DISCRIMINATOR = _discriminator("SellEvent")
+# Prefix of a self-CPI instruction carrying an event (Anchor emit_cpi!)
+EVENT_IX_TAG = hashlib.sha256(b"anchor:event").digest()[:8]
+
+# timestamp i64, 13 x u64, 6 x pubkey. The u64s are, for BuyEvent:
+#   base_amount_out, max_quote_amount_in, user_base_token_reserves,
+#   user_quote_token_reserves, pool_base_token_reserves,
+#   pool_quote_token_reserves, quote_amount_in, lp_fee_basis_points, lp_fee,
+#   protocol_fee_basis_points, protocol_fee, quote_amount_in_with_lp_fee,
+#   user_quote_amount_in
+# and for SellEvent the same with base_amount_in, min_quote_amount_out,
+# quote_amount_out, ..., quote_amount_out_without_lp_fee,
+# user_quote_amount_out. Pubkeys: pool, user, user_base_token_account,
+# user_quote_token_account, protocol_fee_recipient,
+# protocol_fee_recipient_token_account.
+_SWAP_EVENT = struct.Struct("<q13Q32s32s32s32s32s32s")
+
+
+@dataclass
+class SwapEvent:
+    side: str                    # "buy" or "sell" (from the user's side)
+    timestamp: int
+    base_amount: int             # base tokens bought/sold (raw units)
+    quote_amount: int            # quote paid (buy) / received (sell) by the user, fees included
+    pool_base_reserves: int      # pool reserves before the swap
+    pool_quote_reserves: int
+    lp_fee: int
+    protocol_fee: int
+    pool: str
+    user: str
+    user_base_token_account: str
+    user_quote_token_account: str
+
+
+def decode_swap_event(data: bytes) -> Optional[SwapEvent]:
+    """Decode one event payload (discriminator included). None if not a swap."""
+    disc = data[:8]
+    if disc == BUY_EVENT_DISCRIMINATOR:
+        side = "buy"
+    elif disc == SELL_EVENT_DISCRIMINATOR:
+        side = "sell"
+    else:
+        return None
+    if len(data) < 8 + _SWAP_EVENT.size:
+        logger.debug("Short PumpSwap %s event (%d bytes)", side, len(data))
+        return None
+    f = _SWAP_EVENT.unpack_from(data, 8)
+    return SwapEvent(
+        side=side,
+        timestamp=f[0],
+        base_amount=f[1],
+        quote_amount=f[13],
+        pool_base_reserves=f[5],
+        pool_quote_reserves=f[6],
+        lp_fee=f[9],
+        protocol_fee=f[11],
+        pool=str(Pubkey(f[14])),
+        user=str(Pubkey(f[15])),
+        user_base_token_account=str(Pubkey(f[16])),
+        user_quote_token_account=str(Pubkey(f[17])),
+    )
+
+
+def events_from_logs(logs: Optional[Iterable[str]], program_ids=PUMPSWAP_PROGRAM_IDS) -> List[SwapEvent]:
+    """Swap events from `Program data:` lines emitted while PumpSwap runs."""
+    out: List[SwapEvent] = []
+    stack: List[str] = []
+    for line in logs or ():
+        if line.startswith("Program data: "):
+            if stack and stack[-1] in program_ids:
+                try:
+                    data = base64.b64decode(line[len("Program data: "):])
+                except Exception:
+                    continue
+                ev = decode_swap_event(data)
+                if ev is not None:
+                    out.append(ev)
+            continue
+        parts = line.split(" ")
+        if len(parts) >= 3 and parts[0] == "Program":
+            if parts[2] == "invoke":
+                stack.append(parts[1])
+            elif parts[2] in ("success", "failed:") and stack:
+                stack.pop()
+    return out
+
+
+def events_from_tx(tx: Dict[str, Any], program_ids=PUMPSWAP_PROGRAM_IDS) -> List[SwapEvent]:
+    """Swap events of a jsonParsed transaction: CPI event instructions, else logs."""
+    meta = tx.get("meta") or {}
+    out: List[SwapEvent] = []
+    for inner in meta.get("innerInstructions") or []:
+        for ix in inner.get("instructions", []):
+            pid = ix.get("programId")
+            data = ix.get("data")
+            if pid not in program_ids or not isinstance(data, str):
+                continue
+            try:
+                raw = _b58decode(data)
+            except KeyError:
+                continue
+            if raw[:8] == EVENT_IX_TAG:
+                ev = decode_swap_event(raw[8:])
+                if ev is not None:
+                    out.append(ev)
+    return out or events_from_logs(meta.get("logMessages"), program_ids)
+
+
+@dataclass
+class PoolInfo:
+    base_mint: str
+    quote_mint: str
+    base_decimals: int
+    quote_decimals: int
+
+
+# Pool account: discriminator, pool_bump u8, index u16, creator, base_mint, quote_mint, ...
+_POOL_BASE_MINT_OFFSET = 8 + 1 + 2 + 32
+_POOL_QUOTE_MINT_OFFSET = _POOL_BASE_MINT_OFFSET + 32
+# SPL Mint: mint_authority COption<Pubkey> (36), supply u64, decimals u8
+_MINT_DECIMALS_OFFSET = 44
+
+
+class PoolRegistry:
+    """pool address -> PoolInfo, needed to turn events into Trades."""
+
+    def __init__(self):
+        self.pools: Dict[str, PoolInfo] = {}
+
+    def __contains__(self, pool: str) -> bool:
+        return pool in self.pools
+
+    def get(self, pool: str) -> Optional[PoolInfo]:
+        return self.pools.get(pool)
+
+    def register(self, pool: str, info: PoolInfo) -> None:
+        self.pools[pool] = info
+
+    def learn_from_tx(self, tx: Dict[str, Any]) -> int:
+        """Learn pools of the swap events in `tx` from the user's token accounts.
+
+        Returns the number of pools added.
+        """
+        meta = tx.get("meta") or {}
+        try:
+            keys = tx["transaction"]["message"]["accountKeys"]
+        except (KeyError, TypeError):
+            return 0
+        keys = [k.get("pubkey") if isinstance(k, dict) else k for k in keys]
+        accounts: Dict[str, Dict[str, Any]] = {}
+        for row in (meta.get("preTokenBalances") or []) + (meta.get("postTokenBalances") or []):
+            i = row.get("accountIndex")
+            if i is not None and i < len(keys):
+                accounts[keys[i]] = row
+        added = 0
+        for ev in events_from_tx(tx):
+            if ev.pool in self.pools:
+                continue
+            base = accounts.get(ev.user_base_token_account)
+            quote = accounts.get(ev.user_quote_token_account)
+            if not base or not quote:
+                continue
+            self.pools[ev.pool] = PoolInfo(
+                base_mint=base["mint"],
+                quote_mint=quote["mint"],
+                base_decimals=int(base["uiTokenAmount"]["decimals"]),
+                quote_decimals=int(quote["uiTokenAmount"]["decimals"]),
+            )
+            added += 1
+        return added
+
+    def fetch(self, client, pools: Iterable[str]) -> int:
+        """Load unknown pools (and their mints' decimals) via getMultipleAccounts."""
+        from rpc import get_multiple_accounts
+
+        missing = [p for p in dict.fromkeys(pools) if p not in self.pools]
+        if not missing:
+            return 0
+        mints_by_pool = {}
+        for pool, raw in get_multiple_accounts(client, missing).items():
+            if raw is None or len(raw) < _POOL_QUOTE_MINT_OFFSET + 32:
+                continue
+            base = str(Pubkey(raw[_POOL_BASE_MINT_OFFSET:_POOL_BASE_MINT_OFFSET + 32]))
+            quote = str(Pubkey(raw[_POOL_QUOTE_MINT_OFFSET:_POOL_QUOTE_MINT_OFFSET + 32]))
+            mints_by_pool[pool] = (base, quote)
+        mint_accounts = get_multiple_accounts(client, sorted({m for pair in mints_by_pool.values() for m in pair}))
+        decimals = {
+            m: raw[_MINT_DECIMALS_OFFSET]
+            for m, raw in mint_accounts.items()
+            if raw is not None and len(raw) > _MINT_DECIMALS_OFFSET
+        }
+        added = 0
+        for pool, (base, quote) in mints_by_pool.items():
+            if base in decimals and quote in decimals:
+                self.pools[pool] = PoolInfo(base, quote, decimals[base], decimals[quote])
+                added += 1
+        return added
+
+
+def trade_from_event(event: SwapEvent, pool: PoolInfo, signature: str) -> Trade:
+    """Build a Trade from the user's side of a swap (buy: +base, -quote)."""
+    sign = 1 if event.side == "buy" else -1
+    return _make_trade(
+        signature,
+        int(event.timestamp),
+        pool.base_mint,
+        sign * event.base_amount / 10 ** pool.base_decimals,
+        pool.quote_mint,
+        -sign * event.quote_amount / 10 ** pool.quote_decimals,
+        (sign * event.base_amount, pool.base_decimals),
+        (-sign * event.quote_amount, pool.quote_decimals),
+    )
+
+
+def trade_from_events(events: Sequence[Tuple[SwapEvent, PoolInfo]], signature: str) -> Optional[Trade]:
+    """Net the swaps of one transaction into a single Trade.
+
+    Trades are keyed by signature, so several events of one tx (split or
+    repeated swaps) become one trade with the summed raw amounts. None when
+    the events span more than one base/quote pair or net to no base change;
+    the transaction's balance changes decide those.
+    """
+    pairs = {(p.base_mint, p.quote_mint, p.base_decimals, p.quote_decimals) for _, p in events}
+    if len(pairs) != 1:
+        return None
+    if len(events) == 1:
+        return trade_from_event(events[0][0], events[0][1], signature)
+    base_mint, quote_mint, base_decimals, quote_decimals = pairs.pop()
+    base = quote = 0
+    for ev, _ in events:
+        sign = 1 if ev.side == "buy" else -1
+        base += sign * ev.base_amount
+        quote -= sign * ev.quote_amount
+    if base == 0:
+        return None
+    return _make_trade(
+        signature,
+        max(int(ev.timestamp) for ev, _ in events),
+        base_mint,
+        base / 10 ** base_decimals,
+        quote_mint,
+        quote / 10 ** quote_decimals,
+        (base, base_decimals),
+        (quote, quote_decimals),
+    )
+
+
+def encode_swap_event(event: SwapEvent) -> bytes:
+    """Inverse of `decode_swap_event` for tests; fields not kept are zero."""
+    disc = BUY_EVENT_DISCRIMINATOR if event.side == "buy" else SELL_EVENT_DISCRIMINATOR
+    return disc + _SWAP_EVENT.pack(
+        event.timestamp, event.base_amount, 0, 0, 0, event.pool_base_reserves, event.pool_quote_reserves,
+        0, 0, event.lp_fee, 0, event.protocol_fee, 0, event.quote_amount,
+        bytes(Pubkey.from_string(event.pool)),
+        bytes(Pubkey.from_string(event.user)),
+        bytes(Pubkey.from_string(event.user_base_token_account)),
+        bytes(Pubkey.from_string(event.user_quote_token_account)),
+        bytes(32),
+        bytes(32),
+    )
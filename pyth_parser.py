@@ -1,35 +1,148 @@
-"""Pure-Python best-effort Pyth v2 parser.
+"""Pure-Python Pyth price account decoder.
 
-This parser implements a conservative, well-documented subset of the Pyth
-price account fields. It is intended as a robust fallback when the
-`pyth-client` library is not available.
+Accounts are decoded by layout, chosen by the (magic, version, type) header
+words through a small registry. Each layout unpacks its fields with one
+precompiled `struct.Struct`, so a decode is a single `unpack_from` call plus
+building the result dict. Two layouts are registered:
 
-Note: real Pyth accounts may have a different exact layout; this module
-provides helpers to build and parse synthetic test accounts consistent with
-the parser for unit tests. Use `rpc.get_price_from_pyth()` which prefers the
-official client when available and falls back to this parser.
+- the real Pyth v2 price account (magic 0xa1b2c3d4, version 2, type 3,
+  3312 bytes): aggregate price, EMA price/confidence and up to 32 publisher
+  components;
+- a simplified synthetic layout (magic 'PYTH') used by the tests, built by
+  `make_price_account_bytes`.
+
+`rpc.get_price_from_pyth()` prefers the official `pyth-client` library when
+it is installed and falls back to this parser.
 """
 from __future__ import annotations
 import struct
-from typing import Optional, Dict, Any
-
-# We define a simple, stable layout for price accounts for testing and
-# parsing in this repository. The real Pyth v2 layout is more complex and
-# versioned; this parser focuses on decoding the canonical fields used by
-# consumers: price (as int64), exponent (int32), confidence (uint64),
-# status (uint32), valid_slot (uint64), publish_slot (uint64).
-
-# Offsets (bytes) for our simplified layout
-_OFF_MAGIC = 0
-_OFF_VERSION = 4
-_OFF_TYPE = 8
-_OFF_EXPO = 12
-_OFF_PRICE = 16
-_OFF_CONF = 24
-_OFF_STATUS = 32
-_OFF_VALID_SLOT = 36
-_OFF_PUBLISH_SLOT = 44
-_MIN_LEN = 52
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_HEADER = struct.Struct('<III')  # magic, version, account type
+
+# Simplified synthetic layout: magic, version, type, expo, price, conf,
+# status, valid_slot, publish_slot (52 bytes)
+SYNTHETIC_MAGIC = 0x50595448
+_SYNTHETIC = struct.Struct('<IIIiqQIQQ')
+_MIN_LEN = _SYNTHETIC.size
+
+# Pyth v2 price account
+PYTH_MAGIC = 0xA1B2C3D4
+PYTH_VERSION_2 = 2
+PYTH_TYPE_PRICE = 3
+PYTH_V2_PRICE_SIZE = 3312
+STATUS_TRADING = 1
+_V2_MAX_COMPONENTS = 32
+# Fixed part up to the end of the aggregate price info (offset 240):
+#   0 magic, version, type, size     16 price_type, expo, num, num_qt
+#  32 last_slot, valid_slot          48 ema price (val, numer, denom)
+#  72 ema conf (val, numer, denom)   96 timestamp
+# 104 min_pub (+ padding, product and next-account keys up to 176)
+# 176 prev_slot, prev_price, prev_conf, prev_timestamp
+# 208 agg: price, conf, status, corp_act, pub_slot
+_V2_PRICE = struct.Struct('<IIIIIiIIQQqqqqqqqB71xQqQqqQIIQ')
+# Publisher component (96 bytes from offset 240): key, aggregate and latest
+# price info; only the key and the aggregate info are decoded
+_V2_COMPONENT = struct.Struct('<32sqQIIQ32x')
+_V2_COMPONENTS_OFFSET = _V2_PRICE.size
+
+Decoder = Callable[[bytes, bool], Optional[Dict[str, Any]]]
+# A layout: full decoder, plus a Struct unpacking just (expo, price, status)
+# from offset 0 for the hot price-only path
+Layout = Tuple[Decoder, struct.Struct]
+_LAYOUTS: Dict[Tuple[int, Optional[int], Optional[int]], Layout] = {}
+# Resolved layout per raw 12-byte header, so a decode does one dict lookup
+_RESOLVED: Dict[bytes, Optional[Layout]] = {}
+_RESOLVED_MAX = 1024
+
+
+def register_layout(
+    magic: int, version: Optional[int], acct_type: Optional[int], decoder: Decoder, price_struct: struct.Struct
+) -> None:
+    """Register a layout for a header; None matches any version / type.
+
+    `decoder(raw, components)` returns the field dict; `price_struct`
+    unpacks (expo, price, status) from the start of the account.
+    """
+    _LAYOUTS[(magic, version, acct_type)] = (decoder, price_struct)
+    _RESOLVED.clear()
+
+
+def _layout_for(header: bytes) -> Optional[Layout]:
+    try:
+        return _RESOLVED[header]
+    except KeyError:
+        pass
+    magic, version, acct_type = _HEADER.unpack(header)
+    layout = (
+        _LAYOUTS.get((magic, version, acct_type))
+        or _LAYOUTS.get((magic, version, None))
+        or _LAYOUTS.get((magic, None, None))
+    )
+    # Arbitrary bytes must not grow the cache without bound
+    if len(_RESOLVED) < _RESOLVED_MAX:
+        _RESOLVED[header] = layout
+    return layout
+
+
+def _decode_synthetic(raw: bytes, components: bool = False) -> Optional[Dict[str, Any]]:
+    _magic, version, acct_type, expo, price, conf, status, valid_slot, publish_slot = _SYNTHETIC.unpack_from(raw)
+    return {
+        'version': version,
+        'type': acct_type,
+        'price': price,
+        'expo': expo,
+        'conf': conf,
+        'status': status,
+        'valid_slot': valid_slot,
+        'publish_slot': publish_slot,
+    }
+
+
+def _decode_v2_price(raw: bytes, components: bool = False) -> Optional[Dict[str, Any]]:
+    if len(raw) < _V2_COMPONENTS_OFFSET:
+        return None
+    (
+        _magic, version, acct_type, _size, price_type, expo, num, _num_qt, last_slot, valid_slot,
+        ema_price, _ema_price_numer, _ema_price_denom, ema_conf, _ema_conf_numer, _ema_conf_denom,
+        timestamp, min_pub, prev_slot, prev_price, prev_conf, prev_timestamp,
+        price, conf, status, corp_act, publish_slot,
+    ) = _V2_PRICE.unpack_from(raw)
+    out = {
+        'version': version,
+        'type': acct_type,
+        'price': price,
+        'expo': expo,
+        'conf': conf,
+        'status': status,
+        'valid_slot': valid_slot,
+        'publish_slot': publish_slot,
+        'price_type': price_type,
+        'last_slot': last_slot,
+        'timestamp': timestamp,
+        'ema_price': ema_price,
+        'ema_conf': ema_conf,
+        'min_publishers': min_pub,
+        'prev_slot': prev_slot,
+        'prev_price': prev_price,
+        'prev_conf': prev_conf,
+        'prev_timestamp': prev_timestamp,
+        'num_components': num,
+    }
+    if components:
+        n = min(num, _V2_MAX_COMPONENTS, (len(raw) - _V2_COMPONENTS_OFFSET) // _V2_COMPONENT.size)
+        end = _V2_COMPONENTS_OFFSET + n * _V2_COMPONENT.size
+        out['components'] = [
+            {'publisher': key, 'price': p, 'conf': c, 'status': s, 'publish_slot': slot}
+            for key, p, c, s, _corp, slot in _V2_COMPONENT.iter_unpack(memoryview(raw)[_V2_COMPONENTS_OFFSET:end])
+        ]
+    return out
+
+
+register_layout(SYNTHETIC_MAGIC, None, None, _decode_synthetic, struct.Struct('<12xiq8xI'))
+# expo at 20, aggregate price at 208 and status at 224 (sized to the fixed
+# part, like the decoder)
+register_layout(PYTH_MAGIC, PYTH_VERSION_2, PYTH_TYPE_PRICE, _decode_v2_price, struct.Struct('<20xi184xq8xI12x'))
 
 
 def make_price_account_bytes(
@@ -42,65 +155,94 @@ def make_price_account_bytes(
     version: int = 2,
     acct_type: int = 2,
 ) -> bytes:
-    """Construct synthetic price account bytes matching this parser's layout.
+    """Construct synthetic price account bytes matching the simplified layout.
 
     All integers are encoded little-endian. This helper is primarily intended
     for unit tests.
     """
-    # magic: 0x50485954 ('PYTH' as u32)
-    magic = 0x50595448
-    b = bytearray(max(_MIN_LEN, _OFF_PUBLISH_SLOT + 8))
-    struct.pack_into('<I', b, _OFF_MAGIC, magic)
-    struct.pack_into('<I', b, _OFF_VERSION, version)
-    struct.pack_into('<I', b, _OFF_TYPE, acct_type)
-    struct.pack_into('<i', b, _OFF_EXPO, int(expo))
-    struct.pack_into('<q', b, _OFF_PRICE, int(price))
-    struct.pack_into('<Q', b, _OFF_CONF, int(conf))
-    struct.pack_into('<I', b, _OFF_STATUS, int(status))
-    struct.pack_into('<Q', b, _OFF_VALID_SLOT, int(valid_slot))
-    struct.pack_into('<Q', b, _OFF_PUBLISH_SLOT, int(publish_slot))
+    return _SYNTHETIC.pack(
+        SYNTHETIC_MAGIC, version, acct_type, int(expo), int(price), int(conf), int(status), int(valid_slot), int(publish_slot)
+    )
+
+
+def make_v2_price_account_bytes(
+    price: int,
+    expo: int,
+    conf: int,
+    status: int = 1,
+    valid_slot: int = 0,
+    publish_slot: int = 0,
+    ema_price: int = 0,
+    ema_conf: int = 0,
+    timestamp: int = 0,
+    components: List[Tuple[bytes, int, int]] = (),
+) -> bytes:
+    """Construct a 3312-byte Pyth v2 price account.
+
+    `components` are (publisher key, price, conf) triples, stored with
+    status 1 and `publish_slot`. Fields not taken as arguments are zero.
+    """
+    b = bytearray(PYTH_V2_PRICE_SIZE)
+    _V2_PRICE.pack_into(
+        b, 0, PYTH_MAGIC, PYTH_VERSION_2, PYTH_TYPE_PRICE, PYTH_V2_PRICE_SIZE, 1, int(expo), len(components), 0,
+        int(publish_slot), int(valid_slot), int(ema_price), 0, 0, int(ema_conf), 0, 0, int(timestamp), 0,
+        0, 0, 0, 0, int(price), int(conf), int(status), 0, int(publish_slot),
+    )
+    for i, (key, p, c) in enumerate(components):
+        _V2_COMPONENT.pack_into(
+            b, _V2_COMPONENTS_OFFSET + i * _V2_COMPONENT.size, bytes(key), int(p), int(c), 1, 0, int(publish_slot)
+        )
     return bytes(b)
 
 
-def parse_price_account(raw: bytes) -> Optional[Dict[str, Any]]:
-    """Parse a Pyth-like price account and return canonical fields.
+def parse_price_account(raw: bytes, components: bool = False) -> Optional[Dict[str, Any]]:
+    """Parse a Pyth price account and return its fields.
 
-    Returns dict with keys: price (int), expo (int), conf (int), status (int),
-    valid_slot (int), publish_slot (int). Returns None if parsing fails.
+    Every layout returns: version, type, price (int), expo (int), conf (int),
+    status (int), valid_slot (int), publish_slot (int). Pyth v2 accounts add
+    the EMA price/confidence, timestamps and previous aggregate, and with
+    `components=True` a `components` list of publisher dicts (publisher key
+    bytes, price, conf, status, publish_slot). Returns None if the account
+    has no registered layout or is too short for it.
     """
     if not raw or len(raw) < _MIN_LEN:
         return None
+    layout = _layout_for(bytes(raw[:12]))
+    if layout is None:
+        return None
     try:
-        magic = struct.unpack_from('<I', raw, _OFF_MAGIC)[0]
-        # Accept either exact magic or permissive
-        if magic != 0x50595448:
-            # Not a recognized Pyth-like account
-            return None
-
-        version = struct.unpack_from('<I', raw, _OFF_VERSION)[0]
-        acct_type = struct.unpack_from('<I', raw, _OFF_TYPE)[0]
-        expo = struct.unpack_from('<i', raw, _OFF_EXPO)[0]
-        price = struct.unpack_from('<q', raw, _OFF_PRICE)[0]
-        conf = struct.unpack_from('<Q', raw, _OFF_CONF)[0]
-        status = struct.unpack_from('<I', raw, _OFF_STATUS)[0]
-        valid_slot = struct.unpack_from('<Q', raw, _OFF_VALID_SLOT)[0]
-        publish_slot = struct.unpack_from('<Q', raw, _OFF_PUBLISH_SLOT)[0]
-
-        return {
-            'version': int(version),
-            'type': int(acct_type),
-            'price': int(price),
-            'expo': int(expo),
-            'conf': int(conf),
-            'status': int(status),
-            'valid_slot': int(valid_slot),
-            'publish_slot': int(publish_slot),
-        }
-    except Exception:
+        return layout[0](raw, components)
+    except struct.error:
+        return None
+
+
+def has_layout(raw: bytes) -> bool:
+    """True if the account header matches a registered layout."""
+    return bool(raw) and len(raw) >= _MIN_LEN and _layout_for(bytes(raw[:12])) is not None
+
+
+def parse_price(raw: bytes) -> Optional[Tuple[int, int]]:
+    """Return (price, expo) of a price account without decoding other fields.
+
+    Returns None unless the aggregate status is Trading (1): the aggregate of
+    a halted or unknown-status feed is not a usable price.
+    """
+    if not raw or len(raw) < _MIN_LEN:
+        return None
+    layout = _layout_for(bytes(raw[:12]))
+    if layout is None:
+        return None
+    try:
+        expo, price, status = layout[1].unpack_from(raw)
+    except struct.error:
+        return None
+    if status != STATUS_TRADING:
         return None
+    return price, expo
 
 
 if __name__ == '__main__':
     # Quick smoke test
     b = make_price_account_bytes(price=123456789, expo=-6, conf=1000, status=1, valid_slot=100, publish_slot=200)
     print(parse_price_account(b))
+    print(parse_price_account(make_v2_price_account_bytes(price=6_512_345, expo=-5, conf=120)))
@@ -1,8 +1,17 @@
-from collections import deque, defaultdict
-from typing import Dict, Deque, Tuple, Optional
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import math
+from metrics import STABLECOIN_MINTS
 from parse import Trade
 import time
 
+try:
+    import numpy as np  # optional: vectorized rebuild after out-of-order trades
+except ImportError:
+    np = None
+
 WINDOWS = {
     "1m": 60,
     "5m": 5 * 60,
@@ -11,6 +20,231 @@ WINDOWS = {
 }
 
 
+class _QuoteIds:
+    """Interns quote mints as small integer IDs (0 means no quote mint)."""
+
+    __slots__ = ("ids", "names", "stable")
+
+    def __init__(self):
+        self.ids: Dict[Optional[str], int] = {None: 0}
+        self.names: List[Optional[str]] = [None]
+        # Per ID: does a priced trade in this quote carry its own USD value?
+        self.stable: List[bool] = [False]
+
+    def intern(self, quote_mint: Optional[str]) -> int:
+        qid = self.ids.get(quote_mint)
+        if qid is None:
+            qid = len(self.names)
+            self.ids[quote_mint] = qid
+            self.names.append(quote_mint)
+            self.stable.append(quote_mint in STABLECOIN_MINTS)
+        return qid
+
+
+_NAN = float("nan")
+
+
+class _MintWindows:
+    """Time-ordered trades of one mint plus running sums per window.
+
+    Trades are stored column-wise in typed arrays (ts, delta, price with NaN
+    for "no price", interned quote ID): about 28 bytes per trade instead of
+    a tuple of Python objects. Live trades are `[head:]`; the dead prefix is
+    compacted away once it dominates, so the columns behave like a ring
+    buffer without a fixed capacity.
+
+    Each window keeps four running sums (token, stable_token, stable_usd,
+    other_token) over trades `[ptr[w]:hi]`, where `hi` is the first trade
+    newer than the current `now` and `ptr[w]` the first trade inside the
+    window. "Stable" trades carry their own USD value (stablecoin quote with
+    a price); the rest are valued with the PriceCache at read time. Moving
+    `now` (either way) only touches trades crossing a boundary, so reads are
+    O(windows) amortized instead of O(trades x windows).
+    """
+
+    __slots__ = ("quotes", "ts", "delta", "price", "quote", "head", "hi", "ptr", "sums", "now", "dirty")
+
+    def __init__(self, quotes: _QuoteIds):
+        self.quotes = quotes
+        self.ts = array("q")
+        self.delta = array("d")
+        self.price = array("d")
+        self.quote = array("I")
+        self.head = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.hi = self.head
+        self.ptr = [self.head] * len(WINDOWS)
+        self.sums = [[0.0, 0.0, 0.0, 0.0] for _ in WINDOWS]
+        self.now: Optional[int] = None
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ts) - self.head
+
+    def _contrib(self, i: int) -> Tuple[float, float, float, float]:
+        token_amt = abs(self.delta[i])
+        price = self.price[i]
+        if not math.isnan(price) and self.quotes.stable[self.quote[i]]:
+            usd_val = token_amt * abs(price)
+            if usd_val != 0.0:
+                return token_amt, token_amt, usd_val, 0.0
+        return token_amt, 0.0, 0.0, token_amt
+
+    def add(self, ts: int, delta: float, quote_mint: Optional[str], price: Optional[float]) -> None:
+        qid = self.quotes.intern(quote_mint)
+        price = _NAN if price is None else price
+        if len(self.ts) > self.head and ts < self.ts[-1]:
+            # Out-of-order trade (e.g. backfill): keep columns sorted and
+            # rebuild the sums on the next read.
+            i = bisect_right(self.ts, ts, self.head)
+            self.ts.insert(i, ts)
+            self.delta.insert(i, delta)
+            self.price.insert(i, price)
+            self.quote.insert(i, qid)
+            self.dirty = True
+        else:
+            self.ts.append(ts)
+            self.delta.append(delta)
+            self.price.append(price)
+            self.quote.append(qid)
+
+    def _rebuild(self, now: int) -> None:
+        """Recompute every window from scratch with NumPy slice sums."""
+        head = self.head
+        ts = np.frombuffer(self.ts, dtype=np.int64)[head:]
+        self.hi = hi = head + int(np.searchsorted(ts, now, side="right"))
+        self.ptr = [head + int(np.searchsorted(ts, now - secs, side="left")) for secs in WINDOWS.values()]
+        lo = min(self.ptr)
+        token = np.abs(np.frombuffer(self.delta, dtype=np.float64)[lo:hi])
+        price = np.frombuffer(self.price, dtype=np.float64)[lo:hi]
+        stable_q = np.frombuffer(array("b", self.quotes.stable), dtype=np.int8).astype(bool)
+        stable_usd = np.where(np.isnan(price), 0.0, token * np.abs(price))
+        stable = stable_q[np.frombuffer(self.quote, dtype=np.uintc)[lo:hi]] & (stable_usd != 0.0)
+        stable_token = np.where(stable, token, 0.0)
+        stable_usd = np.where(stable, stable_usd, 0.0)
+        other_token = token - stable_token
+        sums = []
+        for p in self.ptr:
+            if p >= hi:
+                sums.append([0.0, 0.0, 0.0, 0.0])
+                continue
+            a = p - lo
+            sums.append([
+                float(token[a:].sum()),
+                float(stable_token[a:].sum()),
+                float(stable_usd[a:].sum()),
+                float(other_token[a:].sum()),
+            ])
+        self.sums = sums
+        self.now = now
+        self.dirty = False
+
+    def advance(self, now: int) -> None:
+        if self.dirty:
+            if np is not None:
+                self._rebuild(now)
+                return
+            self._reset()
+        ts = self.ts
+        end = len(ts)
+        sums = self.sums
+        ptr = self.ptr
+        contrib = self._contrib
+
+        # Move the upper bound: trades with ts <= now are visible.
+        while self.hi < end and ts[self.hi] <= now:
+            c = contrib(self.hi)
+            for s in sums:
+                s[0] += c[0]
+                s[1] += c[1]
+                s[2] += c[2]
+                s[3] += c[3]
+            self.hi += 1
+        while self.hi > self.head and ts[self.hi - 1] > now:
+            self.hi -= 1
+            c = contrib(self.hi)
+            for w, s in enumerate(sums):
+                if ptr[w] <= self.hi:
+                    s[0] -= c[0]
+                    s[1] -= c[1]
+                    s[2] -= c[2]
+                    s[3] -= c[3]
+                else:
+                    ptr[w] = self.hi
+
+        # Move each window's lower bound: trades with ts >= now - secs count.
+        for w, secs in enumerate(WINDOWS.values()):
+            cutoff = now - secs
+            s = sums[w]
+            p = ptr[w]
+            while p < self.hi and ts[p] < cutoff:
+                c = contrib(p)
+                s[0] -= c[0]
+                s[1] -= c[1]
+                s[2] -= c[2]
+                s[3] -= c[3]
+                p += 1
+            while p > self.head and ts[p - 1] >= cutoff:
+                p -= 1
+                c = contrib(p)
+                s[0] += c[0]
+                s[1] += c[1]
+                s[2] += c[2]
+                s[3] += c[3]
+            ptr[w] = p
+            if p == self.hi:
+                # Empty window: drop accumulated rounding error
+                s[0] = s[1] = s[2] = s[3] = 0.0
+        self.now = now
+
+    def prune(self, cutoff: int) -> None:
+        """Drop trades older than `cutoff` that no window still counts."""
+        ts = self.ts
+        limit = min(min(self.ptr), self.hi) if not self.dirty else len(ts)
+        h = self.head
+        while h < limit and ts[h] < cutoff:
+            h += 1
+        if h == self.head:
+            return
+        self.head = h
+        # Compact once the dead prefix dominates so memory stays bounded
+        if h > 1024 and h * 2 > len(ts):
+            for col in (self.ts, self.delta, self.price, self.quote):
+                del col[:h]
+            self.hi -= h
+            self.ptr = [p - h for p in self.ptr]
+            self.head = 0
+
+    def latest_ts(self) -> Optional[int]:
+        return self.ts[-1] if len(self.ts) > self.head else None
+
+
+def _volumes_from_sums(price_cache, mint: str, sums, return_usd: bool):
+    """Shape per-window (token, stable_token, stable_usd, other_token) sums."""
+    if not return_usd:
+        return {label: sums[w][0] for w, label in enumerate(WINDOWS)}
+
+    # USD computation order of preference:
+    # 1) trade has price and quote is stablecoin -> use it
+    # 2) otherwise, use price_cache if available for this mint
+    p = None
+    if price_cache is not None and any(s[3] for s in sums):
+        try:
+            p = price_cache.get(mint)
+        except Exception:
+            p = None
+    res_usd: Dict[str, Dict[str, float]] = {}
+    for w, label in enumerate(WINDOWS):
+        _, stable_token, stable_usd, other_token = sums[w]
+        if p is not None:
+            res_usd[label] = {"token": stable_token + other_token, "usd": stable_usd + other_token * abs(p)}
+        else:
+            res_usd[label] = {"token": stable_token, "usd": stable_usd}
+    return res_usd
+
+
 class InMemoryIndexer:
     """Maintain in-memory rolling windows of absolute token volumes per mint.
 
@@ -21,31 +255,40 @@ class InMemoryIndexer:
     """
 
     def __init__(self, price_cache=None):
-        # For each mint, keep deque of (ts, token_delta, quote_mint, price)
-        self.store: Dict[str, Deque[Tuple[int, float, Optional[str], Optional[float]]]] = defaultdict(deque)
+        # For each mint, time-ordered trades and running per-window sums
+        self.mints: Dict[str, _MintWindows] = {}
+        # Quote mints are shared by many mints; store them once as small ints
+        self.quotes = _QuoteIds()
         # Optional PriceCache instance used for USD computations when trades are
         # not quoted in stablecoins.
         self.price_cache = price_cache
 
     def _prune(self, mint: str, now_ts: Optional[int] = None) -> None:
         now = int(now_ts or time.time())
-        dq = self.store.get(mint)
-        if not dq:
+        mw = self.mints.get(mint)
+        if not mw:
             return
         max_window = max(WINDOWS.values())
-        cutoff = now - max_window
-        # Pop left while oldest < cutoff
-        while dq and dq[0][0] < cutoff:
-            dq.popleft()
+        mw.prune(now - max_window)
 
     def add_trade(self, trade: Trade) -> None:
         """Add a parsed trade to the in-memory indexer."""
         if not trade or not trade.mint:
             return
-        dq = self.store[trade.mint]
-        dq.append((int(trade.ts), float(trade.token_delta), trade.quote_mint, trade.price))
-        # Keep deque size bounded by pruning old entries
-        self._prune(trade.mint, trade.ts)
+        mw = self.mints.get(trade.mint)
+        if mw is None:
+            mw = self.mints[trade.mint] = _MintWindows(self.quotes)
+        ts = int(trade.ts)
+        mw.add(ts, float(trade.token_delta), trade.quote_mint, trade.price)
+        if not mw.dirty and (mw.now is None or ts > mw.now):
+            mw.advance(ts)
+        # Keep memory bounded by pruning old entries
+        self._prune(trade.mint, ts)
+
+    def latest_ts(self, mint: str) -> Optional[int]:
+        """Timestamp of the newest trade held for `mint` (None if none)."""
+        mw = self.mints.get(mint)
+        return mw.latest_ts() if mw else None
 
     def get_volumes(self, mint: str, now_ts: Optional[int] = None, return_usd: bool = False) -> Dict[str, float] | Dict[str, Dict[str, float]]:
         """Return rolling volumes for the given `mint`.
@@ -54,40 +297,241 @@ class InMemoryIndexer:
         {window: {"token": float, "usd": float}}.
         """
         now = int(now_ts or time.time())
-        self._prune(mint, now)
-        dq = self.store.get(mint, deque())
-        res_token: Dict[str, float] = {k: 0.0 for k in WINDOWS}
-        res_usd: Dict[str, Dict[str, float]] = {k: {"token": 0.0, "usd": 0.0} for k in WINDOWS}
-        from metrics import STABLECOIN_MINTS
-
-        for ts, delta, quote_mint, price in dq:
-            age = now - ts
-            if age < 0:
+        mw = self.mints.get(mint)
+        if mw is None:
+            sums = [[0.0, 0.0, 0.0, 0.0] for _ in WINDOWS]
+        else:
+            mw.advance(now)
+            self._prune(mint, now)
+            sums = mw.sums
+
+        return _volumes_from_sums(self.price_cache, mint, sums, return_usd)
+
+
+# BucketedIndexer keeps windows up to this length at 1s resolution and longer
+# ones at 1m resolution.
+_SECOND_SPAN = 5 * 60
+_NO_TRADES = (0.0, 0.0, 0.0, 0.0, 0)
+# Sums ranked by `top_mints` (token, stable_usd), and how many heap entries
+# per live mint are tolerated before a heap is rebuilt
+_RANK_COLS = (0, 2)
+_HEAP_SLACK = 4
+
+
+def _contrib(delta: float, quote_mint: Optional[str], price: Optional[float]) -> List[float]:
+    """[token, stable_token, stable_usd, other_token, trades] for one trade."""
+    token_amt = abs(delta)
+    if price is not None and quote_mint in STABLECOIN_MINTS:
+        usd_val = token_amt * abs(price)
+        if usd_val != 0.0:
+            return [token_amt, token_amt, usd_val, 0.0, 1]
+    return [token_amt, 0.0, 0.0, token_amt, 1]
+
+
+def _add_sums(table: Dict[str, List[float]], mint: str, c: List[float]) -> None:
+    s = table.get(mint)
+    if s is None:
+        table[mint] = list(c)
+    else:
+        s[0] += c[0]
+        s[1] += c[1]
+        s[2] += c[2]
+        s[3] += c[3]
+        s[4] += c[4]
+
+
+def _keys_between(store: Dict[int, Any], lo: int, hi: int) -> List[int]:
+    """Keys of `store` in [lo, hi), without walking a huge idle gap."""
+    if hi - lo <= len(store):
+        return [k for k in range(lo, hi) if k in store]
+    return [k for k in store if lo <= k < hi]
+
+
+class BucketedIndexer:
+    """Rolling volumes for many mints from global 1s/1m time buckets.
+
+    Each second (for windows up to 5m) and each minute (15m, 1h) has one
+    bucket mapping mint -> sums of that bucket's trades. The buckets form a
+    timer wheel turned by a single clock, the newest trade or read time: as
+    it advances, buckets leaving a window are subtracted from that window's
+    per-mint totals, and a mint without trades in the 1h window is evicted.
+    Memory tracks the mints that traded in the last hour whether or not
+    anyone reads them, and reads are O(1) per mint.
+
+    15m/1h have minute resolution: a minute bucket counts while its start is
+    inside the window, so up to 59s at the old edge are left out. Trades
+    older than every bucket still held are dropped, and reads before the
+    clock return the totals as of the clock.
+
+    For `top_mints` every window also keeps a max-heap per ranking column,
+    updated lazily. A trade only marks its mint dirty; the next read pushes
+    the dirty mints' new (larger) totals, or rebuilds the heaps when most
+    mints are dirty (then the dirty set is no longer kept) or the heaps are
+    mostly outdated entries. A total that
+    shrinks as buckets expire keeps its old entry, which is re-pushed at the
+    current value when it reaches the top, and entries of evicted mints are
+    dropped there. A top-k read costs O((k + dirty + outdated) log n)
+    instead of a scan of every mint in the window.
+    """
+
+    def __init__(self, price_cache=None):
+        self.price_cache = price_cache
+        self.now: Optional[int] = None
+        # bucket key (unix second / unix minute) -> mint -> sums
+        self.seconds: Dict[int, Dict[str, List[float]]] = {}
+        self.minutes: Dict[int, Dict[str, List[float]]] = {}
+        # per window: mint -> [token, stable_token, stable_usd, other_token, trades]
+        self.totals: List[Dict[str, List[float]]] = [{} for _ in WINDOWS]
+        self.last_ts: Dict[str, int] = {}
+        self.evicted = 0
+        # per window and ranking column: heap of (-value, mint), see top_mints
+        self._heaps: List[Dict[int, List[Tuple[float, str]]]] = [{c: [] for c in _RANK_COLS} for _ in WINDOWS]
+        # per window: mints changed since the last read; None = rebuild
+        self._dirty: List[Optional[set]] = [set() for _ in WINDOWS]
+        self._secs = list(WINDOWS.values())
+        self._by_minute = [secs > _SECOND_SPAN for secs in self._secs]
+        self._longest = self._secs.index(max(self._secs))
+        # Bucket bounds at the current clock: per window, then per store
+        self._los: List[int] = []
+        self._keep: List[Optional[int]] = [None, None]
+
+    def __len__(self) -> int:
+        return len(self.last_ts)
+
+    def _lo(self, w: int, now: int) -> int:
+        """First bucket key inside window `w` at time `now`."""
+        start = now - self._secs[w]
+        return -(-start // 60) if self._by_minute[w] else start
+
+    def _keep_from(self, by_minute: bool, now: int) -> Optional[int]:
+        los = [self._lo(w, now) for w, m in enumerate(self._by_minute) if m == by_minute]
+        return min(los) if los else None
+
+    def _advance(self, now: int) -> None:
+        old, self.now = self.now, now
+        if old is None:
+            self._set_bounds(now)
+            return
+        for w, by_minute in enumerate(self._by_minute):
+            store = self.minutes if by_minute else self.seconds
+            totals = self.totals[w]
+            for key in _keys_between(store, self._lo(w, old), self._lo(w, now)):
+                for mint, c in store[key].items():
+                    s = totals[mint]
+                    if s[4] == c[4]:
+                        # last trades of this mint in the window
+                        del totals[mint]
+                        if self._dirty[w] is not None:
+                            self._dirty[w].discard(mint)
+                        if w == self._longest:
+                            self.last_ts.pop(mint, None)
+                            self.evicted += 1
+                        continue
+                    for i in range(5):
+                        s[i] -= c[i]
+        # Drop buckets no window covers any more
+        for store, by_minute in ((self.seconds, False), (self.minutes, True)):
+            old_lo = self._keep_from(by_minute, old)
+            if old_lo is None:
+                continue
+            for key in _keys_between(store, old_lo, self._keep_from(by_minute, now)):
+                del store[key]
+        self._set_bounds(now)
+
+    def _set_bounds(self, now: int) -> None:
+        self._los = [self._lo(w, now) for w in range(len(self._secs))]
+        self._keep = [self._keep_from(False, now), self._keep_from(True, now)]
+
+    def _update_ranks(self, w: int) -> None:
+        dirty = self._dirty[w]
+        if dirty is not None and not dirty:
+            return
+        totals, heaps = self.totals[w], self._heaps[w]
+        if dirty is None or len(heaps[0]) > _HEAP_SLACK * len(totals) + 64:
+            # cheaper (or needed) to rebuild from the live totals
+            for col in heaps:
+                heaps[col] = [(-s[col], m) for m, s in totals.items()]
+                heapq.heapify(heaps[col])
+        else:
+            for mint in dirty:
+                s = totals.get(mint)
+                if s is not None:
+                    for col, heap in heaps.items():
+                        heapq.heappush(heap, (-s[col], mint))
+        self._dirty[w] = set()
+
+    def add_trade(self, trade: Trade) -> None:
+        """Add a parsed trade, advancing the clock if it is the newest seen."""
+        if not trade or not trade.mint:
+            return
+        ts = int(trade.ts)
+        if self.now is None or ts > self.now:
+            self._advance(ts)
+        mint = trade.mint
+        c = _contrib(float(trade.token_delta), trade.quote_mint, trade.price)
+        minute = ts // 60
+        for w, by_minute in enumerate(self._by_minute):
+            if (minute if by_minute else ts) >= self._los[w]:
+                _add_sums(self.totals[w], mint, c)
+                dirty = self._dirty[w]
+                if dirty is not None:
+                    dirty.add(mint)
+                    if len(dirty) > (len(self.totals[w]) >> 1) + 64:
+                        self._dirty[w] = None
+        keep_s, keep_m = self._keep
+        if keep_s is not None and ts >= keep_s:
+            _add_sums(self.seconds.setdefault(ts, {}), mint, c)
+        if keep_m is not None and minute >= keep_m:
+            _add_sums(self.minutes.setdefault(minute, {}), mint, c)
+        if mint in self.totals[self._longest] and ts > self.last_ts.get(mint, ts - 1):
+            self.last_ts[mint] = ts
+
+    def latest_ts(self, mint: str) -> Optional[int]:
+        """Timestamp of the newest trade held for `mint` (None if none)."""
+        return self.last_ts.get(mint)
+
+    def get_volumes(self, mint: str, now_ts: Optional[int] = None, return_usd: bool = False) -> Dict[str, float] | Dict[str, Dict[str, float]]:
+        """Return rolling volumes for `mint`, shaped like `InMemoryIndexer.get_volumes`."""
+        now = int(now_ts or time.time())
+        if self.now is None or now > self.now:
+            self._advance(now)
+        sums = [t.get(mint, _NO_TRADES) for t in self.totals]
+        return _volumes_from_sums(self.price_cache, mint, sums, return_usd)
+
+    def top_mints(self, window: str = "1m", k: int = 10, by: str = "token", now_ts: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return the `k` mints with the largest volume in `window`.
+
+        `by="token"` ranks by token volume, `by="usd"` by the USD value of
+        stablecoin-priced trades (no PriceCache lookups). Only mints that
+        traded inside the window are considered.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"unknown window {window!r}")
+        if by not in ("token", "usd"):
+            raise ValueError("by must be 'token' or 'usd'")
+        now = int(now_ts or time.time())
+        if self.now is None or now > self.now:
+            self._advance(now)
+        col = 0 if by == "token" else 2
+        w = list(WINDOWS).index(window)
+        self._update_ranks(w)
+        totals, heap = self.totals[w], self._heaps[w][col]
+        out: List[Tuple[str, float]] = []
+        kept = []
+        seen = set()
+        while heap and len(out) < k:
+            entry = heapq.heappop(heap)
+            value, mint = -entry[0], entry[1]
+            s = totals.get(mint)
+            if s is None or mint in seen or s[col] > value:
+                continue  # evicted, already taken, or a newer entry exists
+            if s[col] < value:
+                # shrank since the push: requeue at the current total
+                heapq.heappush(heap, (-s[col], mint))
                 continue
-            token_amt = abs(delta)
-            for label, secs in WINDOWS.items():
-                if age <= secs:
-                    res_token[label] += token_amt
-                    # USD computation order of preference:
-                    # 1) trade has price and quote is stablecoin -> use it
-                    # 2) otherwise, use price_cache if available for this mint
-                    usd_added = 0.0
-                    if price is not None and quote_mint in STABLECOIN_MINTS:
-                        try:
-                            usd_val = token_amt * abs(price)
-                            res_usd[label]["token"] += token_amt
-                            res_usd[label]["usd"] += usd_val
-                            usd_added = usd_val
-                        except Exception:
-                            pass
-                    if usd_added == 0.0 and self.price_cache is not None:
-                        try:
-                            p = self.price_cache.get(mint)
-                            if p is not None:
-                                usd_val = token_amt * abs(p)
-                                res_usd[label]["token"] += token_amt
-                                res_usd[label]["usd"] += usd_val
-                        except Exception:
-                            pass
-
-        return res_usd if return_usd else res_token
+            seen.add(mint)
+            out.append((mint, value))
+            kept.append(entry)
+        for entry in kept:
+            heapq.heappush(heap, entry)
+        return out
@@ -1,31 +1,130 @@
+"""Live PumpSwap ingestion over `logsSubscribe`.
+
+The subscriber is a staged asyncio pipeline so a slow RPC call never stalls
+the websocket reader:
+
+  reader -> signature queue -> N fetch workers (async RPC) -> trade queue -> writer
+
+The reader only decodes notifications and enqueues signatures, skipping
+failed transactions and ones whose logs show no PumpSwap Buy/Sell
+instruction (`prefilter=True`), so those never cost a `getTransaction`.
+With a `PoolRegistry` (`pools=`), swaps whose `Program data:` events name a
+known pool become trades straight from the notification; fetched
+transactions teach the registry new pools. Fetch workers call
+`getTransaction` (at `confirmed`, like the subscription) on an
+`AsyncClient` and extract trades. The writer feeds the in-memory indexer
+and persists trades with `save_trades` in batches. Both queues are
+bounded: when the signature queue is full the reader either waits
+(backpressure on the websocket) or drops the signature
+(`drop_when_full=True`). Every `prune_interval` seconds the writer also
+starts `store.prune_rollups` in a worker thread, which drops volume buckets
+past `store.ROLLUP_RETENTION`. Counters and lag are kept in `IngestStats`.
+"""
 import asyncio
 import json
+import logging
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 import websockets
-from solana.rpc.api import Client
+from solana.rpc.commitment import Confirmed
+from solders.signature import Signature
 
-from parse import extract_trade_from_tx
+from parse import Trade, extract_trades_from_tx, logs_show_pumpswap_swap
+from pumpswap_events import events_from_logs, trade_from_events
 from realtime import InMemoryIndexer
-from store import init_db, save_trade
+from rpc import RPC_ERRORS, backoff_delay, decode_tx_response, tx_request, tx_to_dict
+from store import init_db, prune_rollups, save_trades
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_WS = "wss://api.mainnet-beta.solana.com/"
 DEFAULT_RPC = "https://api.mainnet-beta.solana.com"
 PUMPSWAP_PROGRAM_ID = "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA"
 
 
+@dataclass
+class IngestStats:
+    """Pipeline counters. Lags are seconds from notification to persist."""
+
+    received: int = 0
+    skipped_failed: int = 0
+    skipped_no_swap: int = 0
+    decoded_from_logs: int = 0
+    enqueued: int = 0
+    dropped: int = 0
+    reader_waits: int = 0
+    fetched: int = 0
+    missing: int = 0
+    fetch_failed: int = 0
+    retries: int = 0
+    trades: int = 0
+    saved: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    queue_high_water: int = 0
+    pruned_buckets: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+
+    @property
+    def fetches_avoided(self) -> int:
+        return self.skipped_failed + self.skipped_no_swap + self.decoded_from_logs
+
+
 class PumpSwapSubscriber:
-    def __init__(self, ws_url: str = DEFAULT_WS, rpc_url: str = DEFAULT_RPC, program_id: str = PUMPSWAP_PROGRAM_ID):
+    def __init__(
+        self,
+        ws_url: str = DEFAULT_WS,
+        rpc_url: str = DEFAULT_RPC,
+        program_id: str = PUMPSWAP_PROGRAM_ID,
+        client=None,
+        db=None,
+        indexer=None,
+        pools=None,
+        workers: int = 8,
+        queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        drop_when_full: bool = False,
+        prefilter: bool = True,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        prune_interval: float = 60.0,
+    ):
         self.ws_url = ws_url
         self.rpc_url = rpc_url
         self.program_id = program_id
-        self.client = Client(rpc_url)
-        # Provide a price cache to the indexer for USD computations
-        from price_cache import PriceCache
+        if client is None:
+            from solana.rpc.async_api import AsyncClient
 
-        self.indexer = InMemoryIndexer(price_cache=PriceCache(self.client))
-        self.db = init_db("./trades.db")
+            client = AsyncClient(rpc_url)
+        self.client = client
+        if indexer is None:
+            # Provide a price cache to the indexer for USD computations
+            from price_cache import PriceCache
+            from rpc import get_client
+
+            indexer = InMemoryIndexer(price_cache=PriceCache(get_client(rpc_url)))
+        self.indexer = indexer
+        self.pools = pools
+        self.db = db if db is not None else init_db("./trades.db", wal=True, synchronous="NORMAL")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_when_full = drop_when_full
+        self.prefilter = prefilter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.prune_interval = prune_interval
+        self._pruned_at: Optional[float] = None
+        self._prune_task: Optional[asyncio.Task] = None
+        self.stats = IngestStats()
+        self._sigs: Optional[asyncio.Queue] = None
+        self._trades: Optional[asyncio.Queue] = None
+        self._stop: Optional[asyncio.Event] = None
         self._running = False
 
     async def _subscribe(self, websocket):
@@ -34,65 +133,180 @@ class PumpSwapSubscriber:
             "jsonrpc": "2.0",
             "id": 1,
             "method": "logsSubscribe",
-            "params": ["all", {"mentions": [self.program_id]}],
+            "params": [{"mentions": [self.program_id]}, {"commitment": "confirmed"}],
         }
         await websocket.send(json.dumps(req))
 
-    async def _handle_message(self, msg: str):
+    def _notification(self, msg: str) -> Optional[Dict[str, Any]]:
+        """Return the `value` of a logsNotification ({signature, err, logs})."""
         try:
             payload = json.loads(msg)
         except Exception:
-            return
-
-        # notifications come in as {"jsonrpc":"2.0","method":"logsNotification","params":{...}}
+            return None
+        # {"method": "logsNotification", "params": {"result": {"context": ..., "value": {...}}}}
         params = payload.get("params")
-        if not params:
-            return
+        if not isinstance(params, dict):
+            return None
         result = params.get("result") or {}
-        sig = result.get("signature")
-        if not sig:
-            return
+        value = result.get("value") or {}
+        if not value.get("signature"):
+            return None
+        return value
 
-        # fetch transaction via HTTP RPC and parse
-        try:
-            tx = self.client.get_transaction(sig, encoding="jsonParsed", max_supported_transaction_version=0)
-            tx_obj = tx.value
-            if tx_obj is None:
+    async def _handle_message(self, msg: str) -> None:
+        value = self._notification(msg)
+        if value is None:
+            return
+        self.stats.received += 1
+        if self.prefilter:
+            if value.get("err") is not None:
+                self.stats.skipped_failed += 1
                 return
-            # try to convert to dict-like
+            if not logs_show_pumpswap_swap(value.get("logs"), (self.program_id,)):
+                self.stats.skipped_no_swap += 1
+                return
+        received_at = time.monotonic()
+        trades = self._trades_from_logs(value)
+        if trades is not None:
+            self.stats.decoded_from_logs += 1
+            for trade in trades:
+                await self._trades.put((trade, received_at))
+            return
+        item = (value["signature"], received_at)
+        if self._sigs.full():
+            if self.drop_when_full:
+                self.stats.dropped += 1
+                return
+            self.stats.reader_waits += 1
+        await self._sigs.put(item)
+        self.stats.enqueued += 1
+        self.stats.queue_high_water = max(self.stats.queue_high_water, self._sigs.qsize())
+
+    def _trades_from_logs(self, value: Dict[str, Any]) -> Optional[List[Trade]]:
+        """Trades from the notification's swap events; None if a fetch is needed."""
+        if self.pools is None:
+            return None
+        events = events_from_logs(value.get("logs"), (self.program_id,))
+        if not events:
+            return None
+        infos = [self.pools.get(ev.pool) for ev in events]
+        if any(info is None for info in infos):
+            return None
+        # one trade per signature: several events are netted, or fetched
+        trade = trade_from_events(list(zip(events, infos)), value["signature"])
+        return None if trade is None else [trade]
+
+    async def _get_transaction(self, sig: str) -> Optional[Dict[str, Any]]:
+        """One `getTransaction`; raw-bytes decode when the provider allows it."""
+        provider = getattr(self.client, "_provider", None)
+        if provider is not None and hasattr(provider, "make_request_unparsed"):
+            return decode_tx_response(await provider.make_request_unparsed(tx_request(sig)))
+        resp = await self.client.get_transaction(
+            Signature.from_string(sig),
+            encoding="jsonParsed",
+            commitment=Confirmed,
+            max_supported_transaction_version=0,
+        )
+        return None if resp.value is None else tx_to_dict(resp.value, sig)
+
+    async def _fetch(self, sig: str) -> Optional[Dict[str, Any]]:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                tx = await self._get_transaction(sig)
+                if tx is None:
+                    # not yet available on this node; try again shortly
+                    if attempt < self.max_retries:
+                        self.stats.retries += 1
+                        await asyncio.sleep(backoff_delay(attempt, self.backoff_base))
+                        continue
+                    self.stats.missing += 1
+                    return None
+                self.stats.fetched += 1
+                return tx
+            except RPC_ERRORS + (OSError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    logger.warning("Giving up on %s after %d attempts: %r", sig, attempt, e)
+                    break
+                self.stats.retries += 1
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base))
+        self.stats.fetch_failed += 1
+        return None
+
+    async def _fetch_worker(self) -> None:
+        while True:
+            sig, received_at = await self._sigs.get()
             try:
-                tx_json = tx_obj.to_json()
-                tx_dict = json.loads(tx_json)
+                tx = await self._fetch(sig)
+                if tx and self.pools is not None:
+                    self.pools.learn_from_tx(tx)
+                if tx:
+                    for trade in extract_trades_from_tx(tx, sig):
+                        await self._trades.put((trade, received_at))
             except Exception:
+                logger.exception("Failed to process %s", sig)
+            finally:
+                self._sigs.task_done()
+
+    def _flush(self, batch: List[Tuple[Trade, float]]) -> None:
+        trades = [t for t, _ in batch]
+        for trade in trades:
+            self.indexer.add_trade(trade)
+        inserted, dups = save_trades(self.db, trades)
+        now = time.monotonic()
+        lag = now - min(r for _, r in batch)
+        st = self.stats
+        st.trades += len(trades)
+        st.saved += inserted
+        st.duplicates += dups
+        st.batches += 1
+        st.last_lag = lag
+        st.max_lag = max(st.max_lag, lag)
+
+    async def _writer(self) -> None:
+        while True:
+            batch = [await self._trades.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
                 try:
-                    tx_dict = dict(tx_obj)
-                except Exception:
-                    return
-
-            trade = extract_trade_from_tx(tx_dict, None, sig) if False else None
-            # We need to know which mint to check; instead, try to extract trades for known mints by
-            # scanning pre/post balances and returning Trade for any mint used by PumpSwap.
-            # Reuse extract_trade_from_tx by iterating over mints found in pre/post.
-            meta = tx_dict.get("meta") or {}
-            pre = meta.get("preTokenBalances") or []
-            post = meta.get("postTokenBalances") or []
-            mints = set()
-            for r in pre + post:
-                if r.get("mint"):
-                    mints.add(r.get("mint"))
-
-            for mint in mints:
-                trade = extract_trade_from_tx(tx_dict, mint, sig)
-                if trade:
-                    # add to in-memory indexer and persist
-                    self.indexer.add_trade(trade)
-                    save_trade(self.db, trade)
+                    batch.append(await asyncio.wait_for(self._trades.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._flush(batch)
+            except Exception:
+                logger.exception("Failed to persist %d trades", len(batch))
+            finally:
+                for _ in batch:
+                    self._trades.task_done()
+            self._maybe_prune()
 
-        except Exception:
+    def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < self.prune_interval:
             return
+        if self._prune_task is not None and not self._prune_task.done():
+            return
+        self._pruned_at = now
+        self._prune_task = asyncio.create_task(self._prune())
 
-    async def run(self):
-        self._running = True
+    async def _prune(self) -> None:
+        try:
+            path = self.db.execute("PRAGMA database_list").fetchone()[2]
+            if path:
+                # own connection in a worker thread, so the deletes never
+                # hold up the reader or the fetch workers
+                removed = await asyncio.to_thread(prune_rollups, path)
+            else:
+                # an in-memory database has no second connection
+                removed = prune_rollups(self.db)
+            self.stats.pruned_buckets += removed
+        except Exception:
+            logger.exception("Failed to prune volume rollups")
+
+    async def _read_loop(self) -> None:
         backoff = 1
         while self._running:
             try:
@@ -103,12 +317,45 @@ class PumpSwapSubscriber:
                         await self._handle_message(message)
                         if not self._running:
                             break
+            except asyncio.CancelledError:
+                raise
             except Exception:
+                logger.warning("Websocket error; reconnecting in %ss", backoff, exc_info=True)
                 await asyncio.sleep(backoff)
                 backoff = min(backoff * 2, 30)
 
+    async def run(self):
+        """Run until `stop()`; in-flight signatures are drained before returning."""
+        self._running = True
+        self._stop = asyncio.Event()
+        self._sigs = asyncio.Queue(maxsize=self.queue_size)
+        self._trades = asyncio.Queue(maxsize=self.queue_size)
+        stages = [asyncio.create_task(self._fetch_worker()) for _ in range(self.workers)]
+        stages.append(asyncio.create_task(self._writer()))
+        reader = asyncio.create_task(self._read_loop())
+        try:
+            await self._stop.wait()
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+            await self._sigs.join()
+            await self._trades.join()
+            for t in stages:
+                t.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            if self._prune_task is not None:
+                await self._prune_task
+            self._running = False
+
     def stop(self):
         self._running = False
+        if self._stop is not None:
+            self._stop.set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Signatures waiting for a fetch worker."""
+        return self._sigs.qsize() if self._sigs is not None else 0
 
 
 def start_background():
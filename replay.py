@@ -0,0 +1,473 @@
+"""Record and replay transaction corpora to measure ingestion offline.
+
+A corpus is gzip-compressed JSONL, one record per line:
+
+  {"kind": "tx", "t": 0.0, "signature": ..., "mint": ..., "tx": {...}}
+  {"kind": "notification", "t": 0.1, "value": {"signature": ..., "err": ..., "logs": [...]}}
+
+`tx` records hold jsonParsed `getTransaction` results (`mint` is optional
+and set when recorded for one mint), `notification` records hold the
+`value` of a `logsNotification`. `t` is seconds since the recording
+started and drives real-time pacing.
+
+`replay` pushes a corpus through the ingestion stages: the log prefilter
+(for notifications), trade extraction (`extract_trade_from_tx` when the
+record names a mint, else `extract_trades_from_tx`), `save_trade` (or
+`save_trades` with `batch_size > 1`) and `InMemoryIndexer`, and reports
+tx/sec, p50/p99 latency per stage and memory. `synthesize` writes an
+offline corpus of PumpSwap-shaped swaps.
+
+  python replay.py synth corpus.jsonl.gz --n 10000
+  python replay.py record corpus.jsonl.gz --mint <MINT> --limit 1000
+  python replay.py record-ws corpus.jsonl.gz --seconds 60
+  python replay.py run corpus.jsonl.gz [--pace realtime --speed 2]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from parse import PUMPSWAP_PROGRAM_ID, extract_trade_from_tx, extract_trades_from_tx, logs_show_pumpswap_swap
+from realtime import InMemoryIndexer
+from store import init_db, save_trade, save_trades
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("prefilter", "parse", "store", "index")
+
+
+class CorpusWriter:
+    """Append records to a gzip JSONL corpus; use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = gzip.open(path, "wt", encoding="utf-8")
+        self._start = time.monotonic()
+        self.count = 0
+
+    def _write(self, rec: Dict[str, Any], t: Optional[float]) -> None:
+        rec["t"] = round(time.monotonic() - self._start if t is None else t, 6)
+        self._f.write(json.dumps(rec, separators=(",", ":")))
+        self._f.write("\n")
+        self.count += 1
+
+    def write_tx(self, signature: str, tx: Dict[str, Any], mint: Optional[str] = None, t: Optional[float] = None) -> None:
+        rec = {"kind": "tx", "signature": signature, "tx": tx}
+        if mint is not None:
+            rec["mint"] = mint
+        self._write(rec, t)
+
+    def write_notification(self, value: Dict[str, Any], t: Optional[float] = None) -> None:
+        self._write({"kind": "notification", "value": value}, t)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def record(rpc_url: str, mint: str, path: str, limit: int = 1000, workers: int = 4, rps: Optional[float] = None) -> int:
+    """Record the `getTransaction` results of a mint's latest `limit` signatures."""
+    from backfill import backfill_mint
+    from rpc import fetch_txs, get_client
+
+    client = get_client(rpc_url)
+    db = init_db(":memory:")
+    with CorpusWriter(path) as out:
+
+        def process(sig_infos):
+            sigs = [s["signature"] for s in sig_infos if s.get("err") is None]
+            for sig, tx in fetch_txs(client, sigs, workers=workers, rate=rps):
+                if tx is not None:
+                    out.write_tx(sig, tx, mint=mint)
+
+        backfill_mint(client, db, mint, process, depth=limit)
+        return out.count
+
+
+async def record_ws(
+    path: str,
+    ws_url: str,
+    rpc_url: str,
+    program_id: str = PUMPSWAP_PROGRAM_ID,
+    seconds: float = 60.0,
+    workers: int = 8,
+) -> int:
+    """Record `logsNotification`s for `seconds`, then the transactions they name.
+
+    Transactions are fetched at `confirmed`, the commitment of the
+    subscription, so the last notifications are not lost to finalization.
+    Signatures whose transaction still could not be fetched are logged with
+    a count; their notifications are recorded without a `tx` record.
+    """
+    import websockets
+
+    from rpc import FetchStats, fetch_txs, get_client
+
+    values: List[tuple] = []
+    start = time.monotonic()
+    async with websockets.connect(ws_url) as ws:
+        await ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "logsSubscribe",
+            "params": [{"mentions": [program_id]}, {"commitment": "confirmed"}],
+        }))
+        while time.monotonic() - start < seconds:
+            try:
+                msg = await asyncio.wait_for(ws.recv(), seconds - (time.monotonic() - start))
+            except asyncio.TimeoutError:
+                break
+            value = (((json.loads(msg).get("params") or {}).get("result") or {}).get("value")) or {}
+            if value.get("signature"):
+                values.append((time.monotonic() - start, value))
+    wanted = [v["signature"] for _, v in values if v.get("err") is None]
+    stats = FetchStats()
+    fetched = await asyncio.to_thread(lambda: list(fetch_txs(get_client(rpc_url), wanted, workers=workers, stats=stats)))
+    dropped = len(wanted) - stats.fetched
+    if dropped:
+        logger.warning(
+            "record_ws: no transaction for %d of %d signatures (%d not found, %d failed); not recorded",
+            dropped, len(wanted), stats.missing, stats.failed,
+        )
+    with CorpusWriter(path) as out:
+        for t, value in values:
+            out.write_notification(value, t=t)
+        for sig, tx in fetched:
+            if tx is not None:
+                out.write_tx(sig, tx, t=0.0)
+        return out.count
+
+
+def _pubkey(rng: random.Random) -> str:
+    from solders.pubkey import Pubkey
+
+    return str(Pubkey(rng.getrandbits(256).to_bytes(32, "little")))
+
+
+def synth_tx(rng: random.Random, ts: int, pool: Dict[str, str], user: str) -> Dict[str, Any]:
+    """A PumpSwap Buy/Sell tx in jsonParsed shape with a matching swap event log.
+
+    Only the user's and the fee recipient's token balances are listed: with
+    the pool vaults too, the all-owner balance diff in `parse` nets to ~0.
+    """
+    import base64
+    import struct
+
+    from parse import _anchor_ix_discriminator, _b58encode
+    from pumpswap_events import SwapEvent, encode_swap_event
+
+    side = rng.choice(("buy", "sell"))
+    base_raw = rng.randint(10**6, 10**12)
+    quote_raw = rng.randint(10**6, 10**11)
+    fee_raw = quote_raw // 400
+    sign = 1 if side == "buy" else -1
+    user_base, user_quote = _pubkey(rng), _pubkey(rng)
+    keys = [user, user_base, user_quote, pool["address"], pool["base_vault"], pool["quote_vault"], pool["fee_account"], PUMPSWAP_PROGRAM_ID]
+    balances = [
+        # (account index, owner, mint, decimals, pre raw, post raw)
+        (1, user, pool["base_mint"], 6, 10**13, 10**13 + sign * base_raw),
+        (2, user, pool["quote_mint"], 9, 10**12, 10**12 - sign * quote_raw),
+        (6, pool["fee_recipient"], pool["quote_mint"], 9, 10**9, 10**9 + fee_raw),
+    ]
+
+    def rows(which):
+        out = []
+        for idx, owner, mint, dec, pre, post in balances:
+            raw = pre if which == "pre" else post
+            out.append({
+                "accountIndex": idx,
+                "mint": mint,
+                "owner": owner,
+                "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                "uiTokenAmount": {"amount": str(raw), "decimals": dec, "uiAmount": raw / 10**dec, "uiAmountString": str(raw / 10**dec)},
+            })
+        return out
+
+    event = SwapEvent(
+        side=side, timestamp=ts, base_amount=base_raw, quote_amount=quote_raw,
+        pool_base_reserves=10**15, pool_quote_reserves=10**14, lp_fee=0, protocol_fee=fee_raw,
+        pool=pool["address"], user=user, user_base_token_account=user_base, user_quote_token_account=user_quote,
+    )
+    instruction = "Buy" if side == "buy" else "Sell"
+    # buy(base_amount_out, max_quote_amount_in) / sell(base_amount_in, min_quote_amount_out)
+    ix_data = _b58encode(_anchor_ix_discriminator(side) + struct.pack("<QQ", base_raw, quote_raw))
+    logs = [
+        f"Program {PUMPSWAP_PROGRAM_ID} invoke [1]",
+        f"Program log: Instruction: {instruction}",
+        "Program TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA invoke [2]",
+        "Program log: Instruction: TransferChecked",
+        "Program TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA success",
+        "Program data: " + base64.b64encode(encode_swap_event(event)).decode(),
+        f"Program {PUMPSWAP_PROGRAM_ID} consumed 60000 of 200000 compute units",
+        f"Program {PUMPSWAP_PROGRAM_ID} success",
+    ]
+    return {
+        "slot": 300_000_000 + ts,
+        "blockTime": ts,
+        "transaction": {
+            "signatures": [],
+            "message": {
+                "accountKeys": [{"pubkey": k, "signer": i == 0, "writable": i < 6, "source": "transaction"} for i, k in enumerate(keys)],
+                "instructions": [{"programId": PUMPSWAP_PROGRAM_ID, "accounts": keys[:6], "data": ix_data, "stackHeight": None}],
+            },
+        },
+        "meta": {
+            "err": None,
+            "fee": 5000,
+            "preTokenBalances": rows("pre"),
+            "postTokenBalances": rows("post"),
+            "innerInstructions": [],
+            "logMessages": logs,
+        },
+    }
+
+
+def synthesize(path: str, n: int = 10_000, mints: int = 20, rate: float = 50.0, seed: int = 0, start_ts: int = 1_700_000_000) -> int:
+    """Write `n` synthetic swaps (as notification + tx pairs) arriving at `rate`/s."""
+    from solders.signature import Signature
+
+    rng = random.Random(seed)
+    quote = "So11111111111111111111111111111111111111112"
+    pools = [
+        {"address": _pubkey(rng), "base_mint": _pubkey(rng), "quote_mint": quote, "base_vault": _pubkey(rng), "quote_vault": _pubkey(rng),
+         "fee_recipient": _pubkey(rng), "fee_account": _pubkey(rng)}
+        for _ in range(mints)
+    ]
+    users = [_pubkey(rng) for _ in range(max(1, n // 10))]
+    with CorpusWriter(path) as out:
+        t = 0.0
+        for _ in range(n):
+            t += rng.expovariate(rate)
+            sig = str(Signature(rng.getrandbits(512).to_bytes(64, "little")))
+            tx = synth_tx(rng, start_ts + int(t), rng.choice(pools), rng.choice(users))
+            tx["transaction"]["signatures"] = [sig]
+            out.write_notification({"signature": sig, "err": None, "logs": tx["meta"]["logMessages"]}, t=t)
+            out.write_tx(sig, tx, t=t)
+        return n
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+@dataclass
+class ReplayReport:
+    """Replay results. Latencies are seconds per call of each stage."""
+
+    txs: int = 0
+    notifications: int = 0
+    skipped: int = 0
+    trades: int = 0
+    saved: int = 0
+    elapsed: float = 0.0
+    peak_traced_bytes: Optional[int] = None
+    max_rss_bytes: Optional[int] = None
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: {s: [] for s in STAGES})
+
+    @property
+    def tx_per_sec(self) -> float:
+        return self.txs / self.elapsed if self.elapsed else 0.0
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for stage, vals in self.latencies.items():
+            if not vals:
+                continue
+            s = sorted(vals)
+            out[stage] = {"count": len(s), "p50": _percentile(s, 0.50), "p99": _percentile(s, 0.99), "total": sum(s)}
+        return out
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.txs} txs ({self.notifications} notifications, {self.skipped} skipped) -> "
+            f"{self.trades} trades, {self.saved} saved in {self.elapsed:.2f}s: {self.tx_per_sec:.0f} tx/sec"
+        ]
+        for stage, s in self.stage_summary().items():
+            lines.append(f"  {stage:<9s} n={s['count']:<8d} p50 {s['p50'] * 1e6:9.1f} us   p99 {s['p99'] * 1e6:9.1f} us")
+        if self.peak_traced_bytes is not None:
+            lines.append(f"  peak traced memory {self.peak_traced_bytes / 2**20:.1f} MiB")
+        if self.max_rss_bytes is not None:
+            lines.append("  max RSS %.1f MiB" % (self.max_rss_bytes / 2**20))
+        return "\n".join(lines)
+
+
+def _max_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def replay(
+    path: str,
+    db=None,
+    indexer=None,
+    pace: str = "max",
+    speed: float = 1.0,
+    batch_size: int = 1,
+    trace_memory: bool = False,
+) -> ReplayReport:
+    """Replay a corpus through prefilter -> parse -> store -> index.
+
+    Notifications are prefiltered and then processed with the recorded tx of
+    the same signature; tx records no notification refers to are processed
+    directly. `pace="realtime"` sleeps to follow the recorded `t` offsets
+    divided by `speed`; `pace="max"` runs as fast as possible.
+    """
+    if pace not in ("max", "realtime"):
+        raise ValueError("pace must be 'max' or 'realtime'")
+    db = db if db is not None else init_db(":memory:")
+    indexer = indexer if indexer is not None else InMemoryIndexer()
+    records = list(read_corpus(path))
+    txs = {r["signature"]: r for r in records if r["kind"] == "tx"}
+    notified = {r["value"]["signature"] for r in records if r["kind"] == "notification"}
+    events = [r for r in records if r["kind"] == "notification" or r["signature"] not in notified]
+    events.sort(key=lambda r: r.get("t", 0.0))
+
+    report = ReplayReport()
+    lat = report.latencies
+    pending = []
+    perf = time.perf_counter
+
+    def flush():
+        t0 = perf()
+        inserted, _ = save_trades(db, pending)
+        lat["store"].append(perf() - t0)
+        report.saved += inserted
+        pending.clear()
+
+    if trace_memory:
+        tracemalloc.start()
+    start = perf()
+    for rec in events:
+        if pace == "realtime":
+            delay = rec.get("t", 0.0) / speed - (perf() - start)
+            if delay > 0:
+                time.sleep(delay)
+        if rec["kind"] == "notification":
+            report.notifications += 1
+            value = rec["value"]
+            t0 = perf()
+            keep = value.get("err") is None and logs_show_pumpswap_swap(value.get("logs"))
+            lat["prefilter"].append(perf() - t0)
+            if not keep or value["signature"] not in txs:
+                report.skipped += 1
+                continue
+            rec = txs[value["signature"]]
+        report.txs += 1
+        t0 = perf()
+        if rec.get("mint"):
+            trade = extract_trade_from_tx(rec["tx"], rec["mint"], rec["signature"])
+            trades = [trade] if trade else []
+        else:
+            trades = extract_trades_from_tx(rec["tx"], rec["signature"])
+        lat["parse"].append(perf() - t0)
+        report.trades += len(trades)
+        for trade in trades:
+            if batch_size > 1:
+                pending.append(trade)
+                if len(pending) >= batch_size:
+                    flush()
+            else:
+                t0 = perf()
+                report.saved += save_trade(db, trade)
+                lat["store"].append(perf() - t0)
+            t0 = perf()
+            indexer.add_trade(trade)
+            lat["index"].append(perf() - t0)
+    if pending:
+        flush()
+    report.elapsed = perf() - start
+    if trace_memory:
+        report.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    report.max_rss_bytes = _max_rss()
+    return report
+
+
+def main():
+    from logging_config import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Record, synthesize and replay transaction corpora.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("synth", help="Write a synthetic corpus")
+    p.add_argument("path")
+    p.add_argument("--n", type=int, default=10_000, help="Number of swaps")
+    p.add_argument("--mints", type=int, default=20)
+    p.add_argument("--rate", type=float, default=50.0, help="Arrival rate (tx/sec) used for the `t` offsets")
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("record", help="Record a mint's transactions over RPC")
+    p.add_argument("path")
+    p.add_argument("--mint", required=True)
+    p.add_argument("--rpc", default="https://api.mainnet-beta.solana.com")
+    p.add_argument("--limit", type=int, default=1000)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--rps", type=float, default=None)
+
+    p = sub.add_parser("record-ws", help="Record live logsNotifications and their transactions")
+    p.add_argument("path")
+    p.add_argument("--ws", default="wss://api.mainnet-beta.solana.com/")
+    p.add_argument("--rpc", default="https://api.mainnet-beta.solana.com")
+    p.add_argument("--program", default=PUMPSWAP_PROGRAM_ID)
+    p.add_argument("--seconds", type=float, default=60.0)
+
+    p = sub.add_parser("run", help="Replay a corpus and report throughput and latency")
+    p.add_argument("path")
+    p.add_argument("--db", default=":memory:", help="SQLite path to write trades to")
+    p.add_argument("--pace", choices=("max", "realtime"), default="max")
+    p.add_argument("--speed", type=float, default=1.0, help="Real-time pace multiplier")
+    p.add_argument("--batch-size", type=int, default=1, help="Trades per save_trades call (1 uses save_trade)")
+    p.add_argument("--trace-memory", action="store_true", help="Report tracemalloc peak (slows the replay)")
+
+    args = parser.parse_args()
+    if args.cmd == "synth":
+        n = synthesize(args.path, n=args.n, mints=args.mints, rate=args.rate, seed=args.seed)
+        logger.info("Wrote %d synthetic swaps to %s", n, args.path)
+    elif args.cmd == "record":
+        n = record(args.rpc, args.mint, args.path, limit=args.limit, workers=args.workers, rps=args.rps)
+        logger.info("Recorded %d transactions to %s", n, args.path)
+    elif args.cmd == "record-ws":
+        n = asyncio.run(record_ws(args.path, args.ws, args.rpc, program_id=args.program, seconds=args.seconds))
+        logger.info("Recorded %d records to %s", n, args.path)
+    else:
+        report = replay(
+            args.path,
+            db=init_db(args.db),
+            pace=args.pace,
+            speed=args.speed,
+            batch_size=args.batch_size,
+            trace_memory=args.trace_memory,
+        )
+        print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 # rpc.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from solana.rpc.api import Client
+from solana.rpc.commitment import Confirmed
 from solders.pubkey import Pubkey
 from solders.signature import Signature
+from solders.commitment_config import CommitmentLevel
+from solders.rpc.config import RpcTransactionConfig
+from solders.rpc.requests import GetTransaction
+from solders.transaction_status import UiTransactionEncoding
 from solana.exceptions import SolanaRpcException
+import heapq
+import httpx
 import json
+import threading
 import time
 import logging
 
@@ -13,6 +23,21 @@ from config import PYTH_PRICE_ACCOUNTS
 import pyth_parser
 from base64 import b64decode
 
+try:
+    import orjson  # optional: faster decoding of raw RPC responses
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np  # optional: vectorized Pyth heuristic scan
+except ImportError:
+    np = None
+
+try:
+    from pythclient.pythaccounts import PriceAccount  # type: ignore  # optional: official Pyth decoder
+except Exception:
+    PriceAccount = None
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_RPC = "https://api.mainnet-beta.solana.com"
@@ -28,13 +53,18 @@ def get_signatures(
     address: str,
     limit: int = 50,
     before: Optional[str] = None,
+    until: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Fetch recent signatures involving a given address (token mint for our MVP).
+
+    `before` / `until` are signature cursors: results start just below
+    `before` and stop before reaching `until` (newest first).
     """
     resp = client.get_signatures_for_address(
         Pubkey.from_string(address),
-        before=before,
+        before=Signature.from_string(before) if before else None,
+        until=Signature.from_string(until) if until else None,
         limit=limit,
     )
 
@@ -53,6 +83,104 @@ def get_signatures(
     logger.debug("rpc.get_signatures count=%d", len(sig_infos))
     return sig_infos
 
+
+def iter_signature_pages(
+    client: Client,
+    address: str,
+    before: Optional[str] = None,
+    until: Optional[str] = None,
+    page_size: int = 1000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Walk `getSignaturesForAddress` pages from `before` down to `until`.
+
+    Each page is newest first; the next page starts below the last signature
+    of the previous one. Stops after the first short page.
+    """
+    cursor = before
+    while True:
+        page = get_signatures(client, address, limit=page_size, before=cursor, until=until)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor = page[-1]["signature"]
+
+
+def backoff_delay(attempt: int, base: float = 0.5) -> float:
+    """Exponential backoff before retry `attempt` (1-based): base, 2*base, 4*base..."""
+    return base * (2 ** (attempt - 1))
+
+
+class RpcError(Exception):
+    """A JSON-RPC error object returned for a request."""
+
+
+# Errors worth retrying that come from the RPC or the HTTP layer
+RPC_ERRORS = (SolanaRpcException, RpcError, httpx.HTTPError)
+
+# `confirmed` matches the commitment of live notifications; at the default
+# (finalized) a fresh signature stays null for ~13s after it was seen.
+_TX_CONFIG = RpcTransactionConfig(
+    encoding=UiTransactionEncoding.JsonParsed,
+    max_supported_transaction_version=0,
+    commitment=CommitmentLevel.Confirmed,
+)
+
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def tx_request(signature: str, req_id: int = 0) -> GetTransaction:
+    """A jsonParsed `getTransaction` request at `confirmed`, for raw providers."""
+    return GetTransaction(Signature.from_string(signature), _TX_CONFIG, req_id)
+
+
+def decode_tx_response(raw) -> Optional[Dict[str, Any]]:
+    """Decode a raw `getTransaction` response straight to a dict."""
+    resp = _loads(raw)
+    if resp.get("error") is not None:
+        raise RpcError(resp["error"])
+    return resp.get("result")
+
+
+def tx_to_dict(tx_obj: Any, signature: str) -> Optional[Dict[str, Any]]:
+    """Convert a typed `getTransaction` result to a plain dict (None if it can't)."""
+    # Many RPC response objects expose a `to_json()` helper; fall back safely.
+    try:
+        tx_json_str = tx_obj.to_json()
+        return _loads(tx_json_str)
+    except Exception:
+        # If it's already a plain dict-like structure, try to use it directly
+        try:
+            return dict(tx_obj)
+        except Exception:
+            # As a last resort, return None to avoid blowing up tests
+            logger.warning("Could not serialize transaction object for %s", signature)
+            return None
+
+
+def _fetch_tx_once(client: Client, signature: str) -> Optional[Dict[str, Any]]:
+    """Single `getTransaction` attempt. RPC errors propagate to the caller.
+
+    With an HTTP provider the raw response is decoded straight to a dict
+    (orjson when installed); other clients go through the typed response.
+    """
+    provider = getattr(client, "_provider", None)
+    if provider is not None and hasattr(provider, "make_request_unparsed"):
+        return decode_tx_response(provider.make_request_unparsed(tx_request(signature)))
+    resp = client.get_transaction(
+        Signature.from_string(signature),
+        encoding="jsonParsed",
+        commitment=Confirmed,
+        max_supported_transaction_version=0,
+    )
+    tx_obj = resp.value
+    if tx_obj is None:
+        return None
+    return tx_to_dict(tx_obj, signature)
+
+
 def get_tx(
     client: Client,
     signature: str,
@@ -61,45 +189,24 @@ def get_tx(
     Fetch a parsed transaction and return it as a plain dict.
     On RPC errors (e.g. 429 Too Many Requests), retry a bit, then give up and return None.
     """
-    sig = Signature.from_string(signature)
+    # Validate up front so a malformed signature fails fast instead of retrying
+    Signature.from_string(signature)
 
     # Retry with exponential backoff to handle transient RPC issues (rate limits, timeouts)
     max_retries = 6
     for attempt in range(1, max_retries + 1):
         try:
-            resp = client.get_transaction(
-                sig,
-                encoding="jsonParsed",
-                max_supported_transaction_version=0,
-            )
-            tx_obj = resp.value
-            if tx_obj is None:
-                return None
-
-            # Many RPC response objects expose a `to_json()` helper; fall back safely.
-            try:
-                tx_json_str = tx_obj.to_json()
-                tx_dict = json.loads(tx_json_str)
-            except Exception:
-                # If it's already a plain dict-like structure, try to use it directly
-                try:
-                    tx_dict = dict(tx_obj)
-                except Exception:
-                    # As a last resort, return None to avoid blowing up tests
-                    logger.warning("Could not serialize transaction object for %s", signature)
-                    return None
-
-            return tx_dict
+            return _fetch_tx_once(client, signature)
 
-        except SolanaRpcException as e:
+        except RPC_ERRORS as e:
             # RPC-specific issues: log and retry with backoff
-            backoff = 0.5 * (2 ** (attempt - 1))
+            backoff = backoff_delay(attempt)
             logger.warning("RPC error in get_tx(%s), attempt %d/%d: %r; backing off %ss", signature, attempt, max_retries, e, backoff)
             time.sleep(backoff)
 
         except Exception as e:
             # Non-RPC errors: log and retry once or give up depending on attempt
-            backoff = 0.5 * (2 ** (attempt - 1))
+            backoff = backoff_delay(attempt)
             logger.error("Unexpected error in get_tx(%s), attempt %d/%d: %r; backing off %ss", signature, attempt, max_retries, e, backoff)
             time.sleep(backoff)
 
@@ -107,6 +214,284 @@ def get_tx(
     return None
 
 
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetch workers.
+
+    `rate` tokens are added per second, up to `capacity`. `acquire()` blocks
+    the calling thread until a token is available. A falsy `rate` disables
+    limiting entirely.
+    """
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class FetchStats:
+    """Counters reported by `fetch_txs`."""
+
+    fetched: int = 0   # transactions returned by the RPC
+    missing: int = 0   # RPC answered but had no transaction for the signature
+    failed: int = 0    # gave up after `max_retries` attempts, or at once on a non-RPC error
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def tx_per_sec(self) -> float:
+        return self.fetched / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _send_batch(client: Client, bodies: List[Any]) -> List[Dict[str, Any]]:
+    """POST a JSON-RPC batch through the client's HTTP provider and decode it."""
+    raw = client._provider.make_batch_request_unparsed(tuple(bodies))
+    out = _loads(raw)
+    if not isinstance(out, list):
+        # Some nodes answer a rejected batch with a single error object
+        raise RpcError(f"batch request failed: {out!r}")
+    return out
+
+
+def _fetch_txs_batch_once(
+    client: Client,
+    signatures: List[str],
+) -> Tuple[Dict[str, Optional[Dict[str, Any]]], List[str]]:
+    """One JSON-RPC batch of `getTransaction` calls.
+
+    Returns `(results, failed)` where `failed` lists signatures whose entry in
+    the batch came back as an error. A failure of the whole POST propagates.
+    """
+    bodies = [tx_request(s, i) for i, s in enumerate(signatures)]
+    by_id = {}
+    for item in _send_batch(client, bodies):
+        if isinstance(item, dict) and isinstance(item.get("id"), int):
+            by_id[item["id"]] = item
+
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    failed: List[str] = []
+    for i, s in enumerate(signatures):
+        item = by_id.get(i)
+        if item is None or item.get("error") is not None:
+            failed.append(s)
+        else:
+            results[s] = item.get("result")
+    return results, failed
+
+
+def fetch_txs(
+    client: Client,
+    signatures: List[str],
+    workers: int = 8,
+    rate: Optional[float] = None,
+    burst: Optional[float] = None,
+    max_retries: int = 6,
+    backoff_base: float = 0.5,
+    batch_size: int = 1,
+    stats: Optional[FetchStats] = None,
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """Fetch many transactions concurrently, yielding `(signature, tx)` in input order.
+
+    Up to `workers` requests run at once on a thread pool, and every request
+    first takes a token from a bucket shared by all workers (`rate`
+    requests/sec, `burst` capacity). With `batch_size > 1` each request is a
+    JSON-RPC batch of that many `getTransaction` calls. A failed attempt does
+    not sleep in its worker: the failed signatures are rescheduled after an
+    exponential backoff while other requests keep going. Only RPC and HTTP
+    errors are retried: a malformed signature or any other error fails at
+    once. `tx` is None when the RPC has no transaction or the fetch failed.
+    Pass a `FetchStats` to read counters and tx/sec.
+    """
+    sigs = list(signatures)
+    n = len(sigs)
+    workers = max(1, int(workers))
+    batch_size = max(1, int(batch_size))
+    stats = stats if stats is not None else FetchStats()
+    # `elapsed` accumulates when one FetchStats is shared across calls
+    base_elapsed = stats.elapsed
+    bucket = TokenBucket(rate, burst)
+    # Bound how far ahead of the next in-order result we fetch so a single
+    # slow signature cannot make `results` grow without limit.
+    window = workers * batch_size * 4
+
+    results: Dict[int, Optional[Dict[str, Any]]] = {}
+    retry_heap: List[Tuple[float, int, List[int], int]] = []  # (due, seq, indexes, attempt)
+    inflight: Dict[Future, Tuple[List[int], int]] = {}
+    next_new = 0
+    next_emit = 0
+    seq = 0
+    start = time.monotonic()
+    # A malformed signature can never succeed: answer None up front rather
+    # than retrying it (and, in a batch, failing its neighbours with it)
+    invalid = set()
+    for i, s in enumerate(sigs):
+        try:
+            Signature.from_string(s)
+        except Exception as e:
+            logger.error("Invalid signature in fetch_txs(%r): %r; not fetching", s, e)
+            invalid.add(i)
+            results[i] = None
+    stats.failed += len(invalid)
+
+    def task(unit: List[int]) -> Tuple[Dict[int, Optional[Dict[str, Any]]], List[int], Optional[Exception]]:
+        bucket.acquire()
+        if batch_size == 1:
+            try:
+                return {unit[0]: _fetch_tx_once(client, sigs[unit[0]])}, [], None
+            except Exception as e:
+                return {}, unit, e
+        try:
+            got, failed = _fetch_txs_batch_once(client, [sigs[i] for i in unit])
+        except Exception as e:
+            return {}, unit, e
+        failed_set = set(failed)
+        ok = {i: got.get(sigs[i]) for i in unit if sigs[i] not in failed_set}
+        return ok, [i for i in unit if sigs[i] in failed_set], None
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while next_emit in results:
+                tx = results.pop(next_emit)
+                stats.elapsed = base_elapsed + time.monotonic() - start
+                yield sigs[next_emit], tx
+                next_emit += 1
+            if next_emit >= n:
+                break
+
+            # Retries that are due go first, then new signatures.
+            now = time.monotonic()
+            while retry_heap and retry_heap[0][0] <= now and len(inflight) < workers:
+                _, _, unit, attempt = heapq.heappop(retry_heap)
+                inflight[pool.submit(task, unit)] = (unit, attempt)
+            while next_new < n and next_new < next_emit + window and len(inflight) < workers:
+                end = min(n, next_new + batch_size)
+                unit = [i for i in range(next_new, end) if i not in invalid]
+                next_new = end
+                if unit:
+                    inflight[pool.submit(task, unit)] = (unit, 1)
+
+            timeout = max(0.0, retry_heap[0][0] - now) if retry_heap else None
+            if not inflight:
+                time.sleep(timeout or 0.0)
+                continue
+            done, _ = wait(list(inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                unit, attempt = inflight.pop(fut)
+                ok, failed, err = fut.result()
+                for i, tx in ok.items():
+                    if tx is None:
+                        stats.missing += 1
+                    else:
+                        stats.fetched += 1
+                    results[i] = tx
+                if not failed:
+                    continue
+                label = sigs[failed[0]] if len(failed) == 1 else f"{len(failed)} signatures"
+                if err is not None and not isinstance(err, RPC_ERRORS):
+                    # not a transient RPC condition: retrying would fail the same way
+                    logger.error("Unexpected error in fetch_txs(%s): %r; not retrying", label, err)
+                    stats.failed += len(failed)
+                    for i in failed:
+                        results[i] = None
+                elif attempt < max_retries:
+                    backoff = backoff_delay(attempt, backoff_base)
+                    logger.warning("RPC error in fetch_txs(%s), attempt %d/%d: %r; retrying in %ss", label, attempt, max_retries, err, backoff)
+                    stats.retries += len(failed)
+                    seq += 1
+                    heapq.heappush(retry_heap, (time.monotonic() + backoff, seq, failed, attempt + 1))
+                else:
+                    logger.info("Giving up on fetch_txs(%s) after %d attempts.", label, max_retries)
+                    stats.failed += len(failed)
+                    for i in failed:
+                        results[i] = None
+    finally:
+        stats.elapsed = base_elapsed + time.monotonic() - start
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _account_data_bytes(val: Any) -> Optional[bytes]:
+    """Return raw account data from an RPC account value.
+
+    solders `Account` objects carry decoded bytes; JSON-shaped responses carry
+    `[base64, encoding]` (or a bare base64 string).
+    """
+    if not val:
+        return None
+    try:
+        data = val.data
+    except Exception:
+        return None
+    if isinstance(data, (list, tuple)):
+        data = data[0] if len(data) >= 1 else None
+    if not data:
+        return None
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return b64decode(data)
+
+
+def get_multiple_accounts(
+    client: Client,
+    pubkeys: List[str],
+    chunk_size: int = 100,
+    max_retries: int = 3,
+    backoff_base: float = 0.5,
+) -> Dict[str, Optional[bytes]]:
+    """Read many accounts with `getMultipleAccounts`, `chunk_size` per request.
+
+    Returns a mapping pubkey -> raw account data (None for missing accounts,
+    malformed pubkeys, or chunks that still failed after `max_retries`
+    attempts). A failing chunk is retried on its own without refetching the
+    others.
+    """
+    out: Dict[str, Optional[bytes]] = dict.fromkeys(pubkeys)
+    # Validate once up front: a malformed key is not worth a retry, and must
+    # not take the rest of its chunk down with it
+    pks: Dict[str, Pubkey] = {}
+    for k in out:
+        try:
+            pks[k] = Pubkey.from_string(k)
+        except Exception as e:
+            logger.warning("Skipping invalid account pubkey %r: %r", k, e)
+    keys = list(pks)
+    for off in range(0, len(keys), chunk_size):
+        chunk = keys[off:off + chunk_size]
+        for attempt in range(1, max_retries + 1):
+            try:
+                resp = client.get_multiple_accounts([pks[k] for k in chunk])
+                values = list(resp.value or [])
+                for i, k in enumerate(chunk):
+                    out[k] = _account_data_bytes(values[i]) if i < len(values) else None
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    logger.info("Giving up on getMultipleAccounts for %d accounts after %d attempts: %r", len(chunk), max_retries, e)
+                    break
+                backoff = backoff_delay(attempt, backoff_base)
+                logger.warning("RPC error in get_multiple_accounts, attempt %d/%d: %r; backing off %ss", attempt, max_retries, e, backoff)
+                time.sleep(backoff)
+    logger.debug("rpc.get_multiple_accounts count=%d", len(out))
+    return out
+
+
 def get_mint_supply(client: Client, mint_address: str) -> Dict[str, Any]:
     mint_pk = Pubkey.from_string(mint_address)
 
@@ -134,107 +519,181 @@ def get_mint_supply(client: Client, mint_address: str) -> Dict[str, Any]:
     }
 
 
-def get_price_from_pyth(client: Client, price_account: str) -> Optional[float]:
-    """Attempt to fetch a price from a Pyth price account.
+def decode_pyth_price(raw_b: bytes) -> Optional[float]:
+    """Decode a price from raw Pyth price account bytes.
 
-    This is best-effort: it will try to import an external Pyth helper library
-    (if available) and decode the account. If not available or decoding
-    fails it returns None.
+    Tries `pythclient` when installed, then the local `pyth_parser`, then a
+    byte-scanning heuristic for accounts with no known layout. Returns None
+    if nothing plausible is found or the feed is not trading.
     """
-    try:
-        # Try to import pythclient if installed
-        from pythclient.pythaccounts import PriceAccount  # type: ignore
-    except Exception:
-        # Fall back to a lightweight pure-Python binary parser below
-        PriceAccount = None
+    # If pythclient is available prefer it (more correct)
+    if PriceAccount is not None:
+        try:
+            pa = PriceAccount.from_bytes(raw_b)
+            price = pa.get_current_price()
+            return float(price) if price is not None else None
+        except Exception:
+            # Fall through to fallback parser
+            logger.debug("pythclient parse failed, falling back to local parser")
 
+    # Try our pure-Python parser
     try:
-        resp = client.get_account_info(Pubkey.from_string(price_account))
-        val = resp.value
-        if not val:
-            return None
-        data_field = None
-        if hasattr(val, "data"):
+        parsed = pyth_parser.parse_price(raw_b)
+        if parsed is not None:
             try:
-                if isinstance(val.data, (list, tuple)) and len(val.data) >= 1:
-                    data_field = val.data[0]
-                else:
-                    data_field = val.data
+                price_val = float(parsed[0]) * (10 ** parsed[1])
+                if price_val > 0 and price_val < 1e12:
+                    return price_val
             except Exception:
-                data_field = None
-
-        if not data_field:
+                pass
+        elif pyth_parser.has_layout(raw_b):
+            # a known account that is not trading: don't guess with the scan
             return None
+    except Exception:
+        logger.debug("Local pyth_parser parse failed")
 
-        raw_b = b64decode(data_field)
+    try:
+        return _scan_pyth_price(raw_b)
+    except Exception:
+        logger.debug("Heuristic Pyth parse failed")
 
-        # If pythclient is available prefer it (more correct)
-        if PriceAccount is not None:
-            try:
-                pa = PriceAccount.from_bytes(raw_b)
-                price = pa.get_current_price()
-                return float(price) if price is not None else None
-            except Exception:
-                # Fall through to fallback parser
-                logger.debug("pythclient parse failed, falling back to local parser")
+    return None
 
-        # Try our pure-Python parser
-        try:
-            parsed = pyth_parser.parse_price_account(raw_b)
-            if parsed and parsed.get('price') is not None and parsed.get('expo') is not None:
-                try:
-                    price_val = float(parsed['price']) * (10 ** int(parsed['expo']))
-                    if price_val > 0 and price_val < 1e12:
-                        return price_val
-                except Exception:
-                    pass
-        except Exception:
-            logger.debug("Local pyth_parser parse failed")
 
-        # Heuristic parser: search for plausible (price_int64, expo_int32) pairs
-        # and compute price = price_int64 * 10**expo. This is best-effort.
-        try:
-            from struct import unpack_from
-
-            L = len(raw_b)
-            # Look for candidate exponent (int32) values in reasonable range
-            for pos in range(0, max(0, L - 4), 1):
-                try:
-                    expo = unpack_from('<i', raw_b, pos)[0]
-                except Exception:
-                    continue
-                if expo < -20 or expo > 10:
-                    continue
-                # Search nearby for a signed int64 value representing price
-                start = max(0, pos - 64)
-                end = min(L - 8, pos + 64)
-                for j in range(start, end + 1):
-                    try:
-                        val = unpack_from('<q', raw_b, j)[0]
-                    except Exception:
-                        continue
-                    # Filter implausible integers
-                    if val == 0:
-                        continue
-                    if abs(val) > 10 ** 18:
-                        continue
-                    # Compute float price
-                    price = float(val) * (10 ** expo)
-                    # Accept plausible positive non-inf prices
-                    if price > 0 and price < 1e12:
-                        return price
-        except Exception:
-            logger.debug("Heuristic Pyth parse failed")
+# Heuristic Pyth scan: the first offset (in order) holding a plausible int32
+# exponent, paired with the first int64 within this many bytes of it that
+# gives a plausible price.
+_SCAN_EXPO_MIN, _SCAN_EXPO_MAX = -20, 10
+_SCAN_RADIUS = 64
+
+
+def _plausible_price(val: int, expo: int) -> Optional[float]:
+    if val == 0 or abs(val) > 10 ** 18:
+        return None
+    price = float(val) * (10 ** expo)
+    return price if 0 < price < 1e12 else None
+
+
+def _scan_pyth_price_py(raw_b: bytes) -> Optional[float]:
+    """Reference heuristic scan: one unpack per (exponent, price) offset pair."""
+    from struct import unpack_from
+
+    L = len(raw_b)
+    for pos in range(0, max(0, L - 4)):
+        expo = unpack_from('<i', raw_b, pos)[0]
+        if expo < _SCAN_EXPO_MIN or expo > _SCAN_EXPO_MAX:
+            continue
+        for j in range(max(0, pos - _SCAN_RADIUS), min(L - 8, pos + _SCAN_RADIUS) + 1):
+            price = _plausible_price(unpack_from('<q', raw_b, j)[0], expo)
+            if price is not None:
+                return price
+    return None
+
 
+def _scan_pyth_price(raw_b: bytes) -> Optional[float]:
+    """Heuristic scan with NumPy; same result as `_scan_pyth_price_py`.
+
+    Every int32/int64 at every byte offset is read at once through strided
+    views. Per distinct candidate exponent, the offsets with a plausible
+    price are found in one pass, and a binary search gives each candidate
+    exponent's first plausible price inside its window.
+    """
+    if np is None:
+        return _scan_pyth_price_py(raw_b)
+    L = len(raw_b)
+    n_expo, n_val = L - 4, L - 7
+    if n_expo <= 0 or n_val <= 0:
+        return None
+    expos = np.ndarray((n_expo,), dtype="<i4", buffer=raw_b, strides=(1,))
+    vals = np.ndarray((n_val,), dtype="<i8", buffer=raw_b, strides=(1,))
+    cand = np.flatnonzero((expos >= _SCAN_EXPO_MIN) & (expos <= _SCAN_EXPO_MAX))
+    if not cand.size:
+        return None
+    fvals = vals.astype(np.float64)
+    # scales are positive, so only positive values can give a plausible price
+    positive = (vals > 0) & (vals <= 10 ** 18)
+    # The first candidate often has a hit already (e.g. in an account header)
+    pos, expo = int(cand[0]), int(expos[cand[0]])
+    lo, hi = max(0, pos - _SCAN_RADIUS), min(n_val - 1, pos + _SCAN_RADIUS) + 1
+    hits = np.flatnonzero(positive[lo:hi] & (fvals[lo:hi] * (10 ** expo) < 1e12))
+    if hits.size:
+        return _plausible_price(int(vals[lo + hits[0]]), expo)
+    cand_expos = expos[cand]
+    best = None  # (pos, j, expo)
+    # Exponents in order of their first candidate offset: once one has a hit,
+    # exponents first seen after that offset cannot win.
+    uniq, first_idx = np.unique(cand_expos, return_index=True)
+    for expo in uniq[np.argsort(first_idx)].tolist():
+        positions = cand[cand_expos == expo]
+        if best is not None and positions[0] >= best[0]:
+            break
+        good = np.flatnonzero(positive & (fvals * (10 ** expo) < 1e12))
+        if not good.size:
+            continue
+        starts = np.maximum(positions - _SCAN_RADIUS, 0)
+        ends = np.minimum(positions + _SCAN_RADIUS, n_val - 1)
+        k = np.searchsorted(good, starts)
+        hit = k < good.size
+        hit[hit] = good[k[hit]] <= ends[hit]
+        first = np.flatnonzero(hit)
+        if first.size:
+            i = first[0]
+            if best is None or positions[i] < best[0]:
+                best = (int(positions[i]), int(good[k[i]]), expo)
+    if best is None:
         return None
+    return _plausible_price(int(vals[best[1]]), best[2])
+
+
+def get_price_from_pyth(client: Client, price_account: str) -> Optional[float]:
+    """Attempt to fetch a price from a Pyth price account.
+
+    This is best-effort: it will try to import an external Pyth helper library
+    (if available) and decode the account. If not available or decoding
+    fails it returns None.
+    """
+    try:
+        resp = client.get_account_info(Pubkey.from_string(price_account))
+        raw_b = _account_data_bytes(resp.value)
+        if not raw_b:
+            return None
+        return decode_pyth_price(raw_b)
     except Exception as e:
         logger.exception("Error fetching Pyth price: %s", e)
         return None
 
 
+def get_prices_from_pyth(client: Client, price_accounts: List[str]) -> Dict[str, Optional[float]]:
+    """Fetch and decode many Pyth price accounts with `getMultipleAccounts`."""
+    raw_by_acct = get_multiple_accounts(client, price_accounts)
+    out: Dict[str, Optional[float]] = {}
+    for acct, raw_b in raw_by_acct.items():
+        try:
+            out[acct] = decode_pyth_price(raw_b) if raw_b else None
+        except Exception:
+            logger.debug("Pyth decode failed for %s", acct)
+            out[acct] = None
+    return out
+
+
 def get_price_for_mint(client: Client, mint: str) -> Optional[float]:
     """Lookup Pyth mapping from config and fetch price if mapping exists."""
     acct = PYTH_PRICE_ACCOUNTS.get(mint)
     if not acct:
         return None
     return get_price_from_pyth(client, acct)
+
+
+def get_prices_for_mints(
+    client: Client, mints: List[str], accounts: Optional[Dict[str, str]] = None
+) -> Dict[str, Optional[float]]:
+    """Batch variant of `get_price_for_mint`; unmapped mints map to None.
+
+    `accounts` maps mint -> Pyth price account and defaults to
+    `config.PYTH_PRICE_ACCOUNTS`.
+    """
+    if accounts is None:
+        accounts = PYTH_PRICE_ACCOUNTS
+    accts = {m: accounts.get(m) for m in mints}
+    prices = get_prices_from_pyth(client, [a for a in accts.values() if a])
+    return {m: (prices.get(a) if a else None) for m, a in accts.items()}
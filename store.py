@@ -1,13 +1,55 @@
 import sqlite3
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Set, Tuple
 from parse import Trade
-import json
+import hashlib
+import math
+import time
 
 
-def init_db(path: str) -> sqlite3.Connection:
-    """Initialize SQLite DB and return a connection."""
+_SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# PRAGMA user_version of the current schema. Versions:
+#   1: integer token amounts (trades.*_raw / *_decimals, volume_buckets.token_volume_raw)
+#   2: trades.raw is optional and no longer a JSON copy of the typed columns
+SCHEMA_VERSION = 2
+
+_RAW_TRADE_COLUMNS = (
+    ("token_delta_raw", "INTEGER"),
+    ("token_decimals", "INTEGER"),
+    ("quote_delta_raw", "INTEGER"),
+    ("quote_decimals", "INTEGER"),
+)
+_RAW_ROLLUP_COLUMNS = (
+    ("token_volume_raw", "INTEGER NOT NULL DEFAULT 0"),
+    ("raw_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("token_decimals", "INTEGER"),
+)
+
+
+def _add_missing_columns(cur: sqlite3.Cursor, table: str, columns) -> None:
+    have = {r[1] for r in cur.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns:
+        if name not in have:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def init_db(path: str, wal: bool = False, synchronous: Optional[str] = None) -> sqlite3.Connection:
+    """Initialize SQLite DB and return a connection.
+
+    `wal=True` switches the database to write-ahead logging, which lets
+    readers proceed during writes and makes commits much cheaper.
+    `synchronous` sets PRAGMA synchronous (OFF/NORMAL/FULL/EXTRA); NORMAL
+    is the usual pairing with WAL.
+    """
     conn = sqlite3.connect(path)
     cur = conn.cursor()
+    if wal:
+        cur.execute("PRAGMA journal_mode=WAL")
+    if synchronous is not None:
+        level = str(synchronous).upper()
+        if level not in _SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {', '.join(_SYNCHRONOUS_LEVELS)}")
+        cur.execute(f"PRAGMA synchronous={level}")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS trades (
@@ -18,15 +60,518 @@ def init_db(path: str) -> sqlite3.Connection:
             quote_mint TEXT,
             quote_delta REAL,
             price REAL,
-            raw TEXT
+            raw TEXT,
+            token_delta_raw INTEGER,
+            token_decimals INTEGER,
+            quote_delta_raw INTEGER,
+            quote_decimals INTEGER
+        )
+        """
+    )
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        # Raw integer amounts; every database before v1 lacks them
+        _add_missing_columns(cur, "trades", _RAW_TRADE_COLUMNS)
+    if version < 2:
+        # Drop the JSON copies. The freed pages stay in the file until a
+        # manual `VACUUM`, which rewrites the whole database and is not run here
+        cur.execute("UPDATE trades SET raw = NULL WHERE raw IS NOT NULL")
+    # Covering index for volume queries: (mint, ts) range scan that also
+    # carries the summed columns, so aggregation never touches the table.
+    # It replaces the older indexes, which lack the raw amount columns.
+    cur.execute("DROP INDEX IF EXISTS idx_mint_ts")
+    cur.execute("DROP INDEX IF EXISTS idx_trades_mint_ts_cover")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_trades_mint_ts_raw "
+        "ON trades(mint, ts, token_delta, price, quote_mint, token_delta_raw, token_decimals)"
+    )
+    # Per-mint backfill watermarks. Everything between the newest and oldest
+    # signature has been scanned. `head_*` track a scan from the chain tip
+    # down to `newest_sig` that has not finished yet, so it can resume.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backfill_state (
+            mint TEXT PRIMARY KEY,
+            newest_sig TEXT,
+            newest_slot INTEGER,
+            oldest_sig TEXT,
+            oldest_slot INTEGER,
+            head_top_sig TEXT,
+            head_top_slot INTEGER,
+            head_cursor_sig TEXT,
+            scanned INTEGER NOT NULL DEFAULT 0,
+            exhausted INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER
+        )
+        """
+    )
+    # Signatures already fetched for a mint that did not produce a trade
+    # (failed txs, non-swap instructions), so they are never fetched again.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS seen_signatures (
+            signature TEXT NOT NULL,
+            mint TEXT NOT NULL,
+            reason TEXT,
+            ts INTEGER,
+            PRIMARY KEY (signature, mint)
+        )
+        """
+    )
+    # Signatures a backfill could not fetch (no transaction yet, or the fetch
+    # failed); the next run fetches them again before scanning further.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pending_signatures (
+            signature TEXT NOT NULL,
+            mint TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            ts INTEGER,
+            PRIMARY KEY (signature, mint)
         )
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_mint_ts ON trades(mint, ts)")
     conn.commit()
+    _init_rollups(conn, version)
+    if version < SCHEMA_VERSION:
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
     return conn
 
 
+# Rollup resolutions (bucket width in seconds) maintained on insert
+ROLLUP_RESOLUTIONS = (1, 60)
+
+
+def _rollup_upsert(resolution: int) -> str:
+    """Trigger statement folding NEW (a trades row) into one bucket."""
+    return """
+        INSERT INTO volume_buckets(
+            mint, resolution, bucket_ts, token_volume, usd_volume, trade_count,
+            open_ts, open_price, close_ts, close_price, high_price, low_price,
+            token_volume_raw, raw_count, token_decimals
+        )
+        VALUES (
+            NEW.mint, {res}, (NEW.ts / {res}) * {res},
+            COALESCE(ABS(NEW.token_delta), 0),
+            CASE WHEN NEW.price IS NOT NULL AND NEW.quote_mint IN (SELECT mint FROM stablecoin_mints)
+                 THEN COALESCE(ABS(NEW.token_delta) * ABS(NEW.price), 0) ELSE 0 END,
+            1,
+            CASE WHEN NEW.price IS NULL THEN NULL ELSE NEW.ts END, NEW.price,
+            CASE WHEN NEW.price IS NULL THEN NULL ELSE NEW.ts END, NEW.price,
+            NEW.price, NEW.price,
+            COALESCE(ABS(NEW.token_delta_raw), 0), NEW.token_delta_raw IS NOT NULL, NEW.token_decimals
+        )
+        ON CONFLICT(mint, resolution, bucket_ts) DO UPDATE SET
+            token_volume = token_volume + excluded.token_volume,
+            token_volume_raw = token_volume_raw + excluded.token_volume_raw,
+            raw_count = raw_count + excluded.raw_count,
+            token_decimals = COALESCE(token_decimals, excluded.token_decimals),
+            usd_volume = usd_volume + excluded.usd_volume,
+            trade_count = trade_count + 1,
+            open_ts = CASE WHEN excluded.open_ts IS NOT NULL AND (open_ts IS NULL OR excluded.open_ts < open_ts)
+                           THEN excluded.open_ts ELSE open_ts END,
+            open_price = CASE WHEN excluded.open_ts IS NOT NULL AND (open_ts IS NULL OR excluded.open_ts < open_ts)
+                              THEN excluded.open_price ELSE open_price END,
+            close_ts = CASE WHEN excluded.close_ts IS NOT NULL AND (close_ts IS NULL OR excluded.close_ts >= close_ts)
+                            THEN excluded.close_ts ELSE close_ts END,
+            close_price = CASE WHEN excluded.close_ts IS NOT NULL AND (close_ts IS NULL OR excluded.close_ts >= close_ts)
+                               THEN excluded.close_price ELSE close_price END,
+            high_price = MAX(COALESCE(high_price, excluded.high_price), COALESCE(excluded.high_price, high_price)),
+            low_price = MIN(COALESCE(low_price, excluded.low_price), COALESCE(excluded.low_price, low_price));
+    """.format(res=int(resolution))
+
+
+def _init_rollups(conn: sqlite3.Connection, version: int = SCHEMA_VERSION) -> None:
+    """Create the volume rollup tables and the trigger that maintains them.
+
+    `volume_buckets` holds per-mint token/USD volume, trade count and OHLC
+    prices at 1s and 1m resolution. A trigger on `trades` updates both
+    resolutions for every row actually inserted, so duplicates skipped by
+    INSERT OR IGNORE never count. USD volume covers stablecoin-quoted trades
+    only; the stablecoin set is mirrored into `stablecoin_mints` and the
+    rollups are rebuilt whenever it changes. The set they were built for is
+    recorded in `rollup_meta`, so an empty set rebuilds only once.
+    `version` is the database's schema version before `init_db` ran; older
+    rollups get the raw columns, a new trigger and a rebuild.
+
+    `token_volume_raw` sums the integer amounts of the `raw_count` trades
+    that have them; when every trade of a bucket does, it is the exact
+    token volume in raw units (`token_decimals`).
+    """
+    from config import STABLECOIN_MINTS
+
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS volume_buckets (
+            mint TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket_ts INTEGER NOT NULL,
+            token_volume REAL NOT NULL DEFAULT 0,
+            usd_volume REAL NOT NULL DEFAULT 0,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            open_ts INTEGER,
+            open_price REAL,
+            close_ts INTEGER,
+            close_price REAL,
+            high_price REAL,
+            low_price REAL,
+            token_volume_raw INTEGER NOT NULL DEFAULT 0,
+            raw_count INTEGER NOT NULL DEFAULT 0,
+            token_decimals INTEGER,
+            PRIMARY KEY (mint, resolution, bucket_ts)
+        ) WITHOUT ROWID
+        """
+    )
+    # Age-based pruning (`prune_rollups`) cannot use the primary key
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_volume_buckets_res_ts ON volume_buckets(resolution, bucket_ts)")
+    cur.execute("CREATE TABLE IF NOT EXISTS stablecoin_mints (mint TEXT PRIMARY KEY)")
+    cur.execute("CREATE TABLE IF NOT EXISTS rollup_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    migrated = version < 1
+    if migrated:
+        _add_missing_columns(cur, "volume_buckets", _RAW_ROLLUP_COLUMNS)
+        cur.execute("DROP TRIGGER IF EXISTS trades_rollup")
+    upserts = "".join(_rollup_upsert(r) for r in ROLLUP_RESOLUTIONS)
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trades_rollup AFTER INSERT ON trades "
+        f"WHEN NEW.mint IS NOT NULL AND NEW.ts IS NOT NULL BEGIN {upserts} END"
+    )
+    built_for = ",".join(sorted(set(STABLECOIN_MINTS)))
+    row = cur.execute("SELECT value FROM rollup_meta WHERE key = 'stablecoins'").fetchone()
+    if row is None or row[0] != built_for:
+        cur.execute("DELETE FROM stablecoin_mints")
+        cur.executemany("INSERT INTO stablecoin_mints(mint) VALUES (?)", [(m,) for m in set(STABLECOIN_MINTS)])
+        rebuild_rollups(conn)
+        cur.execute("INSERT OR REPLACE INTO rollup_meta(key, value) VALUES ('stablecoins', ?)", (built_for,))
+    elif migrated:
+        rebuild_rollups(conn)
+    conn.commit()
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute `volume_buckets` from the raw `trades` rows."""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM volume_buckets")
+    for res in ROLLUP_RESOLUTIONS:
+        cur.execute(
+            """
+            INSERT INTO volume_buckets(
+                mint, resolution, bucket_ts, token_volume, usd_volume, trade_count, high_price, low_price,
+                token_volume_raw, raw_count, token_decimals
+            )
+            SELECT mint, ?, (ts / ?) * ?,
+                   COALESCE(SUM(ABS(token_delta)), 0),
+                   COALESCE(SUM(CASE WHEN price IS NOT NULL AND quote_mint IN (SELECT mint FROM stablecoin_mints)
+                                     THEN ABS(token_delta) * ABS(price) END), 0),
+                   COUNT(*), MAX(price), MIN(price),
+                   COALESCE(SUM(ABS(token_delta_raw)), 0), COUNT(token_delta_raw), MAX(token_decimals)
+            FROM trades
+            WHERE mint IS NOT NULL AND ts IS NOT NULL
+            GROUP BY mint, ts / ?
+            """,
+            (res, res, res, res),
+        )
+    # Open/close are the first/last priced trade in each bucket
+    cur.execute(
+        """
+        UPDATE volume_buckets SET
+            open_ts = (SELECT t.ts FROM trades t WHERE t.mint = volume_buckets.mint
+                       AND t.ts >= volume_buckets.bucket_ts AND t.ts < volume_buckets.bucket_ts + volume_buckets.resolution
+                       AND t.price IS NOT NULL ORDER BY t.ts ASC, t.rowid ASC LIMIT 1),
+            open_price = (SELECT t.price FROM trades t WHERE t.mint = volume_buckets.mint
+                          AND t.ts >= volume_buckets.bucket_ts AND t.ts < volume_buckets.bucket_ts + volume_buckets.resolution
+                          AND t.price IS NOT NULL ORDER BY t.ts ASC, t.rowid ASC LIMIT 1),
+            close_ts = (SELECT t.ts FROM trades t WHERE t.mint = volume_buckets.mint
+                        AND t.ts >= volume_buckets.bucket_ts AND t.ts < volume_buckets.bucket_ts + volume_buckets.resolution
+                        AND t.price IS NOT NULL ORDER BY t.ts DESC, t.rowid DESC LIMIT 1),
+            close_price = (SELECT t.price FROM trades t WHERE t.mint = volume_buckets.mint
+                           AND t.ts >= volume_buckets.bucket_ts AND t.ts < volume_buckets.bucket_ts + volume_buckets.resolution
+                           AND t.price IS NOT NULL ORDER BY t.ts DESC, t.rowid DESC LIMIT 1)
+        WHERE high_price IS NOT NULL
+        """
+    )
+    conn.commit()
+
+
+def prune_rollups(conn_or_path, now_ts: Optional[int] = None, batch: int = 10_000) -> int:
+    """Delete rollup buckets older than their `ROLLUP_RETENTION`; returns rows removed.
+
+    Rows go in `batch`-sized transactions on the `(resolution, bucket_ts)`
+    index, so a concurrent writer is never locked out for long.
+    """
+    close_conn = False
+    if isinstance(conn_or_path, str):
+        conn = init_db(conn_or_path)
+        close_conn = True
+    else:
+        conn = conn_or_path
+
+    now = int(now_ts or time.time())
+    removed = 0
+    try:
+        for resolution, keep in ROLLUP_RETENTION.items():
+            while True:
+                cur = conn.execute(
+                    "DELETE FROM volume_buckets WHERE (mint, resolution, bucket_ts) IN ("
+                    "SELECT mint, resolution, bucket_ts FROM volume_buckets "
+                    "WHERE resolution = ? AND bucket_ts < ? LIMIT ?)",
+                    (resolution, now - keep, batch),
+                )
+                conn.commit()
+                removed += cur.rowcount
+                if cur.rowcount < batch:
+                    break
+    finally:
+        if close_conn:
+            conn.close()
+    return removed
+
+
+def get_ohlcv(
+    conn_or_path,
+    mint: str,
+    resolution: int = 60,
+    since_ts: Optional[int] = None,
+    until_ts: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Read OHLCV candles for `mint` from the rollups, oldest first.
+
+    `resolution` must be one of `ROLLUP_RESOLUTIONS`. Prices are the stored
+    per-trade prices (quote units per base token); buckets whose trades had
+    no price have None for open/high/low/close.
+    """
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {ROLLUP_RESOLUTIONS}")
+    close_conn = False
+    if isinstance(conn_or_path, str):
+        conn = init_db(conn_or_path)
+        close_conn = True
+    else:
+        conn = conn_or_path
+
+    sql = (
+        "SELECT bucket_ts, open_price, high_price, low_price, close_price, token_volume, usd_volume, trade_count "
+        "FROM volume_buckets WHERE mint = ? AND resolution = ?"
+    )
+    args: List[Any] = [mint, resolution]
+    if since_ts is not None:
+        sql += " AND bucket_ts >= ?"
+        args.append((int(since_ts) // resolution) * resolution)
+    if until_ts is not None:
+        sql += " AND bucket_ts <= ?"
+        args.append(int(until_ts))
+    sql += " ORDER BY bucket_ts ASC"
+
+    keys = ("ts", "open", "high", "low", "close", "token_volume", "usd_volume", "trade_count")
+    rows = [dict(zip(keys, r)) for r in conn.execute(sql, args)]
+    if close_conn:
+        conn.close()
+    return rows
+
+
+_BACKFILL_FIELDS = (
+    "newest_sig",
+    "newest_slot",
+    "oldest_sig",
+    "oldest_slot",
+    "head_top_sig",
+    "head_top_slot",
+    "head_cursor_sig",
+    "scanned",
+    "exhausted",
+)
+
+
+def get_backfill_state(conn: sqlite3.Connection, mint: str) -> Dict[str, Any]:
+    """Return the stored backfill watermarks for `mint` (empty defaults if none)."""
+    row = conn.execute(
+        f"SELECT {', '.join(_BACKFILL_FIELDS)} FROM backfill_state WHERE mint = ?",
+        (mint,),
+    ).fetchone()
+    if row is None:
+        return {f: None for f in _BACKFILL_FIELDS} | {"scanned": 0, "exhausted": 0}
+    return dict(zip(_BACKFILL_FIELDS, row))
+
+
+def save_backfill_state(conn: sqlite3.Connection, mint: str, state: Dict[str, Any]) -> None:
+    """Upsert backfill watermarks for `mint` and commit."""
+    values = [state.get(f) for f in _BACKFILL_FIELDS]
+    values[_BACKFILL_FIELDS.index("scanned")] = int(state.get("scanned") or 0)
+    values[_BACKFILL_FIELDS.index("exhausted")] = int(bool(state.get("exhausted")))
+    cols = ", ".join(_BACKFILL_FIELDS)
+    marks = ", ".join("?" * len(_BACKFILL_FIELDS))
+    updates = ", ".join(f"{f} = excluded.{f}" for f in _BACKFILL_FIELDS)
+    conn.execute(
+        f"INSERT INTO backfill_state(mint, {cols}, updated_at) VALUES (?, {marks}, ?) "
+        f"ON CONFLICT(mint) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+        (mint, *values, int(time.time())),
+    )
+    conn.commit()
+
+
+# SQLite's default host parameter limit is 32766 on recent builds but only
+# 999 on older ones; stay under the lower bound.
+_IN_CHUNK = 900
+
+
+def existing_signatures(conn: sqlite3.Connection, signatures: Iterable[str], mint: Optional[str] = None) -> Set[str]:
+    """Return the subset of `signatures` already stored as trades or marked seen for `mint`."""
+    sigs = list(dict.fromkeys(signatures))
+    found: Set[str] = set()
+    for i in range(0, len(sigs), _IN_CHUNK):
+        chunk = sigs[i:i + _IN_CHUNK]
+        marks = ", ".join("?" * len(chunk))
+        found.update(r[0] for r in conn.execute(f"SELECT signature FROM trades WHERE signature IN ({marks})", chunk))
+        if mint is not None:
+            found.update(
+                r[0]
+                for r in conn.execute(
+                    f"SELECT signature FROM seen_signatures WHERE mint = ? AND signature IN ({marks})",
+                    (mint, *chunk),
+                )
+            )
+    return found
+
+
+def mark_seen(conn: sqlite3.Connection, signatures: Iterable[str], mint: str, reason: str = "not_trade") -> None:
+    """Record signatures that were processed for `mint` without yielding a trade."""
+    now = int(time.time())
+    conn.executemany(
+        "INSERT OR IGNORE INTO seen_signatures(signature, mint, reason, ts) VALUES (?, ?, ?, ?)",
+        [(s, mint, reason, now) for s in signatures],
+    )
+    conn.commit()
+
+
+def add_pending(conn: sqlite3.Connection, signatures: Iterable[str], mint: str) -> None:
+    """Record signatures of `mint` that could not be fetched; counts attempts."""
+    now = int(time.time())
+    conn.executemany(
+        "INSERT INTO pending_signatures(signature, mint, attempts, ts) VALUES (?, ?, 1, ?) "
+        "ON CONFLICT(signature, mint) DO UPDATE SET attempts = attempts + 1, ts = excluded.ts",
+        [(s, mint, now) for s in signatures],
+    )
+    conn.commit()
+
+
+def get_pending(conn: sqlite3.Connection, mint: str) -> List[Tuple[str, int]]:
+    """Return `(signature, attempts)` of the pending signatures of `mint`, oldest first."""
+    return conn.execute(
+        "SELECT signature, attempts FROM pending_signatures WHERE mint = ? ORDER BY ts, rowid", (mint,)
+    ).fetchall()
+
+
+def remove_pending(conn: sqlite3.Connection, signatures: Iterable[str], mint: str) -> None:
+    conn.executemany(
+        "DELETE FROM pending_signatures WHERE signature = ? AND mint = ?", [(s, mint) for s in signatures]
+    )
+    conn.commit()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives).
+
+    Sized for `capacity` items at false-positive rate `fp_rate`; the rate
+    degrades gracefully past capacity.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.nbits = max(64, int(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.nbits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.nbits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        d = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        n = self.nbits
+        return [(h1 + i * h2) % n for i in range(self.k)]
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for p in self._positions(item):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for p in self._positions(item):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+
+class SignatureIndex:
+    """O(1) pre-fetch check for signatures already handled for a mint.
+
+    Covers every signature in `trades` plus the mint's `seen_signatures`.
+    A Bloom filter answers "definitely new" without touching SQLite; only
+    probable hits are confirmed with a bulk query, so false positives never
+    drop a signature. Call `add()` for signatures stored after creation.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, mint: str, fp_rate: float = 0.01):
+        self.conn = conn
+        self.mint = mint
+        self.fp_rate = fp_rate
+        self._load()
+
+    def _load(self) -> None:
+        n = self.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+        n += self.conn.execute("SELECT COUNT(*) FROM seen_signatures WHERE mint = ?", (self.mint,)).fetchone()[0]
+        # Leave room to grow before the false-positive rate degrades
+        self.bloom = BloomFilter(max(2 * n, 100_000), self.fp_rate)
+        for (sig,) in self.conn.execute("SELECT signature FROM trades"):
+            self.bloom.add(sig)
+        for (sig,) in self.conn.execute("SELECT signature FROM seen_signatures WHERE mint = ?", (self.mint,)):
+            self.bloom.add(sig)
+
+    def add(self, signatures: Iterable[str]) -> None:
+        for s in signatures:
+            self.bloom.add(s)
+        if self.bloom.count > self.bloom.capacity:
+            self._load()
+
+    def filter_new(self, signatures: Iterable[str]) -> List[str]:
+        """Return `signatures` (order kept) that are neither stored nor seen."""
+        sigs = list(signatures)
+        maybe = [s for s in sigs if s in self.bloom]
+        known = existing_signatures(self.conn, maybe, self.mint) if maybe else set()
+        return [s for s in sigs if s not in known]
+
+
+_INSERT_TRADE = (
+    "INTO trades(signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw, "
+    "token_delta_raw, token_decimals, quote_delta_raw, quote_decimals) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _int64(v: Optional[int]) -> Optional[int]:
+    # SQLite integers are signed 64-bit; larger raw amounts keep only the float delta
+    return v if v is not None and -(2 ** 63) < v < 2 ** 63 else None
+
+
+def _trade_row(trade: Trade) -> tuple:
+    return (
+        trade.signature,
+        trade.ts,
+        trade.mint,
+        trade.token_delta,
+        trade.quote_mint,
+        trade.quote_delta,
+        trade.price,
+        None,
+        _int64(trade.token_delta_raw),
+        trade.token_decimals,
+        _int64(trade.quote_delta_raw),
+        trade.quote_decimals,
+    )
+
+
 def save_trade(conn_or_path, trade: Trade) -> bool:
     """Save a `Trade` to the DB.
 
@@ -41,19 +586,7 @@ def save_trade(conn_or_path, trade: Trade) -> bool:
 
     cur = conn.cursor()
     try:
-        cur.execute(
-            "INSERT INTO trades(signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                trade.signature,
-                trade.ts,
-                trade.mint,
-                trade.token_delta,
-                trade.quote_mint,
-                trade.quote_delta,
-                trade.price,
-                json.dumps(trade.__dict__),
-            ),
-        )
+        cur.execute("INSERT " + _INSERT_TRADE, _trade_row(trade))
         conn.commit()
         return True
     except sqlite3.IntegrityError:
@@ -64,33 +597,48 @@ def save_trade(conn_or_path, trade: Trade) -> bool:
             conn.close()
 
 
-def _row_to_trade(row) -> Trade:
-    signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw = row
-    # Attempt to use raw JSON if present to preserve types, fall back to constructor
+def save_trades(conn_or_path, trades: Iterable[Trade]) -> Tuple[int, int]:
+    """Save many trades in a single transaction.
+
+    Uses `executemany` with INSERT OR IGNORE and one commit for the whole
+    batch. Returns `(inserted, duplicates)`.
+    """
+    close_conn = False
+    if isinstance(conn_or_path, str):
+        conn = init_db(conn_or_path)
+        close_conn = True
+    else:
+        conn = conn_or_path
+
+    rows = [_trade_row(t) for t in trades]
     try:
-        data = json.loads(raw) if raw else {}
-        return Trade(
-            signature=signature,
-            ts=int(ts),
-            mint=mint,
-            token_delta=float(token_delta),
-            quote_mint=data.get("quote_mint") if data else quote_mint,
-            quote_delta=data.get("quote_delta") if data else quote_delta,
-            price=data.get("price") if data else price,
-        )
+        # rowcount excludes rows written by triggers (e.g. the rollups)
+        cur = conn.executemany("INSERT OR IGNORE " + _INSERT_TRADE, rows)
+        conn.commit()
+        inserted = max(0, cur.rowcount) if rows else 0
+        return inserted, len(rows) - inserted
     except Exception:
-        return Trade(
-            signature=signature,
-            ts=int(ts),
-            mint=mint,
-            token_delta=float(token_delta),
-            quote_mint=quote_mint,
-            quote_delta=quote_delta,
-            price=price,
-        )
+        conn.rollback()
+        raise
+    finally:
+        if close_conn:
+            conn.close()
 
 
-def get_trades_for_mint(conn_or_path, mint: str, since_ts: Optional[int] = None) -> List[Trade]:
+# Typed columns in `Trade` field order, so a row is `Trade(*row)`
+_TRADE_COLUMNS = (
+    "signature, ts, mint, token_delta, quote_mint, quote_delta, price, "
+    "token_delta_raw, token_decimals, quote_delta_raw, quote_decimals"
+)
+
+
+def _row_to_trade(cursor: sqlite3.Cursor, row: tuple) -> Trade:
+    # sqlite3 row factory; column affinities already give the field types
+    return Trade(*row)
+
+
+def iter_trades_for_mint(conn_or_path, mint: str, since_ts: Optional[int] = None) -> Iterator[Trade]:
+    """Yield the trades of `mint` in timestamp order, streamed from the cursor."""
     close_conn = False
     if isinstance(conn_or_path, str):
         conn = init_db(conn_or_path)
@@ -99,21 +647,23 @@ def get_trades_for_mint(conn_or_path, mint: str, since_ts: Optional[int] = None)
         conn = conn_or_path
 
     cur = conn.cursor()
-    if since_ts is None:
-        rows = cur.execute(
-            "SELECT signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw FROM trades WHERE mint = ? ORDER BY ts ASC",
-            (mint,),
-        ).fetchall()
-    else:
-        rows = cur.execute(
-            "SELECT signature, ts, mint, token_delta, quote_mint, quote_delta, price, raw FROM trades WHERE mint = ? AND ts >= ? ORDER BY ts ASC",
-            (mint, since_ts),
-        ).fetchall()
+    cur.row_factory = _row_to_trade
+    try:
+        if since_ts is None:
+            cur.execute(f"SELECT {_TRADE_COLUMNS} FROM trades WHERE mint = ? ORDER BY ts ASC", (mint,))
+        else:
+            cur.execute(
+                f"SELECT {_TRADE_COLUMNS} FROM trades WHERE mint = ? AND ts >= ? ORDER BY ts ASC", (mint, since_ts)
+            )
+        yield from cur
+    finally:
+        cur.close()
+        if close_conn:
+            conn.close()
 
-    trades = [_row_to_trade(r) for r in rows]
-    if close_conn:
-        conn.close()
-    return trades
+
+def get_trades_for_mint(conn_or_path, mint: str, since_ts: Optional[int] = None) -> List[Trade]:
+    return list(iter_trades_for_mint(conn_or_path, mint, since_ts))
 
 
 # Rolling windows (seconds) used by metrics
@@ -124,11 +674,119 @@ WINDOWS = {
     "1h": 60 * 60,
 }
 
+# Seconds of rollup buckets kept per resolution by `prune_rollups`. 1s
+# buckets are only read for the partial minute at the start of a window, so
+# they are kept for the longest window plus one 1m bucket; 1m buckets serve
+# the windows and `get_ohlcv` candles for 30 days.
+ROLLUP_RETENTION = {
+    1: max(WINDOWS.values()) + 60,
+    60: 30 * 24 * 60 * 60,
+}
+
 
-def compute_volumes_sql(conn_or_path, mint: str, now_ts: Optional[int] = None, return_usd: bool = False, client=None) -> Dict[str, float] | Dict[str, Dict[str, float]]:
+# Per window the volume queries return (token, usd, raw token sum, trades,
+# trades with a raw amount), then the mint's MIN/MAX token decimals.
+_WINDOW_COLS = 5
+
+
+def _volumes_query(stables: List[str], now: int, exact: bool) -> Tuple[str, List[Any]]:
+    marks = ", ".join("?" * len(stables))
+    cols: List[str] = []
+    args: List[Any] = []
+    for secs in WINDOWS.values():
+        since = now - secs
+        cols.append("SUM(CASE WHEN ts >= ? THEN ABS(token_delta) END)")
+        cols.append(
+            f"SUM(CASE WHEN ts >= ? AND price IS NOT NULL AND quote_mint IN ({marks}) "
+            "THEN ABS(token_delta) * ABS(price) END)"
+        )
+        args.extend([since, since, *stables])
+        if exact:
+            cols.append("SUM(CASE WHEN ts >= ? THEN ABS(token_delta_raw) END)")
+            args.append(since)
+        else:
+            cols.append("NULL")
+        cols.append("COUNT(CASE WHEN ts >= ? THEN 1 END)")
+        cols.append("COUNT(CASE WHEN ts >= ? THEN token_delta_raw END)")
+        args.extend([since, since])
+    cols.append("MIN(token_decimals), MAX(token_decimals)")
+    return f"SELECT {', '.join(cols)} FROM trades WHERE mint = ? AND ts >= ?", args
+
+
+def _window_sums_trades(cur: sqlite3.Cursor, mint: str, now: int, stables: List[str], exact: bool = True) -> tuple:
+    # One pass over the largest window: every window is a conditional sum,
+    # so overlapping rows are read once instead of once per window.
+    sql, args = _volumes_query(stables, now, exact)
+    args.extend([mint, now - max(WINDOWS.values())])
+    return cur.execute(sql, args).fetchone()
+
+
+def _window_sums_rollup(cur: sqlite3.Cursor, mint: str, now: int, exact: bool = True) -> tuple:
+    # Each window [since, +inf) is covered by 1s buckets up to the next
+    # minute boundary and 1m buckets from there on, so only a bounded number
+    # of buckets is read however many trades they hold.
+    cols = []
+    args: List[Any] = []
+    edges = []
+    summed = ["token_volume", "usd_volume", "token_volume_raw" if exact else None, "trade_count", "raw_count"]
+    for secs in WINDOWS.values():
+        since = now - secs
+        edge = -(-since // 60) * 60
+        edges.append((since, edge))
+        cond = "((resolution = 1 AND bucket_ts >= ? AND bucket_ts < ?) OR (resolution = 60 AND bucket_ts >= ?))"
+        for col in summed:
+            if col is None:
+                cols.append("NULL")
+                continue
+            cols.append(f"SUM(CASE WHEN {cond} THEN {col} END)")
+            args.extend([since, edge, edge])
+    cols.append("MIN(token_decimals), MAX(token_decimals)")
+    # Primary-key range scans only: the partial minute of each window from the
+    # 1s buckets plus the 1m buckets of the largest window. (An OR of these
+    # ranges would make SQLite scan every bucket of the mint.)
+    select = (
+        "SELECT resolution, bucket_ts, token_volume, usd_volume, token_volume_raw, trade_count, raw_count, "
+        "token_decimals FROM volume_buckets "
+    )
+    parts = []
+    sub_args: List[Any] = []
+    for since, edge in edges:
+        if edge > since:
+            parts.append(select + "WHERE mint = ? AND resolution = 1 AND bucket_ts >= ? AND bucket_ts < ?")
+            sub_args.extend([mint, since, edge])
+    parts.append(select + "WHERE mint = ? AND resolution = 60 AND bucket_ts >= ?")
+    sub_args.extend([mint, min(edge for _, edge in edges)])
+    sql = f"SELECT {', '.join(cols)} FROM ({' UNION ALL '.join(parts)})"
+    return cur.execute(sql, args + sub_args).fetchone()
+
+
+def _token_volume(volume, raw_sum, trades, raw_trades, decimals) -> float:
+    """Exact `raw_sum / 10**decimals` when every trade had a raw amount."""
+    if raw_sum is not None and trades and raw_trades == trades and decimals is not None:
+        return raw_sum / 10 ** decimals
+    return float(volume or 0.0)
+
+
+def compute_volumes_sql(
+    conn_or_path,
+    mint: str,
+    now_ts: Optional[int] = None,
+    return_usd: bool = False,
+    client=None,
+    use_rollups: bool = True,
+) -> Dict[str, float] | Dict[str, Dict[str, float]]:
     """Compute rolling volumes for `mint` using SQL aggregation on stored trades.
 
-    Returns dict mapping window label to sum(abs(token_delta)).
+    Returns dict mapping window label to sum(abs(token_delta)). By default
+    the sums come from the `volume_buckets` rollups, so the cost depends on
+    the number of buckets rather than trades; `use_rollups=False` aggregates
+    the raw `trades` rows instead. Use the latter for a `now_ts` older than
+    the 1s `ROLLUP_RETENTION`, whose buckets may have been pruned.
+
+    Token volumes are summed from the integer raw amounts when every trade in
+    the window has one (and the mint's decimals agree), so they carry no
+    float accumulation error; otherwise, or if the integer sum overflows,
+    the float deltas are summed. USD volumes are always float.
     """
     close_conn = False
     if isinstance(conn_or_path, str):
@@ -158,25 +816,24 @@ def compute_volumes_sql(conn_or_path, mint: str, now_ts: Optional[int] = None, r
     except Exception:
         pyth_price = None
 
-    for label, secs in WINDOWS.items():
-        since = now - secs
-        rows = cur.execute(
-            "SELECT token_delta, price, quote_mint FROM trades WHERE mint = ? AND ts >= ?",
-            (mint, since),
-        ).fetchall()
-        token_total = 0.0
-        usd_total = 0.0
-        for (td, price, quote_mint) in rows:
-            try:
-                token_amt = abs(float(td))
-            except Exception:
-                continue
-            token_total += token_amt
-            if price is not None and quote_mint in STABLECOIN_MINTS:
-                try:
-                    usd_total += token_amt * abs(float(price))
-                except Exception:
-                    pass
+    def window_sums(exact: bool) -> tuple:
+        if use_rollups:
+            return _window_sums_rollup(cur, mint, now, exact)
+        return _window_sums_trades(cur, mint, now, sorted(STABLECOIN_MINTS), exact)
+
+    try:
+        row = window_sums(True)
+    except sqlite3.OperationalError as e:
+        if "overflow" not in str(e):
+            raise
+        row = window_sums(False)
+
+    min_dec, max_dec = row[-2:]
+    decimals = min_dec if min_dec == max_dec else None
+    for i, label in enumerate(WINDOWS):
+        volume, usd, raw_sum, trades, raw_trades = row[_WINDOW_COLS * i:_WINDOW_COLS * (i + 1)]
+        token_total = _token_volume(volume, raw_sum, trades, raw_trades, decimals)
+        usd_total = float(usd or 0.0)
         if return_usd:
             res[label] = {"token": token_total, "usd": usd_total}
         else:
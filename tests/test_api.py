@@ -20,3 +20,21 @@ def test_api_memory_with_trade():
     assert r.status_code == 200
     data = r.json()
     assert data["1m"] >= 3.0
+
+
+def test_api_top_mints(monkeypatch):
+    import api
+    from realtime import BucketedIndexer
+
+    client = TestClient(app)
+    assert client.get("/top/1m").status_code == 400
+
+    idx = BucketedIndexer()
+    idx.add_trade(Trade(signature="T2", ts=1700000000, mint="A", token_delta=3.0))
+    idx.add_trade(Trade(signature="T3", ts=1700000001, mint="B", token_delta=5.0))
+    monkeypatch.setattr(api, "indexer", idx)
+
+    r = client.get("/top/1m", params={"k": 1, "by": "token"})
+    assert r.status_code == 200
+    assert r.json() == [{"mint": "B", "token": 5.0}]
+    assert client.get("/top/2m").status_code == 400
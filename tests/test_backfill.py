@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+from backfill import backfill_mint
+from store import get_backfill_state, get_pending, init_db
+
+
+class FakeSigClient:
+    """Serves getSignaturesForAddress pages from an in-memory history."""
+
+    def __init__(self, n):
+        # newest first, slots descending
+        self.history = []
+        self.pages = 0
+        self.extend(n)
+
+    def extend(self, n):
+        top = self.history[0].slot if self.history else 0
+        new = [SimpleNamespace(signature=Signature.new_unique(), slot=top + n - i, block_time=None, err=None) for i in range(n)]
+        self.history = new + self.history
+
+    def get_signatures_for_address(self, address, before=None, until=None, limit=None):
+        self.pages += 1
+        sigs = [str(s.signature) for s in self.history]
+        start = sigs.index(str(before)) + 1 if before else 0
+        end = sigs.index(str(until)) if until else len(sigs)
+        return SimpleNamespace(value=self.history[start:end][:limit])
+
+
+MINT = str(Pubkey.new_unique())
+
+
+def _collect(seen):
+    def process(chunk):
+        seen.extend(s["signature"] for s in chunk)
+    return process
+
+
+def test_first_run_stops_at_depth(tmp_path):
+    conn = init_db(str(tmp_path / "bf.db"))
+    client = FakeSigClient(50)
+    seen = []
+
+    state = backfill_mint(client, conn, MINT, _collect(seen), depth=25, page_size=10, chunk_size=4)
+
+    assert seen == [str(s.signature) for s in client.history[:25]]
+    assert state["scanned"] == 25
+    assert state["newest_sig"] == seen[0]
+    assert state["oldest_sig"] == seen[-1]
+    assert not state["exhausted"]
+
+
+def test_rerun_fetches_only_new_then_deepens(tmp_path):
+    conn = init_db(str(tmp_path / "bf.db"))
+    client = FakeSigClient(50)
+    backfill_mint(client, conn, MINT, _collect([]), depth=25, page_size=10)
+
+    client.extend(5)
+    seen = []
+    state = backfill_mint(client, conn, MINT, _collect(seen), depth=25, page_size=10)
+    assert seen == [str(s.signature) for s in client.history[:5]]
+    assert state["new"] == 5 and state["deepened"] == 0
+
+    seen = []
+    state = backfill_mint(client, conn, MINT, _collect(seen), depth=100, page_size=10)
+    # the remaining 25 older signatures, then history is exhausted
+    assert seen == [str(s.signature) for s in client.history[30:]]
+    assert state["exhausted"]
+    assert state["scanned"] == 55
+
+
+def test_min_slot_bounds_backfill(tmp_path):
+    conn = init_db(str(tmp_path / "bf.db"))
+    client = FakeSigClient(30)
+    seen = []
+
+    backfill_mint(client, conn, MINT, _collect(seen), min_slot=21, page_size=7)
+
+    assert len(seen) == 10
+    assert get_backfill_state(conn, MINT)["oldest_slot"] == 21
+
+
+def test_resume_after_crash_does_not_reprocess(tmp_path):
+    conn = init_db(str(tmp_path / "bf.db"))
+    client = FakeSigClient(40)
+    seen = []
+    calls = {"n": 0}
+
+    def flaky(chunk):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("crash")
+        seen.extend(s["signature"] for s in chunk)
+
+    with pytest.raises(RuntimeError):
+        backfill_mint(client, conn, MINT, flaky, depth=40, page_size=10, chunk_size=5)
+    assert len(seen) == 10
+    # new signatures arrived while we were down
+    client.extend(3)
+
+    backfill_mint(client, conn, MINT, flaky, depth=40, page_size=10, chunk_size=5)
+
+    expected = [str(s.signature) for s in client.history[3:]]
+    assert sorted(seen) == sorted(expected)
+    assert len(seen) == len(set(seen))
+
+    # the next run picks up the 3 that arrived during the crash
+    backfill_mint(client, conn, MINT, flaky, depth=40, page_size=10, chunk_size=5)
+    assert sorted(seen) == sorted(str(s.signature) for s in client.history)
+
+
+def test_unfetched_signatures_are_retried_on_the_next_run(tmp_path):
+    conn = init_db(str(tmp_path / "bf.db"))
+    client = FakeSigClient(20)
+    sigs = [str(s.signature) for s in client.history]
+    down = {sigs[3], sigs[12]}
+    fetched = []
+
+    def process(chunk):
+        fetched.extend(s["signature"] for s in chunk if s["signature"] not in down)
+        return [s["signature"] for s in chunk if s["signature"] in down]
+
+    state = backfill_mint(client, conn, MINT, process, depth=20, page_size=10, chunk_size=5)
+    # the cursor moved past them, but they are kept pending
+    assert state["oldest_sig"] == sigs[-1]
+    assert sorted(get_pending(conn, MINT)) == sorted((s, 1) for s in down)
+
+    down = {sigs[12]}
+    state = backfill_mint(client, conn, MINT, process, depth=20, page_size=10, chunk_size=5)
+    assert state["retried"] == 1 and fetched[-1] == sigs[3]
+    assert get_pending(conn, MINT) == [(sigs[12], 2)]
+
+    # dropped once it has failed `max_attempts` runs
+    backfill_mint(client, conn, MINT, process, depth=20, max_attempts=3)
+    backfill_mint(client, conn, MINT, process, depth=20, max_attempts=3)
+    assert get_pending(conn, MINT) == []
+    assert sorted(fetched) == sorted(s for s in sigs if s != sigs[12])
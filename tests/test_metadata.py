@@ -20,3 +20,4 @@ def test_metadata_decoder_simple():
     res = get_token_metadata(client, "MINTFAKE123456789012345678901234567890")
     assert res["name"] == "MyTokenName"
     assert res["symbol"] == "MTK"
+
@@ -0,0 +1,52 @@
+import json
+from types import SimpleNamespace
+
+from solders.signature import Signature
+
+from parallel_backfill import ShardedParser
+from parse import extract_trade_from_tx
+from store import get_trades_for_mint, init_db, save_trades
+from test_parse import make_tx
+from test_realtime_ws import MINT, swap_tx
+
+
+def tx_for(sig):
+    # missing, not a PumpSwap trade, or a trade of MINT
+    n = sum(sig.encode())
+    if n % 3 == 0:
+        return None
+    if n % 3 == 1:
+        return make_tx(1_700_000_000, [1.0], [2.0], MINT, include_pumpswap=False)
+    return swap_tx(n % 1000)
+
+
+class RawProvider:
+    def make_request_unparsed(self, req):
+        body = json.loads(req.to_json())
+        return json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": tx_for(body["params"][0])})
+
+
+def fake_client(rpc_url):
+    return SimpleNamespace(_provider=RawProvider())
+
+
+def test_sharded_parser_matches_single_process(tmp_path):
+    sigs = [str(Signature.new_unique()) for _ in range(90)]
+    expected = [t for t in (extract_trade_from_tx(tx_for(s), MINT, s) if tx_for(s) else None for s in sigs) if t]
+
+    with ShardedParser("fake://", processes=3, threads=2, client_factory=fake_client) as sharded:
+        trades, not_trades, handled = sharded.run(MINT, sigs)
+        again, _, _ = sharded.run(MINT, sigs)
+
+    assert trades == expected == again
+    assert handled == [s for s in sigs if tx_for(s) is not None]
+    assert not_trades == [s for s in handled if extract_trade_from_tx(tx_for(s), MINT, s) is None]
+    assert not_trades and trades
+    assert sharded.stats.fetched == 2 * len(handled)
+    assert sharded.stats.missing == 2 * (len(sigs) - len(handled))
+
+    # the single writer dedupes by signature
+    db = init_db(str(tmp_path / "p.db"))
+    assert save_trades(db, trades) == (len(trades), 0)
+    assert save_trades(db, again) == (0, len(again))
+    assert len(get_trades_for_mint(db, MINT)) == len(trades)
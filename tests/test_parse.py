@@ -54,3 +54,152 @@ def test_non_pumpswap_transaction_is_ignored():
     tx = make_tx(1_600_000_200, [1.0], [2.0], "MINT123", include_pumpswap=False)
     trade = extract_trade_from_tx(tx, "MINT123", "SIG3")
     assert trade is None
+
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+
+
+def swap_logs(instruction="Buy", program=PUMPSWAP_PROGRAM_ID):
+    return [
+        "Program ComputeBudget111111111111111111111111111111 invoke [1]",
+        "Program ComputeBudget111111111111111111111111111111 success",
+        f"Program {program} invoke [1]",
+        f"Program log: Instruction: {instruction}",
+        f"Program {TOKEN_PROGRAM} invoke [2]",
+        "Program log: Instruction: TransferChecked",
+        f"Program {TOKEN_PROGRAM} consumed 6147 of 370415 compute units",
+        f"Program {TOKEN_PROGRAM} success",
+        "Program data: Z/RSHyz1d3c=",
+        f"Program {program} consumed 60000 of 400000 compute units",
+        f"Program {program} success",
+    ]
+
+
+def test_logs_show_pumpswap_swap():
+    from parse import logs_show_pumpswap_swap
+
+    assert logs_show_pumpswap_swap(swap_logs("Buy"))
+    assert logs_show_pumpswap_swap(swap_logs("Sell"))
+    assert not logs_show_pumpswap_swap(swap_logs("Deposit"))
+    # Buy logged by some other program (e.g. a bonding curve) does not count
+    assert not logs_show_pumpswap_swap(swap_logs("Buy", program="6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"))
+    # Token program "Instruction: Transfer" lines nested under PumpSwap are ignored
+    logs = swap_logs("Deposit")
+    logs[5] = "Program log: Instruction: Sell"
+    assert not logs_show_pumpswap_swap(logs)
+    # nothing to go on: let the caller fetch
+    assert logs_show_pumpswap_swap([])
+    assert logs_show_pumpswap_swap(swap_logs("Deposit")[:3] + ["Log truncated"])
+
+
+def test_extract_trades_from_tx_matches_per_mint():
+    import random
+
+    from parse import WSOL_MINT, extract_trades_from_tx
+
+    rng = random.Random(2)
+    for _ in range(200):
+        mints = [f"M{i}" for i in range(rng.randint(0, 5))] + [WSOL_MINT]
+        pre, post = [], []
+        for m in mints:
+            for owner in range(rng.randint(1, 3)):
+                a = float(rng.choice([0, 5, 10, 20]))
+                pre.append({"owner": f"o{owner}", "mint": m, "uiTokenAmount": {"uiAmount": a}})
+                post.append({"owner": f"o{owner}", "mint": m, "uiTokenAmount": {"uiAmount": a + rng.choice([0, -5, 5, 10])}})
+        tx = make_tx(1_600_000_000, [], [], "X")
+        tx["meta"] = {"preTokenBalances": pre, "postTokenBalances": post}
+
+        # one trade: the largest changed non-quote mint, else WSOL itself
+        per_mint = [t for t in (extract_trade_from_tx(tx, m, "S") for m in sorted(mints)) if t]
+        base = [t for t in per_mint if t.mint != WSOL_MINT] or per_mint
+        expected = [max(base, key=lambda t: abs(t.token_delta))] if base else []
+        assert extract_trades_from_tx(tx, "S") == expected
+
+    assert extract_trades_from_tx(make_tx(1, [1.0], [2.0], "X", include_pumpswap=False), "S") == []
+
+
+def test_pumpswap_detection_false_positive_corpus():
+    import json
+    import os
+
+    from parse import _tx_is_pumpswap_swap, extract_trades_from_tx
+
+    path = os.path.join(os.path.dirname(__file__), "data", "detection", "false_positives.json")
+    with open(path) as f:
+        corpus = json.load(f)
+    assert len(corpus) >= 10
+    for case in corpus:
+        assert not _tx_is_pumpswap_swap(case["tx"]), case["name"]
+        assert extract_trades_from_tx(case["tx"], "S") == [], case["name"]
+
+
+def test_pumpswap_detection_shapes():
+    import copy
+
+    from parse import _tx_is_pumpswap_swap
+    from test_pumpswap_events import load
+
+    for name in ("pumpswap_buy_logs", "pumpswap_sell_cpi"):
+        tx = load(name)
+        assert _tx_is_pumpswap_swap(tx)
+
+        # json encoding: plain key list and programIdIndex
+        keys = [k["pubkey"] for k in tx["transaction"]["message"]["accountKeys"]]
+        enc = copy.deepcopy(tx)
+        enc["transaction"]["message"]["accountKeys"] = keys
+        for ix in enc["transaction"]["message"]["instructions"]:
+            pid = ix.pop("programId")
+            if pid not in keys:
+                keys.append(pid)
+            ix["programIdIndex"] = keys.index(pid)
+        assert _tx_is_pumpswap_swap(enc)
+
+        # routed through another program: the PumpSwap call is an inner instruction
+        routed = copy.deepcopy(tx)
+        msg = routed["transaction"]["message"]
+        ps_ix = msg["instructions"].pop()
+        msg["instructions"].append({"programId": "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4", "data": "3Bxs4Bc3VYuGVB19"})
+        routed["meta"]["innerInstructions"].append({"index": len(msg["instructions"]) - 1, "instructions": [ps_ix]})
+        assert _tx_is_pumpswap_swap(routed)
+
+        # no inner instructions recorded: the logs decide
+        del routed["meta"]["innerInstructions"]
+        assert _tx_is_pumpswap_swap(routed)
+        routed["meta"]["logMessages"] = swap_logs("Deposit")
+        assert not _tx_is_pumpswap_swap(routed)
+
+
+def test_swap_data_bounds_match_decoding():
+    import random
+
+    from parse import PUMPSWAP_SWAP_DISCRIMINATORS, _b58decode, _b58encode, _is_pumpswap_swap_ix
+
+    rng = random.Random(18)
+    discs = sorted(PUMPSWAP_SWAP_DISCRIMINATORS)
+    for _ in range(5000):
+        n = rng.randint(0, 64)
+        data = bytes(rng.choice([0, 255, rng.getrandbits(8)]) for _ in range(n))
+        if n >= 8 and rng.random() < 0.5:
+            prefix = bytearray(rng.choice(discs))
+            if rng.random() < 0.3:
+                prefix[rng.randrange(8)] ^= 1 << rng.randrange(8)
+            data = bytes(prefix) + data[8:]
+        s = _b58encode(data)
+        assert _b58decode(s) == data
+        ix = {"programId": PUMPSWAP_PROGRAM_ID, "data": s}
+        assert _is_pumpswap_swap_ix(ix, [], {PUMPSWAP_PROGRAM_ID}) == (data[:8] in PUMPSWAP_SWAP_DISCRIMINATORS)
+
+
+def test_raw_amounts_are_exact():
+    # 9 decimals and amounts past 2**53: uiAmount is rounded (here deliberately wrong)
+    def row(owner, mint, amount, decimals):
+        return {"owner": owner, "mint": mint, "uiTokenAmount": {"amount": str(amount), "decimals": decimals, "uiAmount": 0.5}}
+
+    tx = make_tx(1_600_000_200, [], [], "BIG")
+    tx["meta"]["preTokenBalances"] = [row("o0", "BIG", 123_456_789_012_345_678, 9), row("o1", "Q", 10_000_000, 6)]
+    tx["meta"]["postTokenBalances"] = [row("o0", "BIG", 123_456_789_012_345_679, 9), row("o1", "Q", 7_000_000, 6)]
+    trade = extract_trade_from_tx(tx, "BIG", "SIG3")
+    assert (trade.token_delta_raw, trade.token_decimals) == (1, 9)
+    assert (trade.quote_delta_raw, trade.quote_decimals) == (-3_000_000, 6)
+    assert trade.token_delta == 1e-9 and trade.quote_delta == -3.0
+    assert trade.price == 3e9
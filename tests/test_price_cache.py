@@ -34,5 +34,95 @@ def test_pricecache_get_and_set(monkeypatch):
     old_price, old_ts = pc._cache['SOME_MINT']
     pc._cache['SOME_MINT'] = (old_price, time.time() - 10)
 
+    # the stale price is served while one background fetch refreshes it
     p3 = pc.get('SOME_MINT')
-    assert p3 == 12.34
+    assert p3 == 56.78
+    fut = pc._inflight.get('SOME_MINT')
+    if fut is not None:
+        fut.result()
+    assert pc.get('SOME_MINT') == 12.34
+    assert (pc.stats.hits, pc.stats.stale_hits, pc.stats.misses, pc.stats.fetches) == (2, 1, 1, 2)
+
+
+def test_pricecache_coalesces_misses_and_caches_negatives(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import price_cache as pc_mod
+
+    calls = []
+    release = threading.Event()
+
+    def slow_get_price_for_mint(client_arg, mint):
+        calls.append(mint)
+        release.wait(5)
+        return 3.0 if mint == 'MAPPED' else None
+
+    monkeypatch.setattr(pc_mod, 'get_price_for_mint', slow_get_price_for_mint)
+    pc = PriceCache(FakeClient(), ttl=5, negative_ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futs = [pool.submit(pc.get, 'MAPPED') for _ in range(8)]
+        # all but the first caller join its in-flight fetch
+        deadline = time.time() + 5
+        while pc.stats.coalesced < 7 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        assert [f.result() for f in futs] == [3.0] * 8
+    assert calls == ['MAPPED']
+    assert pc.stats.coalesced == 7 and pc.stats.fetches == 1
+
+    # a mint without a price is fetched once, then answered from the negative cache
+    assert pc.get('UNMAPPED') is None and pc.get('UNMAPPED') is None
+    assert calls == ['MAPPED', 'UNMAPPED']
+    assert pc.stats.negative_hits == 1
+    assert pc.stats.max_fetch_seconds >= pc.stats.mean_fetch_seconds > 0
+
+
+def test_pricecache_negative_entry_replaces_expired_price(monkeypatch):
+    import asyncio
+
+    import price_cache as pc_mod
+
+    monkeypatch.setattr(pc_mod, 'get_price_for_mint', lambda client_arg, mint: None)
+    pc = PriceCache(FakeClient(), ttl=5, negative_ttl=60)
+    pc.set('DELISTED', 1.5)
+    pc._cache['DELISTED'] = (1.5, time.time() - 10)
+
+    # the stale price is served once; the refresh finds no price
+    assert pc.get('DELISTED') == 1.5
+    fut = pc._inflight.get('DELISTED')
+    if fut is not None:
+        fut.result()
+    assert 'DELISTED' not in pc._cache
+    assert pc.get('DELISTED') is None
+    assert (pc.stats.negative_hits, pc.stats.fetches) == (1, 1)
+
+    # stop_background shuts the fetch threads down
+    pool = pc._pool
+    asyncio.run(pc.stop_background())
+    assert pc._pool is None and pool._shutdown
+
+
+def test_pricecache_get_timeout_returns_none_and_keeps_fetching(monkeypatch):
+    import threading
+
+    import price_cache as pc_mod
+
+    release = threading.Event()
+
+    def slow_get_price_for_mint(client_arg, mint):
+        release.wait(5)
+        return 7.0
+
+    monkeypatch.setattr(pc_mod, 'get_price_for_mint', slow_get_price_for_mint)
+    pc = PriceCache(FakeClient(), ttl=5)
+
+    # a cold miss gives up after the timeout; the fetch still fills the cache
+    assert pc.get('COLD', timeout=0.05) is None
+    release.set()
+    fut = pc._inflight.get('COLD')
+    if fut is not None:
+        fut.result()
+    assert pc.get('COLD') == 7.0
+    assert (pc.stats.misses, pc.stats.hits, pc.stats.fetches) == (1, 1, 1)
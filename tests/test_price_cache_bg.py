@@ -11,11 +11,16 @@ import pyth_parser
 class FakeClient:
     def __init__(self, b64data):
         self._b64 = b64data
+        self.batches = []
 
     def get_account_info(self, pk):
         # RPC-like shape
         return SimpleNamespace(value=SimpleNamespace(data=[self._b64]))
 
+    def get_multiple_accounts(self, pks):
+        self.batches.append(len(pks))
+        return SimpleNamespace(value=[SimpleNamespace(data=[self._b64]) for _ in pks])
+
 
 def test_pricecache_background_refresh(monkeypatch):
     raw = pyth_parser.make_price_account_bytes(price=1000000000, expo=-8, conf=10)
@@ -43,7 +48,25 @@ def test_pricecache_background_refresh(monkeypatch):
 
     asyncio.run(run_bg())
 
-    # Assert cache populated
+    # Assert cache populated, from batched account reads
+    assert client.batches and set(client.batches) == {1}
     p = pc.get(test_mint)
     assert p is not None
     assert abs(p - 10.0) < 1e-6 or p > 0
+
+
+def test_refresh_batches_accounts(monkeypatch):
+    import config
+    import rpc
+
+    raw = pyth_parser.make_v2_price_account_bytes(price=2_500_000_000, expo=-8, conf=10)
+    client = FakeClient(base64.b64encode(raw).decode())
+    monkeypatch.setattr(rpc.Pubkey, 'from_string', lambda s: s, raising=False)
+    mints = [f"FEEDMINT{i:04d}" for i in range(1000)]
+    for i, m in enumerate(mints):
+        monkeypatch.setitem(config.PYTH_PRICE_ACCOUNTS, m, f"FeedAcct{i:04d}")
+
+    pc = PriceCache(client, ttl=60)
+    assert pc.refresh(mints + ["UNMAPPED"]) == 1000
+    assert client.batches == [100] * 10
+    assert all(pc.get(m) == 25.0 for m in mints)
@@ -0,0 +1,150 @@
+import asyncio
+import base64
+import json
+import time
+from types import SimpleNamespace
+
+from solders.pubkey import Pubkey
+from websockets.asyncio.server import serve
+
+import pyth_parser
+from price_cache import PriceCache
+from price_stream import PriceStream
+
+ACCT_A, ACCT_B = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+ACCOUNTS = {"MINTA": ACCT_A, "MINTB": ACCT_B, "MINTB2": ACCT_B}
+
+
+def account_data(price):
+    raw = pyth_parser.make_v2_price_account_bytes(price=price, expo=-8, conf=1)
+    return [base64.b64encode(raw).decode(), "base64"]
+
+
+def notification(sub, price):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "accountNotification",
+        "params": {"subscription": sub, "result": {"context": {"slot": 1}, "value": {"data": account_data(price)}}},
+    })
+
+
+class PollingClient:
+    """getMultipleAccounts for the polling fallback; every account at 1.0."""
+
+    def __init__(self):
+        self.batches = 0
+        self.polled = set()
+
+    def get_multiple_accounts(self, pks):
+        self.batches += 1
+        self.polled.update(str(pk) for pk in pks)
+        return SimpleNamespace(value=[SimpleNamespace(data=account_data(100_000_000)) for _ in pks])
+
+
+async def _subscribe_all(ws):
+    """Ack every accountSubscribe; returns {account: subscription id}."""
+    subs = {}
+    for _ in range(len(set(ACCOUNTS.values()))):
+        req = json.loads(await ws.recv())
+        assert req["method"] == "accountSubscribe"
+        assert req["params"][1]["encoding"] == "base64"
+        subs[req["params"][0]] = 100 + req["id"]
+        await ws.send(json.dumps({"jsonrpc": "2.0", "result": subs[req["params"][0]], "id": req["id"]}))
+    return subs
+
+
+async def _run(stream, handler, until, timeout=5.0):
+    async with serve(handler, "127.0.0.1", 0) as server:
+        stream.ws_url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        task = asyncio.create_task(stream.run())
+        start = time.monotonic()
+        while not until() and time.monotonic() - start < timeout:
+            await asyncio.sleep(0.01)
+        stream.stop()
+        await task
+
+
+def test_notifications_update_cache_on_one_connection():
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        subs = await _subscribe_all(ws)
+        await ws.send(notification(subs[ACCT_A], 2_500_000_000))
+        await ws.send(notification(subs[ACCT_B], 150_000_000))
+        await ws.send(notification(999, 1))  # unknown subscription
+        await ws.wait_closed()
+
+    client = PollingClient()
+    cache = PriceCache(client, ttl=60)
+    stream = PriceStream(cache, accounts=ACCOUNTS)
+    asyncio.run(_run(stream, handler, lambda: stream.stats.updates == 2))
+
+    assert len(connections) == 1
+    assert stream.stats.subscriptions == 2
+    assert cache.get("MINTA") == 25.0
+    assert cache.get("MINTB") == cache.get("MINTB2") == 1.5
+    assert client.batches == 0
+
+
+def test_falls_back_to_polling_while_disconnected():
+    connections = []
+
+    async def handler(ws):
+        connections.append(ws)
+        subs = await _subscribe_all(ws)
+        if len(connections) == 1:
+            return  # drop the first connection
+        await ws.send(notification(subs[ACCT_A], 2_500_000_000))
+        await ws.wait_closed()
+
+    client = PollingClient()
+    cache = PriceCache(client, ttl=60)
+    stream = PriceStream(cache, accounts=ACCOUNTS, poll_interval=0.02, reconnect_delay=0.3)
+    polled = {}
+
+    def until():
+        if stream.polling:
+            polled["MINTB"] = cache.get("MINTB")
+        return stream.stats.updates == 1
+
+    asyncio.run(_run(stream, handler, until))
+
+    assert len(connections) == 2
+    assert stream.stats.disconnects >= 1 and stream.stats.polls >= 1
+    assert polled["MINTB"] == 1.0
+    # the polling fallback stops once the stream is back
+    assert not stream.polling
+    batches = client.batches
+    assert cache.get("MINTA") == 25.0
+    assert client.batches == batches
+
+
+def test_failed_subscription_is_counted_and_polled():
+    async def handler(ws):
+        for _ in range(2):
+            req = json.loads(await ws.recv())
+            if req["params"][0] == ACCT_B:
+                reply = {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid param"}, "id": req["id"]}
+            else:
+                reply = {"jsonrpc": "2.0", "result": 7, "id": req["id"]}
+            await ws.send(json.dumps(reply))
+        await ws.send(notification(7, 2_500_000_000))
+        await ws.wait_closed()
+
+    client = PollingClient()
+    cache = PriceCache(client, ttl=60)
+    stream = PriceStream(cache, accounts=ACCOUNTS, poll_interval=0.02)
+    polling = []
+
+    def until():
+        polling.append(stream.polling)
+        return stream.stats.updates == 1 and stream.stats.polls >= 1
+
+    asyncio.run(_run(stream, handler, until))
+
+    assert (stream.stats.subscriptions, stream.stats.subscription_errors) == (1, 1)
+    # only the account without a subscription is polled, and polling goes on
+    assert polling[-1] and client.polled == {ACCT_B}
+    assert cache.get("MINTA") == 25.0
+    assert cache.get("MINTB") == cache.get("MINTB2") == 1.0
@@ -0,0 +1,136 @@
+import base64
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from solders.pubkey import Pubkey
+
+from parse import PUMPSWAP_PROGRAM_ID
+from pumpswap_events import (
+    PoolInfo,
+    PoolRegistry,
+    decode_swap_event,
+    encode_swap_event,
+    events_from_logs,
+    events_from_tx,
+    trade_from_event,
+)
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def load(name):
+    with open(os.path.join(DATA, name + ".json")) as f:
+        return json.load(f)
+
+
+def owner_deltas(tx, owner):
+    """Balance-diff method restricted to one owner: mint -> (delta, decimals)."""
+    out = {}
+    for key, sign in (("preTokenBalances", -1), ("postTokenBalances", 1)):
+        for row in tx["meta"][key]:
+            if row["owner"] != owner:
+                continue
+            amt = row["uiTokenAmount"]
+            d, _ = out.get(row["mint"], (0, 0))
+            out[row["mint"]] = (d + sign * int(amt["amount"]), amt["decimals"])
+    return {m: d / 10 ** dec for m, (d, dec) in out.items()}
+
+
+def pre_balance(tx, owner, mint):
+    for row in tx["meta"]["preTokenBalances"]:
+        if row["owner"] == owner and row["mint"] == mint:
+            return int(row["uiTokenAmount"]["amount"])
+
+
+@pytest.mark.parametrize("name,side", [("pumpswap_buy_logs", "buy"), ("pumpswap_sell_cpi", "sell")])
+def test_events_match_balance_diff(name, side):
+    tx = load(name)
+    sig = tx["transaction"]["signatures"][0]
+
+    events = events_from_tx(tx)
+    assert len(events) == 1
+    ev = events[0]
+    assert ev.side == side and ev.timestamp == tx["blockTime"]
+
+    reg = PoolRegistry()
+    assert reg.learn_from_tx(tx) == 1
+    pool = reg.get(ev.pool)
+    trade = trade_from_event(ev, pool, sig)
+
+    user = owner_deltas(tx, ev.user)
+    assert trade.mint == pool.base_mint and trade.quote_mint == pool.quote_mint
+    assert trade.token_delta == pytest.approx(user[pool.base_mint])
+    assert trade.quote_delta == pytest.approx(user[pool.quote_mint])
+    assert (trade.token_delta > 0) == (side == "buy")
+    # reserves in the event are the pool's balances before the swap
+    assert ev.pool_base_reserves == pre_balance(tx, ev.pool, pool.base_mint)
+    assert ev.pool_quote_reserves == pre_balance(tx, ev.pool, pool.quote_mint)
+
+
+def test_events_from_logs_only_in_pumpswap_frames():
+    tx = load("pumpswap_buy_logs")
+    logs = tx["meta"]["logMessages"]
+    assert len(events_from_logs(logs)) == 1
+
+    # the same payload logged by another program is ignored
+    other = [line.replace(PUMPSWAP_PROGRAM_ID, "SomeOtherProgram11111111111111111111111111") for line in logs]
+    assert events_from_logs(other) == []
+    # non-swap events and garbage are ignored
+    assert decode_swap_event(b"\x00" * 400) is None
+    assert events_from_logs([f"Program {PUMPSWAP_PROGRAM_ID} invoke [1]", "Program data: !!notbase64"]) == []
+
+
+def test_encode_decode_roundtrip():
+    ev = events_from_tx(load("pumpswap_sell_cpi"))[0]
+    assert decode_swap_event(encode_swap_event(ev)) == ev
+    assert decode_swap_event(encode_swap_event(ev)[:-40]) is None
+
+
+def test_trade_from_events_nets_one_transaction():
+    from dataclasses import replace
+
+    from pumpswap_events import PoolInfo, trade_from_events
+
+    ev = events_from_tx(load("pumpswap_buy_logs"))[0]
+    pool = PoolInfo(base_mint="BASE", quote_mint="QUOTE", base_decimals=6, quote_decimals=9)
+    one = trade_from_events([(ev, pool)], "S")
+    assert one == trade_from_event(ev, pool, "S")
+
+    # two buys and a smaller sell net into one trade with the summed amounts
+    sell = replace(ev, side="sell", base_amount=ev.base_amount // 2, quote_amount=ev.quote_amount // 3)
+    trade = trade_from_events([(ev, pool), (ev, pool), (sell, pool)], "S")
+    assert trade.signature == "S" and trade.mint == "BASE"
+    assert trade.token_delta_raw == 2 * ev.base_amount - ev.base_amount // 2
+    assert trade.quote_delta_raw == -2 * ev.quote_amount + ev.quote_amount // 3
+
+    # other pairs, or no net base change, are left to the balance changes
+    other = PoolInfo(base_mint="OTHER", quote_mint="QUOTE", base_decimals=6, quote_decimals=9)
+    assert trade_from_events([(ev, pool), (ev, other)], "S") is None
+    assert trade_from_events([(ev, pool), (replace(ev, side="sell"), pool)], "S") is None
+
+
+class FakeAccountsClient:
+    def __init__(self, data_by_key):
+        self.data_by_key = data_by_key
+
+    def get_multiple_accounts(self, pubkeys):
+        keys = [str(k) for k in pubkeys]
+        vals = [SimpleNamespace(data=[base64.b64encode(self.data_by_key[k]).decode()]) if k in self.data_by_key else None for k in keys]
+        return SimpleNamespace(value=vals)
+
+
+def test_pool_registry_fetch():
+    pool, base, quote = (str(Pubkey.new_unique()) for _ in range(3))
+    pool_raw = bytes(8 + 1 + 2 + 32) + bytes(Pubkey.from_string(base)) + bytes(Pubkey.from_string(quote)) + bytes(64)
+
+    def mint_raw(decimals):
+        return bytes(44) + bytes([decimals]) + bytes(37)
+
+    client = FakeAccountsClient({pool: pool_raw, base: mint_raw(6), quote: mint_raw(9)})
+    reg = PoolRegistry()
+
+    assert reg.fetch(client, [pool, str(Pubkey.new_unique())]) == 1
+    assert reg.get(pool) == PoolInfo(base, quote, 6, 9)
+    assert reg.fetch(client, [pool]) == 0
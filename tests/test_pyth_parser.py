@@ -14,11 +14,48 @@ def test_parse_roundtrip():
     assert parsed['price'] == 123456789
     assert parsed['expo'] == -6
     assert parsed['conf'] == 1000
+    assert pyth_parser.parse_price(raw_bytes) == (123456789, -6)
     # computed float price
     computed = float(parsed['price']) * (10 ** parsed['expo'])
     assert abs(computed - 123.456789) < 1e-9
 
 
+def test_parse_v2_price_account():
+    keys = [bytes([i]) * 32 for i in range(1, 4)]
+    raw_bytes = pyth_parser.make_v2_price_account_bytes(
+        price=6_512_345, expo=-5, conf=120, valid_slot=7, publish_slot=9, ema_price=6_500_000, ema_conf=150,
+        timestamp=1_700_000_000, components=[(k, 6_512_000 + i, 100 + i) for i, k in enumerate(keys)],
+    )
+    assert len(raw_bytes) == 3312
+    parsed = pyth_parser.parse_price_account(raw_bytes, components=True)
+    assert (parsed['version'], parsed['type']) == (2, 3)
+    assert (parsed['price'], parsed['expo'], parsed['conf'], parsed['status']) == (6_512_345, -5, 120, 1)
+    assert (parsed['valid_slot'], parsed['publish_slot'], parsed['timestamp']) == (7, 9, 1_700_000_000)
+    assert (parsed['ema_price'], parsed['ema_conf'], parsed['num_components']) == (6_500_000, 150, 3)
+    assert [c['publisher'] for c in parsed['components']] == keys
+    assert [(c['price'], c['conf'], c['publish_slot']) for c in parsed['components']] == [
+        (6_512_000, 100, 9), (6_512_001, 101, 9), (6_512_002, 102, 9)]
+    assert 'components' not in pyth_parser.parse_price_account(raw_bytes)
+    assert pyth_parser.parse_price(raw_bytes) == (6_512_345, -5)
+    # the aggregate price, not a heuristic guess
+    assert rpc.decode_pyth_price(raw_bytes) == 6_512_345 * 10 ** -5
+
+    # truncated account, unknown version / account type
+    assert pyth_parser.parse_price_account(raw_bytes[:200]) is None
+    assert pyth_parser.parse_price(raw_bytes[:200]) is None
+    assert pyth_parser.parse_price_account(raw_bytes[:4] + b"\x03" + raw_bytes[5:]) is None
+    assert pyth_parser.parse_price_account(raw_bytes[:8] + b"\x01" + raw_bytes[9:]) is None
+
+
+def test_v2_price_requires_trading_status():
+    raw_bytes = pyth_parser.make_v2_price_account_bytes(price=6_512_345, expo=-5, conf=120, status=0)
+
+    assert pyth_parser.parse_price_account(raw_bytes)['status'] == 0
+    assert pyth_parser.parse_price(raw_bytes) is None
+    # a halted feed is not guessed at by the heuristic scan either
+    assert rpc.decode_pyth_price(raw_bytes) is None
+
+
 def test_rpc_integration_with_local_parser():
     # Build a pyth-like account and encode in base64 as RPC returns
     raw_bytes = pyth_parser.make_price_account_bytes(price=2500000000, expo=-8, conf=5000)
@@ -40,3 +77,29 @@ def test_rpc_integration_with_local_parser():
     assert price is not None
     # expected price = 2500000000 * 1e-8 = 25.0
     assert abs(price - 25.0) < 1e-9
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_heuristic_scan_matches_reference(monkeypatch, use_numpy):
+    import random
+    import struct
+
+    if not use_numpy:
+        monkeypatch.setattr(rpc, "np", None)
+    elif rpc.np is None:
+        pytest.skip("numpy not installed")
+
+    rng = random.Random(5)
+    accounts = [b"", b"\x00" * 7, bytes(3312), bytes(rng.getrandbits(8) for _ in range(3312))]
+    for _ in range(200):
+        b = bytearray(rng.choice([12, 64, 300]))
+        for _ in range(rng.randint(0, 5)):
+            struct.pack_into("<q", b, rng.randrange(len(b) - 7), rng.choice([rng.randint(-2**63, 2**63 - 1), rng.randint(1, 10**13)]))
+            struct.pack_into("<i", b, rng.randrange(len(b) - 3), rng.randint(-25, 12))
+        accounts.append(bytes(b))
+    found = 0
+    for raw in accounts:
+        expected = rpc._scan_pyth_price_py(raw)
+        assert rpc._scan_pyth_price(raw) == expected
+        found += expected is not None
+    assert found > 50
@@ -1,3 +1,6 @@
+import pytest
+
+import realtime
 from realtime import InMemoryIndexer
 from parse import Trade
 
@@ -17,3 +20,209 @@ def test_realtime_windows_simple():
     assert vols["1m"] == 2.0
     assert vols["5m"] == 5.0
     assert vols["15m"] == 5.0
+
+
+def _reference(trades, now, price=None, pruned_before=None):
+    # Straight scan with the original get_volumes semantics
+    from metrics import STABLECOIN_MINTS
+    from realtime import WINDOWS
+
+    tok = {k: 0.0 for k in WINDOWS}
+    usd = {k: {"token": 0.0, "usd": 0.0} for k in WINDOWS}
+    for t in trades:
+        age = now - t.ts
+        if age < 0 or age > 3600:
+            continue
+        if pruned_before is not None and t.ts < pruned_before:
+            continue
+        amt = abs(t.token_delta)
+        for label, secs in WINDOWS.items():
+            if age <= secs:
+                tok[label] += amt
+                added = 0.0
+                if t.price is not None and t.quote_mint in STABLECOIN_MINTS:
+                    added = amt * abs(t.price)
+                    usd[label]["token"] += amt
+                    usd[label]["usd"] += added
+                if added == 0.0 and price is not None:
+                    usd[label]["token"] += amt
+                    usd[label]["usd"] += amt * abs(price)
+    return tok, usd
+
+
+class FixedPriceCache:
+    def __init__(self, price):
+        self.price = price
+        self.calls = 0
+
+    def get(self, mint):
+        self.calls += 1
+        return self.price
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_running_sums_match_full_scan(monkeypatch, use_numpy):
+    import random
+
+    if not use_numpy:
+        monkeypatch.setattr(realtime, "np", None)
+    elif realtime.np is None:
+        pytest.skip("numpy not installed")
+
+    from metrics import STABLECOIN_MINTS
+
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    rng = random.Random(11)
+    idx = InMemoryIndexer(price_cache=FixedPriceCache(0.5))
+    trades = []
+    now = 1_700_000_000
+    # Like the deque version, anything older than the largest window as of
+    # the latest add/read is dropped.
+    horizon = 0
+    for step in range(3000):
+        now += rng.randint(0, 5)
+        # mostly in order, sometimes late or slightly in the future
+        ts = now + rng.choice([0, 0, 0, -rng.randint(1, 200), rng.randint(1, 20)])
+        t = Trade(
+            signature=f"R{step}",
+            ts=ts,
+            mint="MINTR",
+            token_delta=float(rng.randint(-100, 100)),
+            quote_mint=rng.choice([usdc, "SOL"]),
+            price=rng.choice([None, 0.25, 2.0]),
+        )
+        trades.append(t)
+        idx.add_trade(t)
+        horizon = max(horizon, ts)
+        if step % 37 == 0:
+            # reads jump ahead and then back again
+            newest = max(x.ts for x in trades)
+            for q in (newest + rng.randint(0, 90), newest):
+                horizon = max(horizon, q)
+                tok, usd = _reference(trades, q, price=0.5, pruned_before=horizon - 3600)
+                assert idx.get_volumes("MINTR", now_ts=q) == tok
+                assert idx.get_volumes("MINTR", now_ts=q, return_usd=True) == usd
+
+
+def test_get_volumes_calls_price_cache_once():
+    cache = FixedPriceCache(2.0)
+    idx = InMemoryIndexer(price_cache=cache)
+    now = 1_700_000_000
+    for i in range(50):
+        idx.add_trade(Trade(signature=f"P{i}", ts=now - i, mint="MINTP", token_delta=1.0))
+
+    vols = idx.get_volumes("MINTP", now_ts=now, return_usd=True)
+    assert cache.calls == 1
+    assert vols["1h"] == {"token": 50.0, "usd": 100.0}
+    assert idx.latest_ts("MINTP") == now
+
+
+def test_columns_intern_quote_mints():
+    idx = InMemoryIndexer()
+    now = 1_700_000_000
+    for i in range(10):
+        for m in ("M1", "M2"):
+            idx.add_trade(Trade(signature=f"{m}{i}", ts=now + i, mint=m, token_delta=1.0, quote_mint="SOL", price=None))
+
+    assert idx.quotes.names == [None, "SOL"]
+    mw = idx.mints["M1"]
+    assert len(mw) == 10
+    assert list(mw.quote) == [1] * 10
+    assert mw.ts.itemsize == 8 and mw.delta.typecode == "d"
+
+
+def test_bucketed_matches_rolling_indexer():
+    import random
+
+    from realtime import BucketedIndexer
+
+    rng = random.Random(5)
+    rolling, bucketed = InMemoryIndexer(), BucketedIndexer()
+    now = 1_700_000_000
+    for step in range(2000):
+        now += rng.randint(0, 4)
+        # a few late trades inside the short windows
+        ts = now - rng.choice([0, 0, 0, rng.randint(1, 30)])
+        t = Trade(signature=f"B{step}", ts=ts, mint=rng.choice(["M1", "M2", "M3"]), token_delta=float(rng.randint(-50, 50)))
+        rolling.add_trade(t)
+        bucketed.add_trade(t)
+        if step % 50 == 0:
+            for mint in ("M1", "M2", "M3"):
+                a = rolling.get_volumes(mint, now_ts=now)
+                b = bucketed.get_volumes(mint, now_ts=now)
+                assert a["1m"] == b["1m"] and a["5m"] == b["5m"]
+                # minute resolution: never more than the exact value
+                assert b["1h"] <= a["1h"]
+
+
+def test_bucketed_long_windows_use_minute_buckets():
+    from realtime import BucketedIndexer
+
+    idx = BucketedIndexer()
+    now = 1_700_000_020  # 40s into a minute
+    idx.add_trade(Trade(signature="A", ts=now - 3600 + 10, mint="M", token_delta=1.0))
+    idx.add_trade(Trade(signature="B", ts=now - 3600 + 30, mint="M", token_delta=2.0))
+    idx.add_trade(Trade(signature="C", ts=now, mint="M", token_delta=4.0))
+
+    vols = idx.get_volumes("M", now_ts=now)
+    # A sits in the minute that started 3640s ago, which is only partly
+    # inside the hour, so that bucket is not counted; B's minute started
+    # 3580s ago
+    assert vols["1h"] == 6.0
+    assert vols["1m"] == 4.0
+
+
+def test_bucketed_evicts_idle_mints():
+    from realtime import BucketedIndexer
+
+    idx = BucketedIndexer()
+    now = 1_700_000_000
+    idx.add_trade(Trade(signature="I", ts=now, mint="IDLE", token_delta=1.0))
+    for i in range(0, 3700, 50):
+        idx.add_trade(Trade(signature=f"H{i}", ts=now + i, mint="HOT", token_delta=1.0))
+
+    assert idx.latest_ts("IDLE") is None
+    assert len(idx) == 1 and idx.evicted == 1
+    assert all("IDLE" not in t for t in idx.totals)
+    # old buckets were dropped as the clock moved on
+    assert min(idx.seconds) >= idx.now - 300
+    assert min(idx.minutes) >= (idx.now - 3600) // 60
+
+
+def test_bucketed_top_mints():
+    from metrics import STABLECOIN_MINTS
+    from realtime import BucketedIndexer
+
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    idx = BucketedIndexer()
+    now = 1_700_000_000
+    idx.add_trade(Trade(signature="a", ts=now - 200, mint="OLD", token_delta=1000.0, quote_mint=usdc, price=1.0))
+    idx.add_trade(Trade(signature="b", ts=now - 10, mint="X", token_delta=10.0, quote_mint=usdc, price=2.0))
+    idx.add_trade(Trade(signature="c", ts=now - 5, mint="Y", token_delta=30.0, quote_mint=usdc, price=0.1))
+    idx.add_trade(Trade(signature="d", ts=now, mint="Z", token_delta=5.0))
+
+    assert idx.top_mints("1m", k=2, now_ts=now) == [("Y", 30.0), ("X", 10.0)]
+    assert idx.top_mints("1m", k=2, by="usd", now_ts=now) == [("X", 20.0), ("Y", 3.0)]
+    assert idx.top_mints("5m", k=1, by="usd", now_ts=now) == [("OLD", 1000.0)]
+    with pytest.raises(ValueError):
+        idx.top_mints("2m")
+
+
+def test_bucketed_top_mints_follow_expiry_and_eviction():
+    import random
+
+    from realtime import BucketedIndexer
+
+    rng = random.Random(5)
+    idx = BucketedIndexer()
+    now = 1_700_000_000
+    for step in range(40):
+        now += rng.randint(1, 20)
+        for _ in range(rng.randint(0, 15)):
+            mint = f"M{rng.randrange(30)}"
+            idx.add_trade(Trade(signature="s", ts=now - rng.randint(0, 30), mint=mint, token_delta=rng.uniform(-9, 9)))
+        if step % 3 == 0:
+            for window, w in (("1m", 0), ("1h", 3)):
+                got = idx.top_mints(window, k=5, now_ts=now)
+                # the heap ranking matches a full scan of the window's totals
+                assert got == sorted(((m, s[0]) for m, s in idx.totals[w].items()), key=lambda r: -r[1])[:5]
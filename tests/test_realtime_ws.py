@@ -0,0 +1,248 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from solders.signature import Signature
+from websockets.asyncio.server import serve
+
+from parse import PUMPSWAP_PROGRAM_ID, WSOL_MINT
+from realtime import InMemoryIndexer
+from realtime_ws import PumpSwapSubscriber
+from store import get_trades_for_mint, init_db
+
+MINT = "MINTWS"
+QUOTE = WSOL_MINT
+
+
+def notification(sig, err=None, logs=None):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {
+            "subscription": 1,
+            "result": {"context": {"slot": 1}, "value": {"signature": sig, "err": err, "logs": logs or []}},
+        },
+    })
+
+
+def swap_tx(i):
+    return {
+        "blockTime": 1_700_000_000 + i,
+        "transaction": {"message": {"instructions": [{"programId": PUMPSWAP_PROGRAM_ID}]}},
+        "meta": {
+            "preTokenBalances": [
+                {"mint": MINT, "uiTokenAmount": {"uiAmount": 100.0}},
+                {"mint": QUOTE, "uiTokenAmount": {"uiAmount": 50.0}},
+            ],
+            "postTokenBalances": [
+                {"mint": MINT, "uiTokenAmount": {"uiAmount": 101.0}},
+                {"mint": QUOTE, "uiTokenAmount": {"uiAmount": 48.0}},
+            ],
+        },
+    }
+
+
+class FakeTx:
+    def __init__(self, tx):
+        self.tx = tx
+
+    def to_json(self):
+        return json.dumps(self.tx)
+
+
+class FakeAsyncClient:
+    """Async getTransaction with a fixed latency; tracks concurrency.
+
+    Like a real node, a just-notified transaction is only visible at
+    `confirmed`: other commitments get a null result.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.txs = {}
+
+    async def get_transaction(self, sig, encoding=None, commitment=None, max_supported_transaction_version=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            if commitment != "confirmed":
+                return SimpleNamespace(value=None)
+            return SimpleNamespace(value=FakeTx(self.txs[str(sig)]))
+        finally:
+            self.active -= 1
+
+
+class FakeRawProvider:
+    """Raw getTransaction responses; null unless the request asks for `confirmed`."""
+
+    def __init__(self, txs):
+        self.txs = txs
+        self.commitments = []
+
+    async def make_request_unparsed(self, req):
+        body = json.loads(req.to_json())
+        commitment = body["params"][1].get("commitment")
+        self.commitments.append(commitment)
+        result = self.txs.get(body["params"][0]) if commitment == "confirmed" else None
+        return json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+
+def _sigs(client, n):
+    sigs = [str(Signature.new_unique()) for _ in range(n)]
+    for i, s in enumerate(sigs):
+        client.txs[s] = swap_tx(i)
+    return sigs
+
+
+async def _run(sub, messages, until, timeout=30.0):
+    """Serve `messages` on a local websocket and run `sub` until `until()`."""
+    subscribed = []
+
+    async def handler(ws):
+        subscribed.append(json.loads(await ws.recv()))
+        for m in messages:
+            await ws.send(m)
+        await ws.wait_closed()
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        sub.ws_url = f"ws://127.0.0.1:{port}"
+        task = asyncio.create_task(sub.run())
+        start = time.monotonic()
+        while not until() and time.monotonic() - start < timeout:
+            await asyncio.sleep(0.01)
+        sub.stop()
+        await task
+    return subscribed
+
+
+def test_pipeline_ingests_thousands_of_notifications(tmp_path):
+    client = FakeAsyncClient(latency=0.005)
+    sigs = _sigs(client, 2000)
+    db = init_db(str(tmp_path / "ws.db"))
+    indexer = InMemoryIndexer()
+    sub = PumpSwapSubscriber(client=client, db=db, indexer=indexer, workers=64)
+
+    start = time.monotonic()
+    subscribed = asyncio.run(_run(sub, [notification(s) for s in sigs], lambda: sub.stats.saved == len(sigs)))
+    rate = len(sigs) / (time.monotonic() - start)
+
+    assert subscribed[0]["method"] == "logsSubscribe"
+    assert subscribed[0]["params"][0] == {"mentions": [sub.program_id]}
+    assert sub.stats.saved == len(sigs) and sub.stats.fetched == len(sigs)
+    assert sub.stats.batches < len(sigs)
+    assert client.max_active > 1
+    assert rate > 500
+    assert len(get_trades_for_mint(db, MINT)) == len(sigs)
+    assert indexer.latest_ts(MINT) == 1_700_000_000 + len(sigs) - 1
+    # the writer prunes 1s rollups, and these trades are long past retention
+    assert sub.stats.pruned_buckets > 0
+
+
+def test_slow_rpc_does_not_stall_reader(tmp_path):
+    client = FakeAsyncClient(latency=0.1)
+    sigs = _sigs(client, 60)
+    sub = PumpSwapSubscriber(client=client, db=init_db(str(tmp_path / "ws.db")), indexer=InMemoryIndexer(), workers=3)
+    seen = {}
+
+    def read_all():
+        if sub.stats.received == len(sigs) and "fetched" not in seen:
+            seen["fetched"] = sub.stats.fetched
+        return sub.stats.saved == len(sigs)
+
+    asyncio.run(_run(sub, [notification(s) for s in sigs], read_all))
+
+    # every notification was read while most fetches were still pending
+    assert seen["fetched"] < 10
+    assert sub.stats.queue_high_water > 30
+    assert sub.stats.saved == len(sigs)
+    assert sub.stats.max_lag >= 0.1
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    client = FakeAsyncClient(latency=0.05)
+    sigs = _sigs(client, 50)
+    sub = PumpSwapSubscriber(
+        client=client, db=init_db(str(tmp_path / "ws.db")), indexer=InMemoryIndexer(),
+        workers=1, queue_size=5, drop_when_full=True,
+    )
+
+    asyncio.run(_run(sub, [notification(s) for s in sigs], lambda: sub.stats.received == len(sigs), timeout=5))
+
+    st = sub.stats
+    assert st.dropped > 0
+    assert st.enqueued + st.dropped == len(sigs)
+    # whatever was queued is drained before run() returns
+    assert st.saved == st.enqueued
+
+
+def test_prefilter_skips_failed_and_non_swap(tmp_path):
+    from test_parse import swap_logs
+
+    client = FakeAsyncClient()
+    sigs = _sigs(client, 40)
+    msgs = []
+    for i, s in enumerate(sigs):
+        if i % 4 == 0:
+            msgs.append(notification(s, logs=swap_logs("Buy")))
+        elif i % 4 == 1:
+            msgs.append(notification(s, err={"InstructionError": [2, {"Custom": 6001}]}, logs=swap_logs("Sell")))
+        elif i % 4 == 2:
+            msgs.append(notification(s, logs=swap_logs("Withdraw")))
+        else:
+            msgs.append(notification(s, logs=swap_logs("Sell")))
+    sub = PumpSwapSubscriber(client=client, db=init_db(str(tmp_path / "ws.db")), indexer=InMemoryIndexer())
+
+    asyncio.run(_run(sub, msgs, lambda: sub.stats.received == len(sigs) and sub.stats.saved == 20, timeout=5))
+
+    st = sub.stats
+    assert st.skipped_failed == 10 and st.skipped_no_swap == 10
+    assert st.fetches_avoided == 20
+    assert client.calls == 20 and st.saved == 20
+
+
+def test_known_pools_decode_trades_from_logs(tmp_path):
+    from pumpswap_events import PoolRegistry
+    from test_pumpswap_events import load
+
+    tx = load("pumpswap_buy_logs")
+    logs = tx["meta"]["logMessages"]
+    client = FakeAsyncClient()
+    first, second = (str(Signature.new_unique()) for _ in range(2))
+    client.txs[first] = tx
+    db = init_db(str(tmp_path / "ws.db"))
+    sub = PumpSwapSubscriber(client=client, db=db, indexer=InMemoryIndexer(), pools=PoolRegistry())
+
+    # unknown pool: fetched once, which teaches the registry the pool
+    asyncio.run(_run(sub, [notification(first, logs=logs)], lambda: len(sub.pools.pools) == 1, timeout=5))
+    assert client.calls == 1
+    # the same pool again is decoded from the notification alone
+    asyncio.run(_run(sub, [notification(second, logs=logs)], lambda: sub.stats.saved == 1, timeout=5))
+
+    assert client.calls == 1
+    assert sub.stats.decoded_from_logs == 1 and sub.stats.fetches_avoided == 1
+    (pool,) = sub.pools.pools.values()
+    (trade,) = get_trades_for_mint(db, pool.base_mint)
+    assert trade.signature == second
+    assert trade.ts == tx["blockTime"] and trade.token_delta > 0
+
+
+def test_fetches_transactions_at_confirmed_commitment(tmp_path):
+    provider = FakeRawProvider({})
+    sigs = _sigs(SimpleNamespace(txs=provider.txs), 20)
+    typed = FakeAsyncClient()
+    typed_sigs = _sigs(typed, 20)
+    for client, batch in ((SimpleNamespace(_provider=provider), sigs), (typed, typed_sigs)):
+        sub = PumpSwapSubscriber(
+            client=client, db=init_db(str(tmp_path / "ws.db")), indexer=InMemoryIndexer(), max_retries=1
+        )
+        asyncio.run(_run(sub, [notification(s) for s in batch], lambda sub=sub, n=len(batch): sub.stats.saved == n, timeout=5))
+
+        assert sub.stats.fetched == len(batch) and sub.stats.missing == 0
+    assert set(provider.commitments) == {"confirmed"}
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+from solders.signature import Signature
+from websockets.asyncio.server import serve
+
+from realtime import InMemoryIndexer
+from replay import CorpusWriter, read_corpus, record_ws, replay, synthesize
+from store import init_db
+from test_parse import swap_logs
+from test_realtime_ws import notification, swap_tx
+
+
+def test_synthetic_corpus_replays_offline(tmp_path):
+    path = str(tmp_path / "corpus.jsonl.gz")
+    assert synthesize(path, n=200, mints=5, seed=1) == 200
+    db = init_db(str(tmp_path / "replay.db"))
+    indexer = InMemoryIndexer()
+
+    report = replay(path, db=db, indexer=indexer)
+
+    assert report.notifications == 200 and report.txs == 200 and report.skipped == 0
+    assert report.trades >= 200 and report.saved == 200
+    assert db.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 200
+    assert len(indexer.mints) > 0
+    summary = report.stage_summary()
+    assert set(summary) == {"prefilter", "parse", "store", "index"}
+    assert summary["parse"]["count"] == 200
+    assert 0 <= summary["parse"]["p50"] <= summary["parse"]["p99"]
+    assert report.tx_per_sec > 0
+
+
+def test_recorded_records_and_prefilter(tmp_path):
+    path = str(tmp_path / "rec.jsonl.gz")
+    with CorpusWriter(path) as out:
+        out.write_notification({"signature": "S1", "err": None, "logs": swap_logs("Buy")}, t=0.0)
+        out.write_notification({"signature": "S2", "err": {"InstructionError": [0, "x"]}, "logs": swap_logs("Sell")}, t=0.0)
+        out.write_notification({"signature": "S3", "err": None, "logs": swap_logs("Withdraw")}, t=0.0)
+        for i, sig in enumerate(("S1", "S2", "S3")):
+            out.write_tx(sig, swap_tx(i), t=0.0)
+        # backfilled for one mint, no notification
+        out.write_tx("S4", swap_tx(4), mint="MINTWS", t=0.0)
+
+    assert [r["kind"] for r in read_corpus(path)] == ["notification"] * 3 + ["tx"] * 4
+    report = replay(path, batch_size=10)
+
+    assert report.notifications == 3 and report.skipped == 2
+    # S1 yields its base-mint trade, S4 the recorded mint
+    assert report.txs == 2 and report.trades == 2
+
+
+def test_realtime_pace_follows_offsets(tmp_path):
+    path = str(tmp_path / "paced.jsonl.gz")
+    with CorpusWriter(path) as out:
+        for i in range(3):
+            out.write_tx(f"S{i}", swap_tx(i), t=0.1 * i)
+
+    start = time.monotonic()
+    replay(path, pace="realtime", speed=2.0)
+    elapsed = time.monotonic() - start
+
+    # last record at t=0.2 replayed at 2x speed
+    assert 0.1 <= elapsed < 1.0
+
+
+def test_record_ws_fetches_at_confirmed_and_reports_drops(tmp_path, monkeypatch, caplog):
+    import rpc
+
+    sigs = [str(Signature.new_unique()) for _ in range(3)]
+    # the last signature has no transaction yet
+    txs = {s: swap_tx(i) for i, s in enumerate(sigs[:2])}
+    commitments = []
+
+    def make_request_unparsed(req):
+        body = json.loads(req.to_json())
+        commitments.append(body["params"][1].get("commitment"))
+        result = txs.get(body["params"][0]) if commitments[-1] == "confirmed" else None
+        return json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+    provider = SimpleNamespace(make_request_unparsed=make_request_unparsed)
+    monkeypatch.setattr(rpc, "get_client", lambda url: SimpleNamespace(_provider=provider))
+
+    async def handler(ws):
+        await ws.recv()
+        for s in sigs:
+            await ws.send(notification(s))
+        await ws.wait_closed()
+
+    async def run():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            return await record_ws(path, url, "http://rpc.invalid", seconds=0.3, workers=2)
+
+    path = str(tmp_path / "ws.jsonl.gz")
+    with caplog.at_level(logging.WARNING, logger="replay"):
+        assert asyncio.run(run()) == 5
+
+    assert set(commitments) == {"confirmed"}
+    assert [r["signature"] for r in read_corpus(path) if r["kind"] == "tx"] == sigs[:2]
+    assert "no transaction for 1 of 3 signatures" in caplog.text
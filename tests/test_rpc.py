@@ -0,0 +1,286 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from solana.exceptions import SolanaRpcException
+from solders.signature import Signature
+
+import rpc
+
+
+class FakeTx:
+    def __init__(self, sig):
+        self.sig = sig
+
+    def to_json(self):
+        return json.dumps({"blockTime": 1_700_000_000, "sig": self.sig})
+
+
+class FakeClient:
+    """Fake RPC client injecting latency and a number of 429s per signature."""
+
+    def __init__(self, latency=0.02, failures=None):
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_transaction(self, sig, encoding=None, commitment=None, max_supported_transaction_version=None):
+        s = str(sig)
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            with self._lock:
+                if self.failures.get(s, 0) > 0:
+                    self.failures[s] -= 1
+                    raise SolanaRpcException(Exception("429 Too Many Requests"), None, None, "getTransaction")
+            return SimpleNamespace(value=FakeTx(s))
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _sigs(n):
+    return [str(Signature.new_unique()) for _ in range(n)]
+
+
+def test_fetch_txs_ordered_and_concurrent():
+    sigs = _sigs(20)
+    client = FakeClient(latency=0.02, failures={sigs[0]: 2, sigs[5]: 1})
+    stats = rpc.FetchStats()
+
+    out = list(rpc.fetch_txs(client, sigs, workers=5, backoff_base=0.01, stats=stats))
+
+    assert [s for s, _ in out] == sigs
+    assert all(tx["sig"] == s for s, tx in out)
+    assert client.max_active > 1
+    assert stats.fetched == 20
+    assert stats.retries == 3
+    assert stats.failed == 0
+    assert stats.tx_per_sec > 0
+
+
+def test_fetch_txs_retry_does_not_block_others():
+    sigs = _sigs(6)
+    client = FakeClient(latency=0.0, failures={sigs[0]: 1})
+    seen = []
+
+    # While sigs[0] waits out its backoff the other signatures must still be
+    # fetched, so by the time it is yielded every other call has completed.
+    for sig, tx in rpc.fetch_txs(client, sigs, workers=2, backoff_base=0.2):
+        seen.append((sig, client.calls))
+
+    assert seen[0][0] == sigs[0]
+    assert seen[0][1] == len(sigs) + 1
+
+
+def test_fetch_txs_gives_up_after_max_retries():
+    sigs = _sigs(3)
+    client = FakeClient(latency=0.0, failures={sigs[1]: 10})
+    stats = rpc.FetchStats()
+
+    out = dict(rpc.fetch_txs(client, sigs, workers=2, max_retries=3, backoff_base=0.001, stats=stats))
+
+    assert out[sigs[1]] is None
+    assert out[sigs[0]] is not None and out[sigs[2]] is not None
+    assert stats.failed == 1
+    assert stats.retries == 2
+
+
+def test_fetch_txs_does_not_retry_bad_signatures_or_unexpected_errors():
+    sigs = _sigs(4)
+    provider = FakeProvider()
+    client = SimpleNamespace(_provider=provider)
+    stats = rpc.FetchStats()
+
+    out = list(rpc.fetch_txs(client, sigs[:1] + ["not-a-signature"] + sigs[1:], batch_size=2, backoff_base=10, stats=stats))
+
+    # the bad signature fails at once and does not take its batch with it
+    assert out[1] == ("not-a-signature", None)
+    assert [tx["sig"] for _, tx in out[:1] + out[2:]] == sigs
+    assert [len(p) for p in provider.posts] == [1, 2, 1]
+    assert (stats.failed, stats.retries) == (1, 0)
+
+    class BrokenClient(FakeClient):
+        def get_transaction(self, sig, **kwargs):
+            if str(sig) == sigs[2]:
+                raise TypeError("unexpected response shape")
+            return super().get_transaction(sig, **kwargs)
+
+    client = BrokenClient(latency=0.0)
+    stats = rpc.FetchStats()
+    out = dict(rpc.fetch_txs(client, sigs, workers=2, backoff_base=10, stats=stats))
+
+    assert out[sigs[2]] is None and all(out[s] is not None for s in sigs if s != sigs[2])
+    assert (stats.failed, stats.retries) == (1, 0)
+
+
+def test_token_bucket_limits_rate():
+    sigs = _sigs(10)
+    client = FakeClient(latency=0.0)
+
+    start = time.monotonic()
+    list(rpc.fetch_txs(client, sigs, workers=4, rate=50, burst=1))
+    elapsed = time.monotonic() - start
+
+    # 1 token up front, then 9 more at 50/sec
+    assert elapsed >= 0.15
+
+
+class FakeProvider:
+    """Answers JSON-RPC batches; `errors` maps signature -> number of error entries."""
+
+    def __init__(self, errors=None):
+        self.errors = dict(errors or {})
+        self.posts = []
+
+    def make_batch_request_unparsed(self, reqs):
+        bodies = [json.loads(r.to_json()) for r in reqs]
+        self.posts.append([b["params"][0] for b in bodies])
+        out = []
+        for b in bodies:
+            sig = b["params"][0]
+            if self.errors.get(sig, 0) > 0:
+                self.errors[sig] -= 1
+                out.append({"jsonrpc": "2.0", "id": b["id"], "error": {"code": 429, "message": "Too many requests"}})
+            else:
+                out.append({"jsonrpc": "2.0", "id": b["id"], "result": {"blockTime": 1, "sig": sig}})
+        # Nodes may answer batch entries in any order
+        return json.dumps(list(reversed(out)))
+
+
+def test_fetch_txs_batches_split_and_retry_partial_failures():
+    sigs = _sigs(7)
+    provider = FakeProvider(errors={sigs[4]: 1})
+    client = SimpleNamespace(_provider=provider)
+
+    out = dict(rpc.fetch_txs(client, sigs, workers=1, batch_size=3, backoff_base=0.001))
+
+    assert sorted(out) == sorted(sigs)
+    assert all(out[s]["sig"] == s for s in sigs)
+    # 3 batches of <=3, then only the failed signature is retried
+    assert [len(p) for p in provider.posts] == [3, 3, 1, 1]
+    assert provider.posts[-1] == [sigs[4]]
+
+
+class FakeAccountsClient:
+    def __init__(self, data_by_key, fail_first=0):
+        self.data_by_key = data_by_key
+        self.fail_first = fail_first
+        self.calls = []
+
+    def get_multiple_accounts(self, pubkeys):
+        keys = [str(k) for k in pubkeys]
+        self.calls.append(keys)
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            raise SolanaRpcException(Exception("429"), None, None, "getMultipleAccounts")
+        vals = [SimpleNamespace(data=self.data_by_key[k]) if k in self.data_by_key else None for k in keys]
+        return SimpleNamespace(value=vals)
+
+
+def test_get_multiple_accounts_chunks_and_retries():
+    from solders.pubkey import Pubkey
+
+    keys = [str(Pubkey.new_unique()) for _ in range(5)]
+    client = FakeAccountsClient({k: bytes([i]) for i, k in enumerate(keys[:4])}, fail_first=1)
+
+    out = rpc.get_multiple_accounts(client, keys, chunk_size=2, backoff_base=0.001)
+
+    assert out[keys[0]] == b"\x00"
+    assert out[keys[3]] == b"\x03"
+    assert out[keys[4]] is None
+    # first chunk fails once and is retried alone, then two more chunks
+    assert [len(c) for c in client.calls] == [2, 2, 2, 1]
+
+
+def test_get_multiple_accounts_skips_invalid_pubkeys():
+    from solders.pubkey import Pubkey
+
+    keys = [str(Pubkey.new_unique()) for _ in range(3)]
+    client = FakeAccountsClient({k: b"\x01" for k in keys})
+
+    out = rpc.get_multiple_accounts(client, [keys[0], "not-a-pubkey", keys[1], keys[2]], chunk_size=2)
+
+    # the bad key maps to None without a retry and without nulling its chunk
+    assert list(out) == [keys[0], "not-a-pubkey", keys[1], keys[2]]
+    assert out["not-a-pubkey"] is None
+    assert all(out[k] == b"\x01" for k in keys)
+    assert client.calls == [keys[:2], keys[2:]]
+
+
+def test_get_prices_from_pyth_batch():
+    import pyth_parser
+    from solders.pubkey import Pubkey
+
+    a1, a2 = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    client = FakeAccountsClient({
+        a1: pyth_parser.make_price_account_bytes(price=2500000000, expo=-8, conf=1),
+        a2: pyth_parser.make_price_account_bytes(price=150, expo=-2, conf=1),
+    })
+
+    prices = rpc.get_prices_from_pyth(client, [a1, a2])
+
+    assert len(client.calls) == 1
+    assert abs(prices[a1] - 25.0) < 1e-9
+    assert abs(prices[a2] - 1.5) < 1e-9
+
+
+class FakeTxProvider:
+    """Answers single getTransaction requests with raw JSON text."""
+
+    def __init__(self, txs, errors=None):
+        self.txs = txs
+        self.errors = dict(errors or {})
+        self.calls = 0
+
+    def make_request_unparsed(self, req):
+        body = json.loads(req.to_json())
+        sig = body["params"][0]
+        self.calls += 1
+        if self.errors.get(sig, 0) > 0:
+            self.errors[sig] -= 1
+            return json.dumps({"jsonrpc": "2.0", "id": body["id"], "error": {"code": 429, "message": "Too many requests"}})
+        return json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": self.txs.get(sig)})
+
+
+def test_fetch_txs_decodes_raw_responses_and_retries_errors():
+    sigs = _sigs(3)
+    provider = FakeTxProvider({s: {"blockTime": i, "sig": s} for i, s in enumerate(sigs[:2])}, errors={sigs[0]: 1})
+    client = SimpleNamespace(_provider=provider)
+    stats = rpc.FetchStats()
+
+    out = dict(rpc.fetch_txs(client, sigs, workers=2, backoff_base=0.001, max_retries=3, stats=stats))
+
+    assert out[sigs[0]] == {"blockTime": 0, "sig": sigs[0]}
+    assert out[sigs[1]]["blockTime"] == 1
+    assert out[sigs[2]] is None
+    assert stats.retries >= 1
+
+
+def test_raw_and_typed_decodes_agree():
+    from solders.rpc.responses import GetTransactionResp
+
+    from parse import extract_trades_from_tx
+    from pumpswap_events import events_from_tx
+    from test_pumpswap_events import load
+
+    for name in ("pumpswap_buy_logs", "pumpswap_sell_cpi"):
+        raw = json.dumps({"jsonrpc": "2.0", "id": 0, "result": load(name)})
+        fast = rpc.decode_tx_response(raw)
+        typed = rpc.tx_to_dict(GetTransactionResp.from_json(raw).value, "SIG")
+
+        assert extract_trades_from_tx(fast, "SIG") == extract_trades_from_tx(typed, "SIG")
+        assert events_from_tx(fast) == events_from_tx(typed)
+
+
+def test_decode_tx_response_raises_rpc_error():
+    with pytest.raises(rpc.RpcError):
+        rpc.decode_tx_response('{"jsonrpc": "2.0", "id": 0, "error": {"code": -32005}}')
@@ -1,6 +1,6 @@
 import tempfile
 import os
-from store import init_db, save_trade, get_trades_for_mint, compute_volumes_sql
+from store import SCHEMA_VERSION, init_db, save_trade, get_trades_for_mint, compute_volumes_sql
 from parse import Trade
 
 
@@ -43,3 +43,316 @@ def test_compute_volumes_sql(tmp_path):
     # 15m includes t1,t2,t3? t3 at now-2000 (33m) -> excluded
     assert vols["15m"] == 5.0
     conn.close()
+
+
+def test_existing_signatures_and_seen(tmp_path):
+    from store import existing_signatures, mark_seen
+
+    conn = init_db(str(tmp_path / "seen.db"))
+    save_trade(conn, Trade(signature="S1", ts=1, mint="MINTX", token_delta=1.0))
+    mark_seen(conn, ["S2"], "MINTX")
+    mark_seen(conn, ["S3"], "OTHER")
+
+    assert existing_signatures(conn, ["S1", "S2", "S3", "S4"], "MINTX") == {"S1", "S2"}
+    # seen-but-not-a-trade is per mint
+    assert existing_signatures(conn, ["S1", "S2", "S3"], "OTHER") == {"S1", "S3"}
+    conn.close()
+
+
+def test_signature_index_filters_known(tmp_path):
+    from store import SignatureIndex, mark_seen
+
+    conn = init_db(str(tmp_path / "idx.db"))
+    for i in range(50):
+        save_trade(conn, Trade(signature=f"T{i}", ts=i, mint="MINTX", token_delta=1.0))
+    mark_seen(conn, [f"N{i}" for i in range(50)], "MINTX")
+
+    idx = SignatureIndex(conn, "MINTX")
+    candidates = [f"T{i}" for i in range(0, 60, 5)] + [f"N{i}" for i in range(45, 55)] + ["NEW1"]
+    new = idx.filter_new(candidates)
+    assert new == ["T50", "T55", "N50", "N51", "N52", "N53", "N54", "NEW1"]
+
+    mark_seen(conn, ["NEW1"], "MINTX")
+    idx.add(["NEW1"])
+    assert idx.filter_new(["NEW1"]) == []
+    conn.close()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    from store import BloomFilter
+
+    bf = BloomFilter(1000, fp_rate=0.01)
+    items = [f"sig{i}" for i in range(1000)]
+    for s in items:
+        bf.add(s)
+    assert all(s in bf for s in items)
+    fps = sum(1 for i in range(10000) if f"other{i}" in bf)
+    assert fps < 300
+
+
+def test_save_trades_batch_counts(tmp_path):
+    from store import save_trades
+
+    conn = init_db(str(tmp_path / "batch.db"), wal=True, synchronous="NORMAL")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    batch = [Trade(signature=f"B{i}", ts=1_700_000_000 + i, mint="MINTX", token_delta=1.0) for i in range(10)]
+    assert save_trades(conn, batch) == (10, 0)
+    # overlap of 5 existing + 3 new + 1 duplicate inside the batch
+    again = batch[5:] + [Trade(signature=f"C{i}", ts=1, mint="MINTX", token_delta=1.0) for i in range(3)] + [batch[0]]
+    assert save_trades(conn, again) == (3, 6)
+    assert len(get_trades_for_mint(conn, "MINTX")) == 13
+    conn.close()
+
+
+def test_init_db_rejects_bad_synchronous(tmp_path):
+    import pytest
+
+    with pytest.raises(ValueError):
+        init_db(str(tmp_path / "bad.db"), synchronous="sometimes")
+
+
+def _reference_volumes(conn, mint, now, stables):
+    # Per-window implementation compute_volumes_sql used to have
+    from store import WINDOWS
+
+    res = {}
+    for label, secs in WINDOWS.items():
+        rows = conn.execute("SELECT token_delta, price, quote_mint FROM trades WHERE mint = ? AND ts >= ?", (mint, now - secs)).fetchall()
+        token_total = usd_total = 0.0
+        for td, price, qm in rows:
+            token_total += abs(float(td))
+            if price is not None and qm in stables:
+                usd_total += abs(float(td)) * abs(float(price))
+        res[label] = {"token": token_total, "usd": usd_total}
+    return res
+
+
+def test_compute_volumes_sql_matches_per_window_reference(tmp_path):
+    import random
+
+    from metrics import STABLECOIN_MINTS
+    from store import save_trades
+
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    conn = init_db(str(tmp_path / "ref.db"))
+    now = 1_700_000_000
+    rng = random.Random(7)
+    trades = []
+    for i in range(2000):
+        quote = rng.choice([usdc, "So11111111111111111111111111111111111111112", None])
+        trades.append(Trade(
+            signature=f"R{i}",
+            ts=now - rng.randint(-10, 5000),
+            mint=rng.choice(["MINTX", "MINTY"]),
+            token_delta=rng.uniform(-1000, 1000),
+            quote_mint=quote,
+            price=rng.choice([None, rng.uniform(0.0001, 3.0)]),
+        ))
+    save_trades(conn, trades)
+
+    got = compute_volumes_sql(conn, "MINTX", now_ts=now, return_usd=True)
+    want = _reference_volumes(conn, "MINTX", now, STABLECOIN_MINTS)
+    for label in want:
+        assert abs(got[label]["token"] - want[label]["token"]) < 1e-6
+        assert abs(got[label]["usd"] - want[label]["usd"]) < 1e-6
+    assert want["1h"]["usd"] > 0
+    conn.close()
+
+
+def test_rollup_volumes_match_raw_trades(tmp_path):
+    import random
+
+    from metrics import STABLECOIN_MINTS
+    from store import save_trades
+
+    usdc = sorted(STABLECOIN_MINTS)[0]
+    conn = init_db(str(tmp_path / "rollup.db"))
+    rng = random.Random(3)
+    now = 1_700_000_037  # not on a minute boundary
+    trades = [
+        Trade(
+            signature=f"U{i}",
+            ts=now - rng.randint(-30, 4000),
+            mint="MINTX",
+            token_delta=rng.uniform(-50, 50),
+            quote_mint=rng.choice([usdc, "OTHER"]),
+            price=rng.choice([None, rng.uniform(0.1, 2.0)]),
+        )
+        for i in range(3000)
+    ]
+    save_trades(conn, trades[:1500])
+    # duplicates must not be counted twice in the rollups
+    save_trades(conn, trades[1000:])
+    for t in trades[:10]:
+        save_trade(conn, t)
+
+    for offset in (0, 1, 59, 61, 3599):
+        got = compute_volumes_sql(conn, "MINTX", now_ts=now + offset, return_usd=True)
+        want = compute_volumes_sql(conn, "MINTX", now_ts=now + offset, return_usd=True, use_rollups=False)
+        for label in want:
+            assert abs(got[label]["token"] - want[label]["token"]) < 1e-6
+            assert abs(got[label]["usd"] - want[label]["usd"]) < 1e-6
+    conn.close()
+
+
+def test_pruned_rollups_keep_window_volumes(tmp_path):
+    from store import ROLLUP_RETENTION, prune_rollups, save_trades
+
+    conn = init_db(str(tmp_path / "prune.db"))
+    now = 1_700_000_037
+    save_trades(conn, [
+        Trade(signature=f"P{i}", ts=now - i * 7, mint="MINTX", token_delta=1.0 + i, quote_mint="OTHER")
+        for i in range(1000)
+    ])
+    want = compute_volumes_sql(conn, "MINTX", now_ts=now, use_rollups=False)
+
+    assert prune_rollups(conn, now_ts=now, batch=100) > 0
+    oldest = conn.execute("SELECT MIN(bucket_ts) FROM volume_buckets WHERE resolution = 1").fetchone()[0]
+    assert oldest >= now - ROLLUP_RETENTION[1]
+    # 1m buckets are kept longer
+    assert conn.execute("SELECT MIN(bucket_ts) FROM volume_buckets WHERE resolution = 60").fetchone()[0] <= now - 6993
+    assert compute_volumes_sql(conn, "MINTX", now_ts=now) == want
+    plan = " ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT mint FROM volume_buckets WHERE resolution = 1 AND bucket_ts < ?", (now,)))
+    assert "idx_volume_buckets_res_ts" in plan
+
+    # 1m buckets go after their own retention
+    assert prune_rollups(conn, now_ts=now + ROLLUP_RETENTION[60] + 7000) > 0
+    assert conn.execute("SELECT COUNT(*) FROM volume_buckets").fetchone()[0] == 0
+    conn.close()
+
+
+def test_ohlcv_from_rollups(tmp_path):
+    from store import get_ohlcv
+
+    conn = init_db(str(tmp_path / "ohlcv.db"))
+    base = 1_700_000_040  # on a minute boundary
+    rows = [(base + 5, 2.0, 1.0), (base + 1, 1.0, 3.0), (base + 10, 3.0, None), (base + 15, 4.0, 0.5), (base + 70, 1.0, 9.0)]
+    for i, (ts, td, price) in enumerate(rows):
+        save_trade(conn, Trade(signature=f"O{i}", ts=ts, mint="MINTX", token_delta=td, quote_mint="Q", price=price))
+
+    candles = get_ohlcv(conn, "MINTX", resolution=60)
+    assert len(candles) == 2
+    first = candles[0]
+    assert first["ts"] == (base // 60) * 60
+    assert (first["open"], first["high"], first["low"], first["close"]) == (3.0, 3.0, 0.5, 0.5)
+    assert first["token_volume"] == 10.0
+    assert first["trade_count"] == 4
+    assert candles[1]["open"] == candles[1]["close"] == 9.0
+
+    # a rebuild from raw trades gives the same candles
+    from store import rebuild_rollups
+
+    rebuild_rollups(conn)
+    assert get_ohlcv(conn, "MINTX", resolution=60) == candles
+    conn.close()
+
+
+def test_rollups_built_for_existing_database(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE trades (signature TEXT PRIMARY KEY, ts INTEGER, mint TEXT, token_delta REAL, quote_mint TEXT, quote_delta REAL, price REAL, raw TEXT)")
+    old.execute("INSERT INTO trades VALUES ('OLD1', 1700000000, 'MINTX', -4.0, NULL, NULL, NULL, NULL)")
+    old.commit()
+    old.close()
+
+    conn = init_db(path)
+    assert compute_volumes_sql(conn, "MINTX", now_ts=1_700_000_010)["1m"] == 4.0
+    conn.close()
+
+
+def test_token_volume_summed_from_raw_amounts(tmp_path):
+    conn = init_db(str(tmp_path / "raw.db"))
+    now = 1_700_000_000
+    for i in range(10):
+        save_trade(conn, Trade(signature=f"R{i}", ts=now - i, mint="MINTR", token_delta=0.1,
+                               token_delta_raw=100_000, token_decimals=6))
+    assert sum([0.1] * 10) != 1.0
+    assert compute_volumes_sql(conn, "MINTR", now_ts=now)["1m"] == 1.0
+    assert compute_volumes_sql(conn, "MINTR", now_ts=now, use_rollups=False)["1m"] == 1.0
+    (first,) = [t for t in get_trades_for_mint(conn, "MINTR") if t.signature == "R0"]
+    assert (first.token_delta_raw, first.token_decimals) == (100_000, 6)
+
+    # a trade without a raw amount makes the window fall back to float sums
+    save_trade(conn, Trade(signature="F", ts=now, mint="MINTR", token_delta=0.1))
+    assert compute_volumes_sql(conn, "MINTR", now_ts=now)["1m"] == sum([0.1] * 11)
+
+
+def test_schema_migrates_to_raw_amounts(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "v0.db")
+    init_db(path).close()
+    # rewind to the pre-raw-amounts schema, with a rollup trigger that ignores them
+    old = sqlite3.connect(path)
+    old.executescript(
+        "DROP TABLE trades; PRAGMA user_version = 0;"
+        "ALTER TABLE volume_buckets DROP COLUMN token_volume_raw; ALTER TABLE volume_buckets DROP COLUMN raw_count;"
+        "ALTER TABLE volume_buckets DROP COLUMN token_decimals;"
+        "CREATE TABLE trades (signature TEXT PRIMARY KEY, ts INTEGER, mint TEXT, token_delta REAL, "
+        "quote_mint TEXT, quote_delta REAL, price REAL, raw TEXT);"
+        "INSERT INTO trades VALUES ('OLD1', 1700000000, 'MINTX', -4.0, NULL, NULL, NULL, NULL);"
+        "CREATE TRIGGER trades_rollup AFTER INSERT ON trades BEGIN SELECT 1; END;"
+    )
+    old.close()
+
+    conn = init_db(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(trades)")}
+    assert {"token_delta_raw", "token_decimals", "quote_delta_raw", "quote_decimals"} <= cols
+    (old_trade,) = get_trades_for_mint(conn, "MINTX")
+    assert old_trade.token_delta == -4.0 and old_trade.token_delta_raw is None
+    save_trade(conn, Trade(signature="NEW1", ts=1_700_000_001, mint="MINTX", token_delta=2.0,
+                           token_delta_raw=2_000_000, token_decimals=6))
+    assert compute_volumes_sql(conn, "MINTX", now_ts=1_700_000_010)["1m"] == 6.0
+    conn.close()
+
+
+def test_trades_read_from_typed_columns(tmp_path):
+    import json
+    import types
+
+    from store import iter_trades_for_mint
+
+    path = str(tmp_path / "v1.db")
+    conn = init_db(path)
+    t = Trade(signature="J1", ts=1_700_000_000, mint="MINTJ", token_delta=1.5, quote_mint="Q",
+              quote_delta=-3.0, price=2.0, token_delta_raw=1_500_000, token_decimals=6)
+    save_trade(conn, t)
+    assert conn.execute("SELECT raw FROM trades").fetchone()[0] is None
+    # a version 1 database still holds a JSON copy of each trade
+    conn.execute("UPDATE trades SET raw = ?", (json.dumps(t.__dict__),))
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    conn = init_db(path)
+    assert conn.execute("SELECT raw FROM trades").fetchone()[0] is None
+    it = iter_trades_for_mint(conn, "MINTJ")
+    assert isinstance(it, types.GeneratorType)
+    assert list(it) == [t] == get_trades_for_mint(path, "MINTJ", since_ts=t.ts)
+    assert get_trades_for_mint(conn, "MINTJ", since_ts=t.ts + 1) == []
+
+
+def test_rollups_rebuild_only_when_stablecoins_change(tmp_path, monkeypatch):
+    import config
+    import store
+
+    path = str(tmp_path / "marker.db")
+    calls = []
+    real = store.rebuild_rollups
+    monkeypatch.setattr(store, "rebuild_rollups", lambda conn: calls.append(1) or real(conn))
+    monkeypatch.setattr(config, "STABLECOIN_MINTS", set())
+
+    # an empty stablecoin set is built once, not on every open
+    for _ in range(3):
+        init_db(path).close()
+    assert len(calls) == 1
+
+    monkeypatch.setattr(config, "STABLECOIN_MINTS", {"USDX"})
+    init_db(path).close()
+    init_db(path).close()
+    assert len(calls) == 2